@@ -31,18 +31,28 @@ import importlib.metadata as metadata
 import logging
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator, List, Union
+from typing import Iterator, List, Optional, Tuple, Union
 
 import click
 import click_log  # type: ignore
 
 from doxysphinx.doxygen import (
+    ConfigDict,
     DoxygenOutputPathValidator,
+    DoxygenRunner,
     DoxygenSettingsValidator,
-    read_doxyconfig,
+    read_doxyconfigs,
 )
 from doxysphinx.process import Builder, Cleaner
+from doxysphinx.resources import (
+    CSS_ENGINES,
+    SHARED_RESOURCES_DIR,
+    ProvisioningOptions,
+)
+from doxysphinx.toc import TOC_GENERATORS
 from doxysphinx.utils.contexts import TimedContext
+from doxysphinx.utils.files import DEFAULT_IO_WORKERS, PROVISIONING_STRATEGIES
+from doxysphinx.writer import WriterOptions
 
 _logger = logging.getLogger()
 click_log.basic_config(_logger)
@@ -117,10 +127,100 @@ def cli():
     "The default allows full usage of all cores on the system and thus does not restrict the number of "
     "workers spawned.",
 )
+@click.option(
+    "--shared_chrome",
+    is_flag=True,
+    default=False,
+    help="write the doxygen page header and footer to shared fragment files instead of repeating them in every "
+    "rst file that contains rst snippets. This reduces the output size on large projects.",
+)
+@click.option(
+    "--minify",
+    is_flag=True,
+    default=False,
+    help="minify the raw html in rst files that contain rst snippets (strips comments and collapses whitespace "
+    "outside of code fragments). Html files without rst snippets are included as they are.",
+)
+@click.option(
+    "--toc",
+    type=click.Choice(list(TOC_GENERATORS)),
+    default="menu",
+    help="the doxygen navigation data the toctrees are generated from. 'menu' (the default) uses doxygen's menu "
+    "(menudata.js) while 'navtree' uses doxygen's treeview (navtreedata.js - needs GENERATE_TREEVIEW = YES) which "
+    "adds the class/file hierarchy to the toctrees.",
+)
+@click.option(
+    "--provisioning",
+    type=click.Choice(list(PROVISIONING_STRATEGIES)),
+    default="copy",
+    help="how resources (images, stylesheets, scripts etc.) are provided in the sphinx output. 'hardlink', "
+    "'reflink' and 'copy_file_range' avoid copying the data on local file systems that support them, 'symlink' "
+    "links to the doxygen output. Files are copied if the chosen strategy isn't supported. The default is 'copy'.",
+)
+@click.option(
+    "--io_workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help="the number of threads that copy resources to the sphinx output. Copying is mostly waiting for the file "
+    "system, so this can exceed the number of cores. The default is min(32, cores + 4) ('sequential' uses 1).",
+)
+@click.option(
+    "--shared_resources",
+    is_flag=True,
+    default=False,
+    help="store the static doxygen resources (scripts, stylesheets, icons) of all projects only once in "
+    f"SPHINX_OUTPUT/{SHARED_RESOURCES_DIR} and let the rst files that contain rst snippets reference them there. "
+    "This reduces the output size for many projects and browsers load these resources only once for the site.",
+)
+@click.option(
+    "--css_engine",
+    type=click.Choice(list(CSS_ENGINES)),
+    default="sass",
+    help="the engine that scopes the doxygen stylesheets below the doxygen content. 'sass' (the default) compiles "
+    "them with libsass while 'native' prefixes the selectors with a fast pure python implementation (which also "
+    "keeps dark mode rules of doxygen-awesome working).",
+)
+@click.option(
+    "--referenced_resources",
+    is_flag=True,
+    default=False,
+    help="provide only the images that are referenced by the doxygen html pages (or by the stylesheets and "
+    "scripts) instead of all images in the doxygen output - which may contain orphaned graphs of former doxygen runs.",
+)
+@click.option(
+    "--precompress",
+    is_flag=True,
+    default=False,
+    help="write compressed siblings (.gz - and .br if the brotli package is installed) of the provided stylesheets, "
+    "scripts and svgs for web servers that can deliver precompressed files (like nginx's gzip_static).",
+)
+@click.option(
+    "--run_doxygen",
+    is_flag=True,
+    default=False,
+    help="run doxygen (in parallel) for the doxyfile INPUTs before building - but only for the projects whose inputs "
+    "(configuration, source files, stylesheets etc.) changed since doxygen ran the last time.",
+)
 @click.argument("sphinx_source", type=click.Path(file_okay=False, exists=True, path_type=Path))
 @click.argument("sphinx_output", type=click.Path(file_okay=False, path_type=Path))
 @_doxygen_context()
-def build(parallel: bool, workers: Union[int, None], sphinx_source: Path, sphinx_output: Path, **kwargs):
+def build(
+    parallel: bool,
+    workers: Union[int, None],
+    shared_chrome: bool,
+    minify: bool,
+    toc: str,
+    provisioning: str,
+    io_workers: Union[int, None],
+    shared_resources: bool,
+    css_engine: str,
+    referenced_resources: bool,
+    precompress: bool,
+    run_doxygen: bool,
+    sphinx_source: Path,
+    sphinx_output: Path,
+    **kwargs,
+):
     """
     Build rst and copy related files for doxygen projects.
 
@@ -138,9 +238,34 @@ def build(parallel: bool, workers: Union[int, None], sphinx_source: Path, sphinx
     doxy_context = DoxygenContext(**kwargs)
     _logger.info("starting build command...")
     with TimedContext() as timed_scope:
-        builder = Builder(sphinx_source, sphinx_output, parallel=parallel, workers=workers)
-        for doxy_output in _get_doxygen_outdirs(doxy_context, sphinx_source):
-            builder.build(doxy_output)
+        writer_options = WriterOptions(shared_chrome=shared_chrome, minify=minify)
+        builder = Builder(
+            sphinx_source,
+            sphinx_output,
+            parallel=parallel,
+            workers=workers,
+            writer_options=writer_options,
+            toc_generator_type=TOC_GENERATORS[toc],
+            provisioning_options=ProvisioningOptions(
+                strategy=provisioning,
+                io_workers=io_workers or (DEFAULT_IO_WORKERS if parallel else 1),
+                shared_resources_dir=sphinx_output / SHARED_RESOURCES_DIR if shared_resources else None,
+                css_engine=css_engine,
+                referenced_only=referenced_resources,
+                precompress=precompress,
+            ),
+        )
+        projects = list(
+            _get_doxygen_projects(
+                doxy_context, sphinx_source, generate_treeview=toc == "navtree", workers=workers if parallel else 1
+            )
+        )
+        if run_doxygen:
+            runner = DoxygenRunner(doxy_context.doxygen_exe, doxy_context.doxygen_cwd, workers if parallel else 1)
+            doxyfiles = runner.run([(i, config, outdir) for i, outdir, config in projects if config is not None])
+            _logger.info(f"doxygen ran for {len(doxyfiles)} of {len(projects)} projects.")
+        for _, doxy_output, doxy_config in projects:
+            builder.build(doxy_output, doxy_config)
     _logger.info(f"build command done in {timed_scope.elapsed_humanized()} ({timed_scope.elapsed()}).")
 
 
@@ -175,23 +300,43 @@ def clean(parallel: bool, workers: Union[int, None], sphinx_source: Path, sphinx
     _logger.info("starting clean command...")
     with TimedContext() as tc:
         cleaner = Cleaner(sphinx_source, sphinx_output, parallel=parallel, workers=workers)
-        for doxy_output in _get_doxygen_outdirs(doxy_context, sphinx_source):
+        for doxy_output in _get_doxygen_outdirs(doxy_context, sphinx_source, workers=workers if parallel else 1):
             cleaner.cleanup(doxy_output)
     _logger.info(f"clean command done in {tc.elapsed_humanized()}.")
 
 
-def _get_doxygen_outdirs(doxy_context: DoxygenContext, sphinx_source: Path) -> Iterator[Path]:
-    for i in doxy_context.input:
-        if i.is_dir():
-            yield _get_outdir_via_doxyoutputdir(i)
-        else:
-            yield _get_outdir_via_doxyfile(i, sphinx_source, doxy_context)
+def _get_doxygen_outdirs(
+    doxy_context: DoxygenContext, sphinx_source: Path, generate_treeview: bool = False, workers: Optional[int] = None
+) -> Iterator[Path]:
+    return (outdir for _, outdir, _ in _get_doxygen_projects(doxy_context, sphinx_source, generate_treeview, workers))
 
 
-def _get_outdir_via_doxyfile(doxyfile: Path, sphinx_source: Path, doxy_context: DoxygenContext) -> Path:
-    config = read_doxyconfig(doxyfile, doxy_context.doxygen_exe, doxy_context.doxygen_cwd)
+def _get_doxygen_projects(
+    doxy_context: DoxygenContext, sphinx_source: Path, generate_treeview: bool = False, workers: Optional[int] = None
+) -> Iterator[Tuple[Path, Path, Optional[ConfigDict]]]:
+    """Get the inputs with their doxygen html output directory and configuration (None if an output dir was given)."""
+    # the configurations of all doxyfiles are read concurrently upfront (each needs doxygen runs)
+    doxyfiles = [i for i in doxy_context.input if not i.is_dir()]
+    configs = dict(
+        zip(doxyfiles, read_doxyconfigs(doxyfiles, doxy_context.doxygen_exe, doxy_context.doxygen_cwd, workers))
+    )
 
-    validator = DoxygenSettingsValidator()
+    for i in doxy_context.input:
+        if i.is_dir():
+            yield i, _get_outdir_via_doxyoutputdir(i), None
+        else:
+            config = configs[i]
+            yield i, _get_outdir_via_doxyconfig(config, i, sphinx_source, doxy_context, generate_treeview), config
+
+
+def _get_outdir_via_doxyconfig(
+    config: ConfigDict,
+    doxyfile: Path,
+    sphinx_source: Path,
+    doxy_context: DoxygenContext,
+    generate_treeview: bool = False,
+) -> Path:
+    validator = DoxygenSettingsValidator(generate_treeview)
     if not validator.validate(config, sphinx_source, doxy_context.doxygen_cwd):
         if any(item for item in validator.validation_errors if not item.startswith("Hint:")):
             message = validator.validation_msg
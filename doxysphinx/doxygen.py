@@ -10,17 +10,40 @@
 # =====================================================================================
 """The doxygen module contains classes and functions specific to doxygen."""
 
+import hashlib
+import json
+import logging
 import os
 import re
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from fnmatch import fnmatch
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Union, cast
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
 import pyjson5
 
+from doxysphinx.utils.cache import UserCache
+from doxysphinx.utils.exceptions import ApplicationError
+from doxysphinx.utils.files import FileManifest, FileManifestEntry
 from doxysphinx.utils.pathlib_fix import path_is_relative_to, path_resolve
 
+_logger = logging.getLogger(__name__)
+
 ConfigDict = Dict[str, Union[str, List[str]]]
 
 
@@ -38,95 +61,225 @@ def read_doxyconfig(doxyfile: Path, doxygen_exe: str, doxygen_cwd: Path) -> Conf
     Supplement the doxygen configuration file with the default doxygen configuration and return the final
     key value pairs as a dict.
 
+    Doxygen is run twice for that, so the resulting configuration is cached in the user cache (see
+    :class:`~doxysphinx.utils.cache.UserCache`). The cache key consists of the contents of the doxyfile and the
+    files it includes (``@INCLUDE``), the environment variables they reference, the doxygen executable and its
+    version and the working directory. Doxygen therefore only runs again if one of these changed.
+
     :param doxyfile: the doxygen configuration file to read
     :param doxygen_exe: in case one wants to execute doxygen from another directory.
     :return: a dict representing all key-value pairs defined in the final configuration
              (including warnings from the console output). The value can either be a single value or a list.
     """
+    cache = UserCache("doxyconfig")
+    key = _get_doxyconfig_cache_key(doxyfile, doxygen_exe, doxygen_cwd)
+    if key and (cached := cache.get(key)):
+        _logger.debug(f"took the configuration of {doxyfile} from the user cache.")
+        return json.loads(cached)
+
     output = _compare_configs(doxyfile, doxygen_exe, doxygen_cwd)
     config = _parse_stdout(output.out)
     config["WARNINGS"] = _parse_stderr(output.err)
+
+    # failed doxygen runs aren't cached (they have no output)
+    if key and output.out:
+        cache.put(key, json.dumps(config))
     return config
 
 
-def _compare_configs(doxyfile: Path, doxygen_exe: str, doxygen_cwd: Path) -> DoxyOutput:
-    from subprocess import CalledProcessError, run  # nosec: B404
+def read_doxyconfigs(
+    doxyfiles: Sequence[Path], doxygen_exe: str, doxygen_cwd: Path, workers: Optional[int] = None
+) -> List[ConfigDict]:
+    """Read several doxyconfigs concurrently (see :func:`read_doxyconfig`).
+
+    Doxygen runs in subprocesses, so threads are sufficient to read the configurations in parallel.
+
+    :param doxyfiles: the doxygen configuration files to read
+    :param doxygen_exe: in case one wants to execute doxygen from another directory.
+    :param doxygen_cwd: the directory doxygen is executed in.
+    :param workers: the maximum number of doxygen processes running in parallel (default: the number of cpus).
+    :return: the configurations (in the order of the doxyfiles).
+    """
+    max_workers = min(workers or os.cpu_count() or 1, len(doxyfiles))
+    if max_workers < 2:
+        return [read_doxyconfig(doxyfile, doxygen_exe, doxygen_cwd) for doxyfile in doxyfiles]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda doxyfile: read_doxyconfig(doxyfile, doxygen_exe, doxygen_cwd), doxyfiles))
 
+
+# version of the cached configurations (has to be increased when the parsing changes)
+_doxyconfig_cache_version = 1
+_include_regex = re.compile(r"^[ \t]*(@INCLUDE|@INCLUDE_PATH)[ \t]*=(.*)$", re.MULTILINE)
+_include_value_regex = re.compile(r'"([^"]*)"|(\S+)')
+_env_var_regex = re.compile(r"\$\(([\w.-]+)\)")
+
+
+def _get_doxyconfig_cache_key(doxyfile: Path, doxygen_exe: str, doxygen_cwd: Path) -> Optional[str]:
     doxygen = shutil.which(doxygen_exe)
-    if doxygen is None:
-        return DoxyOutput("", f"Command not found: {doxygen_exe}")
+    if doxygen is None or not doxyfile.is_file():
+        return None
+    version = _get_doxygen_version(doxygen)
+    if not version:
+        return None
+
+    hasher = hashlib.blake2b()
+    for part in [doxygen, version, str(doxyfile.absolute()), str(Path(doxygen_cwd).absolute())]:
+        hasher.update(part.encode("utf-8") + b"\0")
+
+    env_vars = set()
+    for file, content in _read_config_files(doxyfile, Path(doxygen_cwd)):
+        hasher.update(file.encode("utf-8") + b"\0" + hashlib.blake2b(content).digest())
+        env_vars.update(_env_var_regex.findall(content.decode("utf-8", errors="replace")))
+    for env_var in sorted(env_vars):
+        hasher.update(f"{env_var}={os.environ.get(env_var)}".encode("utf-8") + b"\0")
+
+    return f"config-v{_doxyconfig_cache_version}-{hasher.hexdigest()}.json"
+
+
+def _get_doxygen_version(doxygen: str) -> str:
+    # the version is cached too (by the size and modification time of the executable) so no process is started
+    stat = os.stat(doxygen)
+    cache = UserCache("doxyconfig")
+    key = f"version-{hashlib.blake2b(f'{doxygen}|{stat.st_size}|{stat.st_mtime_ns}'.encode('utf-8')).hexdigest()}.txt"
+    if version := cache.get(key):
+        return version
 
-    try:
-        default_config = run(  # nosec: B603
-            [doxygen_exe, "-s", "-g", "-"], cwd=doxygen_cwd, capture_output=True, check=True
-        )
-        custom_config = run(  # nosec: B603
-            [doxygen_exe, "-x", doxyfile.absolute()], cwd=doxygen_cwd, capture_output=True, check=False
-        )
+    from subprocess import CalledProcessError, run  # nosec: B404
 
-        return DoxyOutput(
-            default_config.stdout.decode("utf-8") + custom_config.stdout.decode("utf-8"),
-            default_config.stderr.decode("utf-8") + custom_config.stderr.decode("utf-8"),
-        )
+    try:
+        result = run([doxygen, "--version"], capture_output=True, check=True)  # nosec: B603
+    except (CalledProcessError, OSError):
+        return ""
+    version = result.stdout.decode("utf-8").strip()
+    if version:
+        cache.put(key, version)
+    return version
+
+
+def _read_config_files(doxyfile: Path, doxygen_cwd: Path) -> Iterator[Tuple[str, bytes]]:
+    """Read a doxyfile and the files it includes (recursively) - included files that don't exist have no content."""
+    files = [doxyfile]
+    seen = {doxyfile.absolute()}
+    include_paths: List[Path] = []
+    while files:
+        file = files.pop(0)
+        content = file.read_bytes()
+        yield str(file.absolute()), content
+
+        for setting, value in _include_regex.findall(content.decode("utf-8", errors="replace")):
+            values = [quoted or unquoted for quoted, unquoted in _include_value_regex.findall(value)]
+            if setting == "@INCLUDE_PATH":
+                include_paths.extend(doxygen_cwd / v for v in values)
+                continue
+            # doxygen looks for included files in the working directory and then in the @INCLUDE_PATH
+            for name in values:
+                candidates = [doxygen_cwd / name, *(p / name for p in include_paths)]
+                included = next((c.absolute() for c in candidates if c.is_file()), None)
+                if included is None:
+                    yield name, b""
+                elif included not in seen:
+                    seen.add(included)
+                    files.append(included)
 
-    except CalledProcessError as err:
-        return DoxyOutput("", f"Error: {err}")
 
+def _compare_configs(doxyfile: Path, doxygen_exe: str, doxygen_cwd: Path) -> DoxyOutput:
+    from subprocess import PIPE, CalledProcessError, Popen  # nosec: B404
 
-def _parse_stdout(text: str) -> ConfigDict:
-    """Remove comment lines and parse the console output via pyparsing to a dictionary.
+    doxygen = shutil.which(doxygen_exe)
+    if doxygen is None:
+        return DoxyOutput("", f"Command not found: {doxygen_exe}")
 
-    :param text: standard output of the console.
-    :return: a configuration dictionary with possibility of lists as values.
-    """
-    from pyparsing import (
-        FollowedBy,
-        Group,
-        LineEnd,
-        Literal,
-        ParserElement,
-        QuotedString,
-        Suppress,
-        White,
-        Word,
-        delimited_list,
-        printables,
-        srange,
+    # the effective config is read in the background while the default config is fetched
+    with Popen(  # nosec: B603
+        [doxygen_exe, "-x", doxyfile.absolute()], cwd=doxygen_cwd, stdout=PIPE, stderr=PIPE
+    ) as custom_config:
+        try:
+            default_config = _get_default_config(doxygen, doxygen_cwd)
+        except CalledProcessError as err:
+            custom_config.kill()
+            return DoxyOutput("", f"Error: {err}")
+        custom_stdout, custom_stderr = custom_config.communicate()
+
+    return DoxyOutput(
+        default_config.out + custom_stdout.decode("utf-8"),
+        default_config.err + custom_stderr.decode("utf-8"),
     )
 
-    lines: List[str] = text.split(os.linesep)
-    pure_text = os.linesep.join([line for line in lines if _is_config_line(line)])
 
-    ParserElement.set_default_whitespace_chars(" \t")
-    line_end = White("\r\n") | LineEnd()
+# the default configs of the doxygen executables (they are the same for all doxyfiles)
+_default_configs: Dict[str, DoxyOutput] = {}
+_default_configs_lock = threading.Lock()
 
-    doxy_flag = Word(srange("[A-Z_]")) + FollowedBy("=")
-    list_items = delimited_list(
-        QuotedString('"') | QuotedString("'") | Word(printables), Group(Literal("\\") + line_end)
-    )
-    config_pair = doxy_flag + Suppress("=") + list_items
-    config = config_pair.search_string(pure_text).asList()
 
-    # format correcting
-    for i in range(len(config)):
-        if len(config[i]) > 2:
-            flag = config[i][0]
-            val = config[i][1:]
-            config[i] = [flag, val]
+def _get_default_config(doxygen: str, doxygen_cwd: Path) -> DoxyOutput:
+    """Get the default config of a doxygen executable (it's only fetched once per executable and process)."""
+    from subprocess import run  # nosec: B404
 
-    config_dict = {item[0]: item[1] for item in config}
+    # (concurrent callers wait for the one doxygen run instead of starting their own)
+    with _default_configs_lock:
+        if doxygen not in _default_configs:
+            default_config = run(  # nosec: B603
+                [doxygen, "-s", "-g", "-"], cwd=doxygen_cwd, capture_output=True, check=True
+            )
+            _default_configs[doxygen] = DoxyOutput(
+                default_config.stdout.decode("utf-8"), default_config.stderr.decode("utf-8")
+            )
+        return _default_configs[doxygen]
 
-    return config_dict
 
+# a tag assignment ("TAG = value", "TAG += value") at the beginning of a line
+_tag_regex = re.compile(r"^[ \t]*(@?[A-Z_][A-Z0-9_]*)[ \t]*(\+?=)(.*)$")
+# the values of a tag: quoted strings, a comment, the line continuation or unquoted words
+_value_regex = re.compile(r""""((?:\\.|[^"\\])*)"|'([^']*)'|(#.*)|(\\)\s*$|(\S+)""")
 
-def _is_config_line(line: str) -> bool:
-    normalized_line = line.strip()
 
-    # false for comments
-    if normalized_line.startswith("#"):
-        return False
+def _parse_stdout(text: str) -> ConfigDict:
+    """Parse the console output (doxyfile format) to a dictionary.
 
-    return True
+    The format is parsed line by line (in linear time): Each tag assignment (``TAG = value``) starts at the beginning
+    of a line. The values are separated by whitespace, can be quoted (``"a value"``) and can continue on the next line
+    if a line ends with a backslash. ``TAG += value`` appends to the values of a tag. Lines starting with ``#`` and
+    everything after an unquoted ``#`` are comments. Later assignments override former ones (so the default config
+    followed by the custom config results in the effective config).
+
+    :param text: standard output of the console.
+    :return: a configuration dictionary with possibility of lists as values (tags with a single value have a string,
+        tags without any value are omitted).
+    """
+    config: Dict[str, List[str]] = {}
+    tag, continued = "", False
+    values: List[str] = []
+    for line in text.splitlines():
+        if not continued:
+            match = _tag_regex.match(line)
+            if not match:
+                continue
+            tag, operator, line = match.groups()
+            values = config.get(tag, []) if operator == "+=" else []
+
+        continued = _parse_values(line, values)
+        if not continued and values:
+            config[tag] = values
+
+    if continued and values:
+        config[tag] = values
+
+    return {tag: values[0] if len(values) == 1 else values for tag, values in config.items()}
+
+
+def _parse_values(text: str, values: List[str]) -> bool:
+    """Parse the values of a line and add them to the given values - returns whether the values continue."""
+    for match in _value_regex.finditer(text):
+        double_quoted, single_quoted, comment, continuation, word = match.groups()
+        if comment is not None:
+            break
+        if continuation is not None:
+            return True
+        if double_quoted is not None:
+            values.append(double_quoted.replace('\\"', '"'))
+        else:
+            values.append(single_quoted if single_quoted is not None else word)
+    return False
 
 
 def _parse_stderr(text: str) -> List[str]:
@@ -162,6 +315,18 @@ class DoxygenSettingsValidator:
     }
     """A dictionary containing further optional settings for the doxygen config."""
 
+    def __init__(self, generate_treeview: bool = False):
+        """
+        Create an instance of DoxygenSettingsValidator.
+
+        :param generate_treeview: Whether doxygen's treeview is needed - e.g. because the toctrees are generated
+            from doxygen's navigation tree (see :class:`~doxysphinx.toc.DoxygenNavtreeTocGenerator`). Then
+            GENERATE_TREEVIEW = YES is recommended instead of the mandatory NO.
+        """
+        if generate_treeview:
+            self.mandatory_settings = {k: v for k, v in self.mandatory_settings.items() if k != "GENERATE_TREEVIEW"}
+            self.optional_settings = {**self.optional_settings, "GENERATE_TREEVIEW": "YES"}
+
     @staticmethod
     def _normalize_option(key: str, value: Union[str, List[str]]) -> Union[str, List[str]]:
         """Normalize incoming value before comparing to recommended/mandatory setting."""
@@ -297,15 +462,57 @@ def read_js_data_file(js_data_file: Path) -> Any:
     """
     Read a doxygen javascript data file (e.g. menudata.js) and returns the data as json structure.
 
+    The data is cached (see :func:`read_js_data_vars`) - so it mustn't be modified.
+
     :param js_data_file: The doxygen js data file to use.
     :return: a json like dict of the data.
     """
+    return next(iter(read_js_data_vars(js_data_file).values()))
+
+
+_js_var_regex = re.compile(r"^var\s+(\w+)\s*=", re.MULTILINE)
+
+
+def read_js_data_vars(js_data_file: Path) -> Dict[str, Any]:
+    """
+    Read a doxygen javascript data file that defines multiple variables (e.g. navtreedata.js).
+
+    The parsed data is cached (by path, size and modification time of the file), so a file is parsed only once per
+    process as long as it doesn't change. Callers therefore mustn't modify the returned data.
+
+    :param js_data_file: The doxygen js data file to use.
+    :return: a dict of variable name to the (json like) data of the variable.
+    """
+    stat = js_data_file.stat()
+    return _read_js_data_vars(js_data_file.absolute(), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=64)
+def _read_js_data_vars(js_data_file: Path, size: int, mtime_ns: int) -> Dict[str, Any]:
+    # (size and mtime_ns are only part of the cache key - so changed files are read again)
     data = js_data_file.read_text(encoding="utf-8")
-    sanitized = re.sub(r"var .*=", "", data)
-    result: Any = pyjson5.loads(sanitized)
+    matches = list(_js_var_regex.finditer(data))
+    if not matches:
+        return {"": _load_js_value(data)}
+
+    # the values are cut out by position (the prologue before the first variable is e.g. a license comment)
+    ends = [m.start() for m in matches[1:]] + [len(data)]
+    result: Dict[str, Any] = {}
+    for match, end in zip(matches, ends):
+        value = data[match.end() : end].strip().rstrip(";")
+        result[match.group(1)] = _load_js_value(value)
     return result
 
 
+def _load_js_value(value: str) -> Any:
+    # strict json (e.g. the navtreeindex shards) is parsed faster by the json module. Other values (e.g. menudata
+    # with its unquoted keys) are detected early by the json parser and parsed as json5.
+    try:
+        return json.loads(value)
+    except ValueError:
+        return pyjson5.loads(value)
+
+
 class DoxygenOutputPathValidator:
     """Validates doxygen html output paths."""
 
@@ -329,3 +536,163 @@ class DoxygenOutputPathValidator:
                 "(we're checking for existance of \"doxygen.css\" and weren't able to find it there)."
             )
         return svg_exists
+
+
+class DoxygenRunner:
+    """
+    Runs doxygen for doxygen projects - but only for the projects whose inputs changed since doxygen ran last.
+
+    The inputs of a project are its (resolved) configuration, the doxygen version and the files doxygen reads: the
+    source files (see ``INPUT``, ``FILE_PATTERNS``, ``RECURSIVE``, ``EXCLUDE`` and ``EXCLUDE_PATTERNS``) and further
+    files like ``HTML_EXTRA_STYLESHEET``, ``LAYOUT_FILE`` or the ``IMAGE_PATH``. The state of the inputs is recorded
+    in a manifest in the html output directory after each successful doxygen run (see
+    :class:`~doxysphinx.utils.files.FileManifest` - files with another modification time are compared by hash, so
+    e.g. fresh checkouts in ci don't lead to doxygen runs).
+    """
+
+    _logger = logging.getLogger(__name__)
+
+    _manifest_name = ".doxysphinx_doxygen.json"
+    # the manifest key of the configuration (can't collide with the absolute paths of the input files)
+    _config_key = ":config"
+    # the file patterns doxygen uses if FILE_PATTERNS is empty
+    _default_file_patterns = (
+        "*.c *.cc *.cxx *.cpp *.c++ *.java *.ii *.ixx *.ipp *.i++ *.inl *.idl *.ddl *.odl *.h *.hh *.hxx *.hpp *.h++ "
+        "*.l *.cs *.d *.php *.php4 *.php5 *.phtml *.inc *.m *.markdown *.md *.mm *.dox *.py *.pyw *.f90 *.f95 *.f03 "
+        "*.f08 *.f18 *.f *.for *.vhd *.vhdl *.ucf *.qsf *.ice"
+    ).split()
+    # settings with further files (or directories) doxygen reads
+    _additional_input_settings = [
+        "HTML_HEADER",
+        "HTML_FOOTER",
+        "HTML_STYLESHEET",
+        "HTML_EXTRA_STYLESHEET",
+        "HTML_EXTRA_FILES",
+        "LAYOUT_FILE",
+        "CITE_BIB_FILES",
+        "TAGFILES",
+        "IMAGE_PATH",
+        "EXAMPLE_PATH",
+        "USE_MDFILE_AS_MAINPAGE",
+    ]
+
+    def __init__(self, doxygen_exe: str, doxygen_cwd: Path, workers: Optional[int] = None):
+        """
+        Create a DoxygenRunner.
+
+        :param doxygen_exe: the name/path of the doxygen executable.
+        :param doxygen_cwd: the directory doxygen is executed in (paths in the configurations are relative to it).
+        :param workers: the maximum number of doxygen processes that run in parallel (None = number of cores).
+        """
+        self._doxygen_exe = doxygen_exe
+        self._doxygen_cwd = Path(doxygen_cwd)
+        self._workers = workers or os.cpu_count() or 1
+
+    def run(self, projects: Sequence[Tuple[Path, ConfigDict, Path]]) -> List[Path]:
+        """
+        Run doxygen (in parallel) for the projects whose inputs changed.
+
+        :param projects: the projects as tuples of doxyfile, its configuration (see :func:`read_doxyconfig`) and its
+            html output directory.
+        :return: the doxyfiles doxygen ran for.
+        """
+        doxygen = shutil.which(self._doxygen_exe)
+        if doxygen is None:
+            raise ApplicationError(f"Command not found: {self._doxygen_exe}")
+        version = _get_doxygen_version(doxygen)
+
+        with ThreadPoolExecutor(max_workers=min(self._workers, max(len(projects), 1))) as executor:
+            ran = list(executor.map(lambda p: self._run_if_changed(p[0], p[1], p[2], version), projects))
+        return [doxyfile for (doxyfile, _, _), has_run in zip(projects, ran) if has_run]
+
+    def _run_if_changed(self, doxyfile: Path, config: ConfigDict, html_output_dir: Path, version: str) -> bool:
+        manifest = FileManifest(html_output_dir / self._manifest_name)
+        inputs = self._collect_inputs(config)
+        config_entry = FileManifestEntry(0, 0, self._hash_config(config, version))
+
+        # the state of the inputs is recorded before doxygen runs (so that changes during the run aren't missed)
+        changed = [key for key, file in inputs.items() if not manifest.is_unchanged(key, file)]
+        stale = [key for key in manifest.relative_paths() if key not in inputs and key != self._config_key]
+        if not changed and not stale and manifest.get(self._config_key) == config_entry:
+            self._logger.info(f"the inputs of {doxyfile} didn't change - skipping doxygen.")
+            return False
+
+        self._logger.info(f"running doxygen for {doxyfile} ({len(changed)} of {len(inputs)} input files changed)...")
+        for key in changed:
+            manifest.update(key, inputs[key])
+        for key in stale:
+            manifest.remove(key)
+        manifest.set(self._config_key, config_entry)
+
+        self._run_doxygen(doxyfile)
+        manifest.file.parent.mkdir(parents=True, exist_ok=True)
+        manifest.save()
+        return True
+
+    def _run_doxygen(self, doxyfile: Path):
+        from subprocess import run  # nosec: B404
+
+        result = run(  # nosec: B603
+            [self._doxygen_exe, str(doxyfile.absolute())], cwd=self._doxygen_cwd, capture_output=True, check=False
+        )
+        if result.returncode != 0:
+            raise ApplicationError(
+                f"doxygen failed for {doxyfile} (exit code {result.returncode}):\n"
+                f"{result.stderr.decode('utf-8', errors='replace')}"
+            )
+        if result.stderr:
+            self._logger.debug(f"doxygen output for {doxyfile}:\n{result.stderr.decode('utf-8', errors='replace')}")
+
+    @staticmethod
+    def _hash_config(config: ConfigDict, version: str) -> str:
+        # (the warnings of doxysphinx's config reading aren't part of the configuration)
+        settings = {key: value for key, value in config.items() if key != "WARNINGS"}
+        content = f"{version}\n{json.dumps(settings, sort_keys=True)}"
+        return hashlib.blake2b(content.encode("utf-8")).hexdigest()
+
+    def _collect_inputs(self, config: ConfigDict) -> Dict[str, Path]:
+        """Collect the files doxygen reads (by their absolute posix path)."""
+        excluded = {
+            Path(os.path.abspath(self._doxygen_cwd / e))
+            for e in [*_setting_values(config, "EXCLUDE"), *_setting_values(config, "OUTPUT_DIRECTORY")]
+            if e
+        }
+        exclude_patterns = _setting_values(config, "EXCLUDE_PATTERNS")
+        source_patterns = _setting_values(config, "FILE_PATTERNS") or self._default_file_patterns
+        recursive = config.get("RECURSIVE") == "YES"
+
+        files: List[Path] = []
+        for source in _setting_values(config, "INPUT") or [""]:
+            files.extend(self._find_files(source, source_patterns, recursive, excluded, exclude_patterns))
+        for setting in self._additional_input_settings:
+            # (tag files are given as "file=location")
+            for value in (v.split("=", 1)[0] for v in _setting_values(config, setting)):
+                files.extend(self._find_files(value, ["*"], True, excluded, []))
+
+        return {file.as_posix(): file for file in files}
+
+    def _find_files(
+        self, source: str, patterns: Sequence[str], recursive: bool, excluded: Set[Path], exclude_patterns: List[str]
+    ) -> Iterator[Path]:
+        path = Path(os.path.abspath(self._doxygen_cwd / source))
+        if path.is_file():
+            yield path
+            return
+
+        for directory, dirs, names in os.walk(path):
+            # excluded directories aren't descended into
+            dirs[:] = [d for d in dirs if Path(directory, d) not in excluded] if recursive else []
+            for name in names:
+                file = Path(directory, name)
+                posix = file.as_posix()
+                if (
+                    any(fnmatch(name, p) for p in patterns)
+                    and file not in excluded
+                    and not any(fnmatch(posix, p) for p in exclude_patterns)
+                ):
+                    yield file
+
+
+def _setting_values(config: ConfigDict, setting: str) -> List[str]:
+    value = config.get(setting, [])
+    return [value] if isinstance(value, str) else list(value)
@@ -14,9 +14,11 @@ in a neutral way the parser will change all relevant rst/sphinx markup elements
 """
 
 import logging
+import posixpath
 import re
 from dataclasses import dataclass
 from functools import lru_cache
+from html import unescape
 from pathlib import Path
 from textwrap import dedent
 from typing import Iterable, List, Optional, Protocol, Set, Tuple
@@ -584,3 +586,63 @@ class DoxygenHtmlParser:
             # if the processor is final stop moving over processors...
             if processor.is_final:
                 break
+
+
+def parse_for_inline_writing(html: str) -> _ElementTree:
+    """
+    Parse a html document without rst content so that it can be written inline (like a parsed document with rst).
+
+    The writer puts the html on a single line, so the pre elements are converted the way the
+    :class:`PreToDivProcessor` converts them in documents with rst (otherwise their line breaks would be lost).
+
+    :param html: The html content.
+    :return: The html tree.
+    """
+    tree = etree.document_fromstring(html).getroottree()
+    processor = PreToDivProcessor()
+    for element in list(tree.iter("pre")):
+        processor.try_process(element)
+    return tree
+
+
+# the elements (and their attributes) of doxygen's html that reference resources
+_resource_element_regex = re.compile(r"<(?:img|object|iframe|embed|source|link|script|input|a|area)\b[^>]*>", re.I)
+_resource_attribute_regex = re.compile(r"""\s(?:src|href|data)\s*=\s*(?:"([^"]*)"|'([^']*)')""", re.I)
+
+
+def collect_references(html: str) -> Set[str]:
+    """
+    Collect the local files an html document references.
+
+    These are e.g. the targets of ``img src``, ``object data``, ``link href`` and ``script src``. This is a
+    lightweight scan with regular expressions (the html doesn't need to be parsed for it).
+
+    :param html: The html content.
+    :return: The referenced files as paths relative to the directory of the html document (with forward slashes).
+        External urls, anchors and references outside of the directory are skipped.
+    """
+    references: Set[str] = set()
+    for element in _resource_element_regex.finditer(html):
+        for attribute in _resource_attribute_regex.finditer(element.group(0)):
+            reference = resolve_reference(unescape(attribute.group(1) or attribute.group(2) or ""))
+            if reference:
+                references.add(reference)
+    return references
+
+
+def resolve_reference(url: str, base: str = "") -> Optional[str]:
+    """
+    Resolve a (relative) url to a file path.
+
+    :param url: The url (e.g. ``search/mag.svg?v=1``).
+    :param base: The directory the url is relative to (with forward slashes, empty for the root directory).
+    :return: The path (relative to the root directory, with forward slashes) or None if the url doesn't reference
+        a local file inside the root directory.
+    """
+    path = url.split("#", 1)[0].split("?", 1)[0].strip()
+    if not path or path.startswith("/") or ":" in path:
+        return None
+    resolved = posixpath.normpath(posixpath.join(base, path))
+    if resolved in (".", "..") or resolved.startswith("../"):
+        return None
+    return resolved
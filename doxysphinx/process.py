@@ -13,17 +13,132 @@ The process module contains the :class:`Builder` and :class:`Cleaner` classes.
 
 These represent the main functionality of doxysphinx.
 """
+
 import logging
+import re
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple, Type, Union
+from typing import Iterable, Iterator, List, Optional, Tuple, Type, Union
 
 from mpire.pool import WorkerPool
 
+from doxysphinx.doxygen import ConfigDict
 from doxysphinx.html_parser import DoxygenHtmlParser, HtmlParser
-from doxysphinx.resources import DoxygenResourceProvider, ResourceProvider
+from doxysphinx.resources import (
+    SHARED_RESOURCES_DIR,
+    DoxygenResourceProvider,
+    ProvisioningOptions,
+    ResourceProvider,
+)
 from doxysphinx.sphinx import DirectoryMapper, SphinxHtmlBuilderDirectoryMapper
-from doxysphinx.utils.files import hash_blake2b
-from doxysphinx.writer import RstWriter, Writer
+from doxysphinx.toc import DoxygenTocGenerator, TocGenerator
+from doxysphinx.utils.files import (
+    DEFAULT_IO_WORKERS,
+    hash_blake2b,
+    write_file_if_changed,
+)
+from doxysphinx.utils.pathlib_fix import path_resolve
+from doxysphinx.writer import SHARED_FRAGMENT_GLOB, RstWriter, Writer, WriterOptions
+
+ADDITIONAL_DOCUMENTS_MANIFEST = "doxysphinx_additional_documents.txt"
+"""The name of the file (in the doxygen html directory) that tracks the written additional documents."""
+
+
+def write_additional_documents(
+    doxygen_html_dir: Path, documents: Iterable[Tuple[Path, Iterable[str]]]
+) -> Tuple[List[Path], List[Path]]:
+    """
+    Write the additional documents of a writer (see :meth:`~doxysphinx.writer.Writer.additional_documents`).
+
+    Only documents with changed content are written (so that sphinx doesn't need to re-read unchanged documents).
+    The written documents are tracked in a manifest so that documents which vanished (e.g. because the doxygen
+    menu structure changed) are removed.
+
+    :param doxygen_html_dir: The html output directory of doxygen where the generated documentation is.
+    :param documents: The documents as tuples of target file and content lines.
+    :return: A tuple with the list of written files and the list of removed files.
+    """
+    manifest = doxygen_html_dir / ADDITIONAL_DOCUMENTS_MANIFEST
+    previous_files = {doxygen_html_dir / f for f in _read_manifest(manifest)}
+
+    current_files: List[Path] = []
+    written: List[Path] = []
+    for file, lines in documents:
+        current_files.append(file)
+        if write_file_if_changed(file, lines):
+            written.append(file)
+
+    removed = sorted(previous_files.difference(current_files))
+    for file in removed:
+        file.unlink(missing_ok=True)
+
+    write_file_if_changed(manifest, sorted(f.relative_to(doxygen_html_dir).as_posix() for f in current_files), "\n")
+    return written, removed
+
+
+def cleanup_additional_documents(doxygen_html_dir: Path) -> List[Path]:
+    """
+    Remove the additional documents (and the manifest) written by :func:`write_additional_documents`.
+
+    :param doxygen_html_dir: The html output directory of doxygen where the generated documentation is.
+    :return: The list of removed documents.
+    """
+    manifest = doxygen_html_dir / ADDITIONAL_DOCUMENTS_MANIFEST
+    removed: List[Path] = []
+    for file in (doxygen_html_dir / f for f in _read_manifest(manifest)):
+        if file.exists():
+            file.unlink()
+            removed.append(file)
+    manifest.unlink(missing_ok=True)
+    return removed
+
+
+def prune_shared_fragments(doxygen_html_dir: Path, referenced: Iterable[str]) -> List[Path]:
+    """
+    Remove the shared fragment files of a directory that aren't referenced anymore.
+
+    The fragment files are written for :attr:`~doxysphinx.writer.WriterOptions.shared_chrome`. They are content
+    addressed, so each change of the doxygen page chrome (e.g. the generation date in the footer) leads to new
+    fragment files - the old ones would pile up otherwise.
+
+    :param doxygen_html_dir: The html output directory of doxygen where the generated documentation is.
+    :param referenced: The names of the fragment files that are still referenced (it is only consumed as long as
+        there are unreferenced fragments left).
+    :return: The list of removed fragment files.
+    """
+    fragments = {f.name: f for f in doxygen_html_dir.glob(SHARED_FRAGMENT_GLOB)}
+    for name in referenced:
+        if not fragments:
+            break
+        fragments.pop(name, None)
+
+    for fragment in fragments.values():
+        fragment.unlink(missing_ok=True)
+    return sorted(fragments.values())
+
+
+def _read_manifest(manifest: Path) -> List[str]:
+    if not manifest.exists():
+        return []
+    return [line for line in manifest.read_text(encoding="utf-8").splitlines() if line]
+
+
+@dataclass(frozen=True)
+class RenderedDocument:
+    """A document rendered in memory by :meth:`Builder.render`."""
+
+    docname: str
+    """The sphinx document name (the path relative to the sphinx source directory without suffix and with forward
+       slashes).
+    """
+    content: str
+    """The rendered content (rst)."""
+    html_file: Optional[Path]
+    """The html file the document was rendered from or None for documents without html counterpart (e.g. toc
+       structure documents).
+    """
+    html_hash: Optional[str]
+    """The hash of the html file (the one that is stored in the meta directive) or None."""
 
 
 class Builder:
@@ -40,6 +155,9 @@ class Builder:
 
     _logger = logging.getLogger(__name__)
 
+    # the names of the shared fragment files referenced in a rst file
+    _shared_fragment_regex = re.compile(re.escape(SHARED_FRAGMENT_GLOB).replace(r"\*", r"\w+"))
+
     def __init__(
         self,
         sphinx_source_dir: Path,
@@ -51,6 +169,9 @@ class Builder:
         force_recreation: bool = False,
         parallel: bool = True,
         workers: Union[int, None] = None,
+        writer_options: Optional[WriterOptions] = None,
+        toc_generator_type: Type[TocGenerator] = DoxygenTocGenerator,
+        provisioning_options: Optional[ProvisioningOptions] = None,
     ):
         """
         Create a Builder that builds rsts for doxygen html files.
@@ -66,20 +187,29 @@ class Builder:
         :param force_recreation: whether to force the recreation of rst files
         :param parallel: Whether to run in parallel or not
         :param workers: The maximum number of concurrent workers allowed in a parallel build
+        :param writer_options: The options passed to the writer (defaults to the default writer options).
+        :param toc_generator_type: The toc generator the writer should use.
+        :param provisioning_options: The options passed to the resource provider (defaults to the default
+            provisioning options).
 
         """
+        self._sphinx_source_dir = sphinx_source_dir
         self._dir_mapper = dir_mapper_type(sphinx_source_dir, sphinx_output_dir)
-        self._resource_provider = resource_provider_type(self._dir_mapper)
+        self._resource_provider = resource_provider_type(
+            self._dir_mapper, options=provisioning_options or ProvisioningOptions()
+        )
 
         # these will be used later lazily
         self._parser_type = parser_type
         self._writer_type = writer_type
+        self._writer_options = writer_options or WriterOptions()
+        self._toc_generator_type = toc_generator_type
 
         self._force_recreation = force_recreation
         self._parallel = parallel
         self._workers = workers
 
-    def build(self, doxygen_html_dir: Path):
+    def build(self, doxygen_html_dir: Path, doxygen_config: Optional[ConfigDict] = None):
         """
         Generate a rst file for each doxygen html file.
 
@@ -87,21 +217,72 @@ class Builder:
 
         :param doxygen_html_dir: The html output directory of doxygen where the
                                  generated documentation is.
+        :param doxygen_config: The doxygen configuration the documentation was generated with (if known - it
+                               is used to decide which resources are needed).
         """
-        copied_resources = self._resource_provider.provide_resources(doxygen_html_dir)
+        copied_resources = self._resource_provider.provide_resources(doxygen_html_dir, doxygen_config)
         self._logger.info(
             f"copied {len(copied_resources)} resource-files " f"to {self._dir_mapper.map(doxygen_html_dir)}"
         )
 
-        created_rsts = self._build(doxygen_html_dir)
+        writer_options = self._writer_options
+        shared_resources = self._resource_provider.shared_resources(doxygen_html_dir)
+        if shared_resources:
+            writer_options = replace(writer_options, shared_resources=tuple(shared_resources.items()))
+
+        created_rsts = self._build(doxygen_html_dir, writer_options)
         self._logger.info(f"created {len(created_rsts)} rst-files in {doxygen_html_dir}")
 
-    def _build(self, doxygen_html_dir: Path) -> List[Path]:
+        if created_rsts:
+            # the new rst files may reference other shared fragments than the ones they replaced
+            pruned = prune_shared_fragments(doxygen_html_dir, self._shared_fragment_references(doxygen_html_dir))
+            if pruned:
+                self._logger.info(f"deleted {len(pruned)} unreferenced shared fragment-files from {doxygen_html_dir}")
+
+    def render(self, doxygen_html_dir: Path) -> Iterator[RenderedDocument]:
+        """
+        Render the documents for all doxygen html files in memory.
+
+        In contrast to :meth:`build` nothing is written to disk, no resources are provided and all html files are
+        rendered (there is no incremental behavior). This is meant for embedding doxysphinx e.g. in services that
+        feed the documents directly into sphinx.
+
+        .. note::
+
+           Shared fragment files (see :attr:`~doxysphinx.writer.WriterOptions.shared_chrome`) are still written
+           to disk as the rendered documents reference them.
+
+        :param doxygen_html_dir: The html output directory of doxygen where the generated documentation is.
+        :return: An iterator of the rendered documents (the documents are yielded as soon as they are rendered).
+        """
+        parser = self._parser_type(doxygen_html_dir)
+        writer = self._writer_type(doxygen_html_dir, self._toc_generator_type, options=self._writer_options)
+        task_args: Tuple[HtmlParser, Writer] = (parser, writer)
+
+        for file, lines in writer.additional_documents():
+            yield RenderedDocument(self._docname(file), self._join_lines(lines), None, None)
+
+        fingerprint = self._writer_options.fingerprint()
+        files_with_hashes = [(f, self._get_html_hash(f, fingerprint)) for f in self._get_doxy_htmls(doxygen_html_dir)]
+
+        if self._parallel:
+            with WorkerPool(n_jobs=self._workers) as pool:
+                pool.set_shared_objects(task_args)
+                yield from pool.imap(self._render, files_with_hashes)
+        else:
+            yield from (self._render(task_args, f[0], f[1]) for f in files_with_hashes)
+
+    def _build(self, doxygen_html_dir: Path, writer_options: WriterOptions) -> List[Path]:
         parser = self._parser_type(doxygen_html_dir)
-        writer = self._writer_type(doxygen_html_dir)
+        writer = self._writer_type(doxygen_html_dir, self._toc_generator_type, options=writer_options)
         task_args: Tuple[HtmlParser, Writer] = (parser, writer)
 
-        files_with_hashes = list(self._get_doxy_htmls_to_process_with_hashes(doxygen_html_dir))
+        written, removed = write_additional_documents(doxygen_html_dir, writer.additional_documents())
+        self._logger.debug(f"updated {len(written)} and removed {len(removed)} additional documents")
+
+        files_with_hashes = list(
+            self._get_doxy_htmls_to_process_with_hashes(doxygen_html_dir, writer_options.fingerprint())
+        )
 
         if self._parallel:
             if self._workers:
@@ -113,19 +294,43 @@ class Builder:
         else:
             return [self._run((parser, writer), f[0], f[1]) for f in files_with_hashes]
 
-    def _get_doxy_htmls_to_process_with_hashes(self, doxygen_html_dir: Path) -> Iterable[Tuple[Path, str]]:
-        """Get all doxygen html files to process with their hashes (blake2b).
+    def _shared_fragment_references(self, doxygen_html_dir: Path) -> Iterator[str]:
+        for html_file in self._get_doxy_htmls(doxygen_html_dir):
+            rst_file = html_file.with_suffix(".rst")
+            if rst_file.exists():
+                yield from self._shared_fragment_regex.findall(rst_file.read_text(encoding="utf-8"))
 
-        The hashes are used to implement incremental behavior. So only files which aren't the same are
-        processed.
-        """
+    @staticmethod
+    def _get_doxy_htmls(doxygen_html_dir: Path) -> Iterator[Path]:
         for html_file in doxygen_html_dir.glob("*.html"):
             # For Doxygen>=1.10.0 this file can be skipped
             if html_file.name == "doxygen_crawl.html":
                 continue
+            yield html_file
+
+    def _get_html_hash(self, html_file: Path, options_fingerprint: str) -> str:
+        """Get the hash of a html file (blake2b).
+
+        Writer options that differ from the defaults are part of the hash, so that changing them leads to
+        re-created files.
+        """
+        html_hash = hash_blake2b(html_file)
+        if options_fingerprint:
+            html_hash = f"{html_hash}-{options_fingerprint}"
+        return html_hash
+
+    def _get_doxy_htmls_to_process_with_hashes(
+        self, doxygen_html_dir: Path, options_fingerprint: str
+    ) -> Iterable[Tuple[Path, str]]:
+        """Get all doxygen html files to process with their hashes (blake2b).
+
+        The hashes are used to implement incremental behavior. So only files which aren't the same are
+        processed.
+        """
+        for html_file in self._get_doxy_htmls(doxygen_html_dir):
             rst_file = html_file.with_suffix(".rst")
 
-            hash_from_html = hash_blake2b(html_file)
+            hash_from_html = self._get_html_hash(html_file, options_fingerprint)
 
             if not rst_file.exists():
                 yield html_file, hash_from_html
@@ -164,11 +369,29 @@ class Builder:
 
         rst_file = html_file.with_suffix(".rst")
 
-        # write the corresponding rst file
+        # write the corresponding rst file (the writer releases the parsed tree as soon as it is serialized and
+        # streams the content to disk afterwards - see "Memory usage" in the inner workings documentation)
         result = writer.write(parse_result, rst_file, html_hash)
 
         return result
 
+    def _render(self, task_args: Tuple[HtmlParser, Writer], html_file: Path, html_hash: str) -> RenderedDocument:
+        parser, writer = task_args
+
+        parse_result = parser.parse(html_file)
+        rst_file = html_file.with_suffix(".rst")
+        lines = writer.render(parse_result, rst_file, html_hash)
+
+        return RenderedDocument(self._docname(rst_file), self._join_lines(lines), html_file, html_hash)
+
+    def _docname(self, file: Path) -> str:
+        relative_file = path_resolve(file).relative_to(path_resolve(self._sphinx_source_dir))
+        return relative_file.with_suffix("").as_posix()
+
+    @staticmethod
+    def _join_lines(lines: Iterable[str]) -> str:
+        return "".join(f"{line}\n" for line in lines)
+
 
 class Cleaner:
     """The cleaner cleans files created and copied by the builder."""
@@ -200,7 +423,12 @@ class Cleaner:
 
         """
         self._dir_mapper = dir_mapper_type(sphinx_source_dir, sphinx_output_dir)
-        self._resource_provider = resource_provider_type(self._dir_mapper)
+        # the shared resources are cleaned up as well if they were stored at their default location
+        provisioning_options = ProvisioningOptions(
+            io_workers=DEFAULT_IO_WORKERS if parallel else 1,
+            shared_resources_dir=sphinx_output_dir / SHARED_RESOURCES_DIR,
+        )
+        self._resource_provider = resource_provider_type(self._dir_mapper, options=provisioning_options)
         self._parallel = parallel
         self._workers = workers
 
@@ -212,12 +440,20 @@ class Cleaner:
             generated documentation is.
         """
         resource_target_dir = self._dir_mapper.map(doxygen_html_dir)
-        deleted_resources = self._resource_provider.cleanup_resources(resource_target_dir)
+        deleted_resources = self._resource_provider.cleanup_resources(doxygen_html_dir)
         self._logger.info(f"deleted {len(deleted_resources)} resource-files from {resource_target_dir}")
 
         deleted_rsts = self._cleanup(doxygen_html_dir)
         self._logger.info(f"deleted {len(deleted_rsts)} rst-files from {doxygen_html_dir}")
 
+        deleted_documents = cleanup_additional_documents(doxygen_html_dir)
+        if deleted_documents:
+            self._logger.info(f"deleted {len(deleted_documents)} additional rst-files from {doxygen_html_dir}")
+
+        deleted_fragments = self._cleanup_shared_fragments(doxygen_html_dir)
+        if deleted_fragments:
+            self._logger.info(f"deleted {len(deleted_fragments)} shared fragment-files from {doxygen_html_dir}")
+
     def _cleanup(self, doxygen_html_dir: Path) -> List[Path]:
         files = list(doxygen_html_dir.glob("*.html"))
 
@@ -230,6 +466,13 @@ class Cleaner:
         else:
             return [result for file in files if (result := self._delete_corresponding_file(self._logger, file))]
 
+    def _cleanup_shared_fragments(self, doxygen_html_dir: Path) -> List[Path]:
+        fragments = list(doxygen_html_dir.glob(SHARED_FRAGMENT_GLOB))
+        for fragment in fragments:
+            fragment.unlink()
+            self._logger.debug(f"deleted {fragment}")
+        return fragments
+
     @staticmethod
     def _delete_corresponding_file(logger: logging.Logger, html_file: Path) -> Optional[Path]:
         target_rst_path = html_file.with_suffix(".rst")
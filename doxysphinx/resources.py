@@ -13,32 +13,87 @@ Resources are stylesheets, images, javascripts etc. that contemplate the html fi
 """
 
 import hashlib
+import json
 import logging
+import os
 import pkgutil
-from pathlib import Path
-from typing import Any, Callable, List, Optional, Protocol, Union
+import re
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, List, Mapping, Optional, Protocol, Set, Union
 
 import sass
 
+from doxysphinx.doxygen import ConfigDict
+from doxysphinx.html_parser import collect_references, resolve_reference
 from doxysphinx.sphinx import DirectoryMapper
+from doxysphinx.utils.cache import UserCache
+from doxysphinx.utils.css import scope_css
 
 # noinspection PyMethodMayBeStatic,PyUnusedLocal
 from doxysphinx.utils.exceptions import ApplicationError
-from doxysphinx.utils.files import copy_if_different, multi_glob, stringify_paths
+from doxysphinx.utils.files import (
+    DEFAULT_IO_WORKERS,
+    ContentAddressedStore,
+    FileManifest,
+    compress_files,
+    compressed_siblings,
+    copy_if_different,
+    delete_files,
+    hash_blake2b,
+    multi_glob,
+    provide_file,
+    stringify_paths,
+)
+
+CSS_ENGINES = ("sass", "native")
+"""The engines to scope stylesheets with (see :class:`CssScoper`)."""
+
+SHARED_RESOURCES_DIR = "_doxysphinx_resources"
+"""The default name of the directory (in the sphinx output) with the resources shared between projects."""
+
+
+@dataclass(frozen=True)
+class ProvisioningOptions:
+    """Options for the resource provisioning."""
+
+    strategy: str = "copy"
+    """How resources are provided in the output (see :data:`~doxysphinx.utils.files.PROVISIONING_STRATEGIES`).
+       If the strategy isn't supported for a file, the file is copied.
+    """
+    io_workers: int = DEFAULT_IO_WORKERS
+    """The number of threads that copy the resources (1 copies them sequentially)."""
+    shared_resources_dir: Optional[Path] = None
+    """A directory (inside the sphinx output) where the static doxygen resources (scripts, stylesheets, icons)
+       of all projects are stored content addressed. Identical resources are then stored only once and the
+       project's copies are hardlinks to them. Resources no project uses anymore are removed from the directory.
+       None (the default) disables the sharing.
+    """
+    css_engine: str = "sass"
+    """The engine that scopes the doxygen stylesheets (see :data:`CSS_ENGINES` and :class:`CssScoper`)."""
+    referenced_only: bool = False
+    """Provide only the images that are referenced by the html pages (or by the provided stylesheets and scripts)
+       instead of all images in the doxygen output (which may contain orphaned graphs of previous doxygen runs).
+    """
+    precompress: bool = False
+    """Write compressed siblings (``.gz`` and ``.br`` if brotli is installed) of the provided text resources
+       (stylesheets, scripts, svgs) for static web servers that deliver precompressed files.
+    """
 
 
 class ResourceProvider(Protocol):
     """A resource provider copies/adapts necessary resources (images, stylesheets, etc.) to output."""
 
-    def __init__(self, directory_mapper: DirectoryMapper):
+    def __init__(self, directory_mapper: DirectoryMapper, options: Optional[ProvisioningOptions] = None):
         """
         Protocol constructor.
 
         :param directory_mapper: the directory mapper to use.
+        :param options: the provisioning options (defaults to the default provisioning options).
         """
         pass
 
-    def provide_resources(self, resource_root: Path) -> List[Path]:
+    def provide_resources(self, resource_root: Path, doxygen_config: Optional[ConfigDict] = None) -> List[Path]:
         """
         Provide necessary resources to sphinx output directory.
 
@@ -46,12 +101,25 @@ class ResourceProvider(Protocol):
 
         :param resource_root: the root resource input directory (e.g. where the html
             files are located)
+        :param doxygen_config: the doxygen configuration the resources were generated with (if known). It can be
+            used to decide which resources are needed.
         :return: A list of resources (their target paths) that were copied/provided.
             Note that in case of some caching (copy if newer) mechanisms this might
             return only parts of the resources.
         """
         return []
 
+    def shared_resources(self, resource_root: Path) -> Mapping[str, str]:
+        """
+        Get the resources that were provided as shared resources by :meth:`provide_resources`.
+
+        :param resource_root: the root resource input directory (e.g. where the html
+            files are located)
+        :return: A mapping of resource filenames (relative to the resource root) to the urls of their shared
+            copies (relative to the output directory of the resource root). Empty if resources aren't shared.
+        """
+        return {}
+
     def cleanup_resources(self, resource_root: Path) -> List[Path]:
         """
         Clean up provided resources that were copied by :meth:`provide_resources`.
@@ -76,51 +144,112 @@ class DoxygenResourceProvider:
     _provisioning_glob_pattern = [
         "*.css",
         "*.js",
-        "*.map",
-        "*.md5",
         "*.svg",
         "*.png",
-        "search/*.*",
     ]
-    _cleanup_glob_pattern = _provisioning_glob_pattern + ["*.scss"]
+    # the resources of doxygen's search engine (only needed if it's enabled)
+    _search_glob_pattern = ["search/*.*"]
+    # *.map and *.md5 files of dot graphs were provisioned by older versions (they are only used by doxygen itself)
+    _cleanup_glob_pattern = _provisioning_glob_pattern + _search_glob_pattern + ["*.map", "*.md5", "*.scss"]
+    # the bookkeeping files below are kept in the resource root (like the manifest of the doxygen runner) - so they
+    # aren't published with the sphinx output
+    _manifest_name = ".doxysphinx_resources.json"
+    # the references of the html pages (see ProvisioningOptions.referenced_only)
+    _references_name = ".doxysphinx_references.json"
+    _references_version = 1
+    _image_suffixes = {".png", ".svg", ".gif", ".jpg", ".jpeg"}
+    # the resources that compress well (see ProvisioningOptions.precompress)
+    _text_suffixes = {".css", ".js", ".svg", ".html", ".json"}
+    # the compressed resources (incompressible ones get no compressed siblings - so they are only recorded here)
+    _compressed_name = ".doxysphinx_compressed.json"
+    _compressed_version = 1
+    # the static resources doxygen writes for each project (independent of the documented code)
+    _shared_glob_pattern = [
+        "*.css",
+        "jquery.js",
+        "dynsections.js",
+        "menu.js",
+        "navtree.js",
+        "resize.js",
+        "cookie.js",
+        "clipboard.js",
+        "darkmode_toggle.js",
+        "tab_*.png",
+        "nav_*.png",
+        "bc_s*.png",
+        "bdwn.png",
+        "closed.png",
+        "open.png",
+        "sync_*.png",
+        "splitbar*.png",
+        "doc*.png",
+        "doc*.svg",
+        "folder*.png",
+        "folder*.svg",
+        "minus*.svg",
+        "plus*.svg",
+        "doxygen.svg",
+    ]
+    _css_url_regex = re.compile(r"url\(\s*(?P<quote>['\"]?)(?P<url>[^'\")]+)(?P=quote)\s*\)")
+    # images referenced by string literals in scripts (e.g. the icons dynsections.js or search.js switch to)
+    _js_image_regex = re.compile(r"""["']([\w./-]+\.(?:png|svg|gif|jpe?g))["']""", re.I)
 
-    def __init__(self, directory_mapper: DirectoryMapper):
+    def __init__(self, directory_mapper: DirectoryMapper, options: Optional[ProvisioningOptions] = None):
         """
         Create a doxygen resource provider.
 
         :param directory_mapper: a directory mapper to use.
+        :param options: the provisioning options (defaults to the default provisioning options).
         """
         self._dir_mapper = directory_mapper
-        self._css_scoper = CssScoper(".doxygen-content")
+        self._options = options or ProvisioningOptions()
+        self._css_scoper = CssScoper(".doxygen-content", self._options.css_engine)
         self._custom_styles = self._load_custom_styles()
+        self._shared_resources: Dict[Path, Dict[str, str]] = {}
 
     def _load_custom_styles(self) -> str:
-        data: Union[bytes, None] = pkgutil.get_data(__name__, "resources/custom.scss")
+        # the native css engine can't compile sass - so it uses the precompiled custom styles
+        custom_styles = "resources/custom.css" if self._options.css_engine == "native" else "resources/custom.scss"
+        data: Union[bytes, None] = pkgutil.get_data(__name__, custom_styles)
         if data:
             return "\n" + data.decode("utf-8") + "\n"
         else:
             self._logger.critical("could not read custom styles out of package. Exiting.... sorry! :-(")
             exit()
 
-    def provide_resources(self, resource_root: Path) -> List[Path]:
+    def provide_resources(self, resource_root: Path, doxygen_config: Optional[ConfigDict] = None) -> List[Path]:
         """
         Copy doxygen html resource files (see GLOB_PATTERN below) to sphinx output.
 
-        The content in the raw html directives can then access these directly.
+        The content in the raw html directives can then access these directly. Resources of doxygen's search
+        engine are only copied if it is enabled and previously provided resources that aren't needed anymore are
+        removed. With :attr:`ProvisioningOptions.referenced_only` only the referenced images are copied.
 
         :type resource_root: the root of the resources (= usually the same folder where
             the html file are located).
+        :param doxygen_config: the doxygen configuration the resources were generated with. If not given, the
+            needed resources are derived from the generated html.
         """
         target = self._dir_mapper.map(resource_root)
         target.mkdir(parents=True, exist_ok=True)
+        patterns = self._get_provisioning_patterns(resource_root, doxygen_config)
+        is_needed = self._get_needed_predicate(resource_root, patterns)
 
         # copy file that are different in target, except for css files that we post process later (the
         # difference check would fail for them anyway)
         doxygen_css = resource_root / "doxygen.css"
         doxygen_awesome_css = resource_root / "doxygen-awesome.css"
         css_files_for_postprocessing = [doxygen_css, doxygen_awesome_css]
+        manifest = self._load_manifest(resource_root, target)
         copied_files = copy_if_different(
-            resource_root, target, *self._provisioning_glob_pattern, ignore_files=css_files_for_postprocessing
+            resource_root,
+            target,
+            *patterns,
+            ignore_files=css_files_for_postprocessing,
+            manifest=manifest,
+            strategy=self._options.strategy,
+            io_workers=self._options.io_workers,
+            source_filter=lambda f: is_needed(f.relative_to(resource_root).as_posix()),
         )
 
         self._logger.debug(f"copied files:\n{stringify_paths(copied_files)}")
@@ -141,34 +270,298 @@ class DoxygenResourceProvider:
             written_doxygen_awesome_css = self._css_scoper.scope(
                 stylesheet=doxygen_awesome_css,
                 target=target / doxygen_awesome_css.name,
-                content_patch_callback=lambda s: str.replace(s, "invert()", '#{"invert()"}'),
+                content_patch_callback=self._patch_doxygen_awesome_css,
             )
             if written_doxygen_awesome_css:
                 copied_files.append(written_doxygen_awesome_css)
 
+        # the post processed stylesheets are recorded too (so that everything provided can be cleaned up)
+        for css in (c for c in css_files_for_postprocessing if c.exists()):
+            manifest.update(css.name, css)
+        self._remove_unneeded_resources(resource_root, target, manifest, patterns, is_needed)
+        self._compress_resources(resource_root, target, manifest, copied_files)
+        manifest.save()
+
+        if self._options.shared_resources_dir:
+            self._shared_resources[resource_root] = self._share_resources(
+                resource_root, target, manifest, is_needed, set(copied_files)
+            )
+
         return copied_files
 
+    def _load_manifest(self, resource_root: Path, target: Path) -> FileManifest:
+        manifest = FileManifest(resource_root / self._manifest_name)
+        # the manifest (of the copied source files) outlives the target - so resources that were deleted from the
+        # target meanwhile (e.g. because the sphinx output was cleaned) have to be provided again
+        for relative_path in [p for p in manifest.relative_paths() if not (target / p).exists()]:
+            manifest.remove(relative_path)
+
+        # bookkeeping files of former versions (they were written into the target)
+        for name in [self._manifest_name, self._references_name, self._compressed_name]:
+            (target / name).unlink(missing_ok=True)
+        return manifest
+
+    def _get_provisioning_patterns(self, resource_root: Path, doxygen_config: Optional[ConfigDict]) -> List[str]:
+        if doxygen_config is not None:
+            search_enabled = doxygen_config.get("SEARCHENGINE") == "YES"
+        else:
+            # without config: the search engine is enabled if the main page references its scripts
+            index_html = resource_root / "index.html"
+            search_enabled = (resource_root / "search").is_dir() and (
+                not index_html.exists() or "search/search.js" in index_html.read_text(encoding="utf-8")
+            )
+
+        if search_enabled:
+            return self._provisioning_glob_pattern + self._search_glob_pattern
+        return self._provisioning_glob_pattern
+
+    def _get_needed_predicate(self, resource_root: Path, patterns: List[str]) -> Callable[[str], bool]:
+        if not self._options.referenced_only:
+            return lambda relative_path: True
+
+        # stylesheets and scripts are always provided (they are few and their references can't be fully tracked),
+        # images only if they are referenced.
+        referenced = self._collect_references(resource_root, patterns)
+        self._logger.debug(f"{len(referenced)} resources are referenced in {resource_root}")
+        return lambda p: PurePosixPath(p).suffix.lower() not in self._image_suffixes or p in referenced
+
+    def _collect_references(self, resource_root: Path, patterns: List[str]) -> Set[str]:
+        referenced = self._collect_page_references(resource_root)
+
+        for resource in multi_glob(resource_root, *patterns):
+            if resource.suffix == ".css":
+                base = resource.parent.relative_to(resource_root).as_posix()
+                content = resource.read_text(encoding="utf-8", errors="replace")
+                urls = [(m.group("url"), base) for m in self._css_url_regex.finditer(content)]
+            elif resource.suffix == ".js":
+                # scripts reference images relative to the page that loads them (= the resource root)
+                content = resource.read_text(encoding="utf-8", errors="replace")
+                urls = [(m.group(1), "") for m in self._js_image_regex.finditer(content)]
+            else:
+                continue
+            referenced.update(r for r in (resolve_reference(url, base) for url, base in urls) if r)
+
+        return referenced
+
+    def _collect_page_references(self, resource_root: Path) -> Set[str]:
+        # the references of each page are cached (by size and modification time of the page), so only new and
+        # changed pages are scanned.
+        cache_file = resource_root / self._references_name
+        cached: Dict[str, List[Any]] = {}
+        if cache_file.exists():
+            try:
+                data = json.loads(cache_file.read_text(encoding="utf-8"))
+                if data.get("version") == self._references_version:
+                    cached = data["pages"]
+            except (ValueError, TypeError, KeyError):
+                cached = {}
+
+        pages: Dict[str, List[Any]] = {}
+        for page in resource_root.glob("*.html"):
+            stat = page.stat()
+            entry = cached.get(page.name)
+            if not entry or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+                references = collect_references(page.read_text(encoding="utf-8", errors="replace"))
+                entry = [stat.st_size, stat.st_mtime_ns, sorted(references)]
+            pages[page.name] = entry
+
+        if pages != cached:
+            data = {"version": self._references_version, "pages": pages}
+            cache_file.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+
+        return {reference for entry in pages.values() for reference in entry[2]}
+
+    def _remove_unneeded_resources(
+        self,
+        resource_root: Path,
+        target: Path,
+        manifest: FileManifest,
+        patterns: List[str],
+        is_needed: Callable[[str], bool],
+    ) -> List[Path]:
+        # resources that were provided before but whose source vanished or that aren't needed anymore
+        unneeded = [
+            p
+            for p in manifest.relative_paths()
+            if not (resource_root / p).exists()
+            or not any(_match_glob(p, pattern) for pattern in patterns)
+            or not is_needed(p)
+        ]
+        for relative_path in unneeded:
+            manifest.remove(relative_path)
+        removed = delete_files(
+            [f for p in unneeded for f in [target / p, *compressed_siblings(target / p)]], self._options.io_workers
+        )
+        if removed:
+            self._logger.debug(f"removed {len(removed)} resources that aren't needed anymore from {target}")
+        return removed
+
+    def _compress_resources(
+        self, resource_root: Path, target: Path, manifest: FileManifest, changed_files: List[Path]
+    ) -> List[Path]:
+        changed = set(changed_files)
+        record_file = resource_root / self._compressed_name
+        if not self._options.precompress:
+            # compressed siblings of former builds would be outdated now
+            delete_files([s for f in changed for s in compressed_siblings(f)], self._options.io_workers)
+            record_file.unlink(missing_ok=True)
+            return []
+
+        # the changed text resources and the ones that weren't compressed yet (e.g. by builds without precompression)
+        compressed_before = self._load_compressed_record(record_file)
+        text_paths = [p for p in manifest.relative_paths() if PurePosixPath(p).suffix.lower() in self._text_suffixes]
+        to_compress = [target / p for p in text_paths if target / p in changed or p not in compressed_before]
+        compressed = compress_files(to_compress, self._options.io_workers)
+        self._logger.debug(f"compressed {len(to_compress)} resources in {target} ({len(compressed)} files written)")
+
+        if set(text_paths) != compressed_before:
+            data = {"version": self._compressed_version, "files": sorted(text_paths)}
+            record_file.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        return compressed
+
+    def _load_compressed_record(self, record_file: Path) -> Set[str]:
+        if not record_file.exists():
+            return set()
+        try:
+            data = json.loads(record_file.read_text(encoding="utf-8"))
+            if data.get("version") == self._compressed_version:
+                return set(data["files"])
+        except (ValueError, TypeError, KeyError):
+            pass
+        return set()
+
+    def _patch_doxygen_awesome_css(self, content: str) -> str:
+        # sass interprets the css invert() filter function as its own color function
+        if self._options.css_engine == "sass":
+            return content.replace("invert()", '#{"invert()"}')
+        return content
+
+    def shared_resources(self, resource_root: Path) -> Mapping[str, str]:
+        """
+        Get the resources that were shared with other projects (see :attr:`ProvisioningOptions.shared_resources_dir`).
+
+        :param resource_root: the root of the resources (= usually the same folder where the html file are located).
+        :return: A mapping of resource filenames to the urls of the shared copies.
+        """
+        return self._shared_resources.get(resource_root, {})
+
+    def _share_resources(
+        self,
+        resource_root: Path,
+        target: Path,
+        manifest: FileManifest,
+        is_needed: Callable[[str], bool],
+        changed_files: Set[Path],
+    ) -> Dict[str, str]:
+        store = self._get_shared_store()
+        changed = {Path(os.path.abspath(str(f))) for f in changed_files}
+        target = Path(os.path.abspath(str(target)))
+        sources = sorted(s for s in multi_glob(resource_root, *self._shared_glob_pattern) if is_needed(s.name))
+
+        # the project's copies become hardlinks to the stored resources (if supported) - so they need no extra space
+        stored: Dict[str, Path] = {}
+        for source_file in (s for s in sources if s.suffix != ".css"):
+            entry = manifest.get(source_file.name)
+            digest = entry.hash if entry else hash_blake2b(source_file)
+            stored_file = store.add(source_file, digest)
+            target_file = target / source_file.name
+            if self._needs_providing(target_file, stored_file, digest, changed):
+                provide_file(stored_file, target_file, "hardlink")
+            stored[source_file.name] = stored_file
+
+        # stylesheets are stored with their (post processed) content and references adapted to the store
+        for source_file in (s for s in sources if s.suffix == ".css"):
+            css = (target / source_file.name).read_text(encoding="utf-8")
+            css = self._css_url_regex.sub(lambda m: self._shared_css_url(m, target, stored, store.directory), css)
+            stored[source_file.name] = store.add_content(source_file.name, css.encode("utf-8"))
+
+        # resources that were shared by former builds (or by projects that are gone) are removed
+        store.reference(target.as_posix(), stored.values())
+        pruned = store.prune(lambda owner: Path(owner).is_dir())
+
+        self._logger.debug(
+            f"shared {len(stored)} resources of {resource_root} in {store.directory} ({len(pruned)} unused removed)"
+        )
+        return {name: Path(os.path.relpath(file, target)).as_posix() for name, file in sorted(stored.items())}
+
+    def _get_shared_store(self) -> ContentAddressedStore:
+        return ContentAddressedStore(Path(os.path.abspath(str(self._options.shared_resources_dir))))
+
+    @staticmethod
+    def _needs_providing(target_file: Path, stored_file: Path, digest: str, changed: Set[Path]) -> bool:
+        # changed resources were just copied - they are linked to the store again. If hardlinks aren't supported
+        # (provide_file falls back to copying) the copies are kept as long as their content is the same.
+        if target_file in changed or not target_file.exists():
+            return True
+        return not target_file.samefile(stored_file) and hash_blake2b(target_file) != digest
+
+    @staticmethod
+    def _shared_css_url(match: re.Match, target: Path, stored: Dict[str, Path], store_dir: Path) -> str:
+        url = match.group("url")
+        if url.startswith(("data:", "#", "/")) or "://" in url:
+            return match.group(0)
+
+        path, separator, rest = url.partition("?") if "?" in url else url.partition("#")
+        if path in stored:
+            shared_url = stored[path].name
+        else:
+            # resources that aren't shared are still referenced in the project's output directory
+            shared_url = Path(os.path.relpath(target / path, store_dir)).as_posix()
+        quote = match.group("quote")
+        return f"url({quote}{shared_url}{separator}{rest}{quote})"
+
     def cleanup_resources(self, resource_root: Path) -> List[Path]:
-        """Clean up any provisioned resources that were copied to sphinx output."""
+        """
+        Clean up any provisioned resources that were copied to sphinx output.
+
+        The resources to delete are taken from the manifest that records what was provisioned. So the cleanup only
+        depends on the number of provisioned files (and files whose source vanished meanwhile are deleted as well).
+        Resources without a manifest (provisioned by older versions) are found by globbing the resource root.
+        Compressed siblings of the resources (see :attr:`ProvisioningOptions.precompress`) are deleted too, and so
+        are the shared resources (see :attr:`ProvisioningOptions.shared_resources_dir`) no other project uses.
+        """
         target = self._dir_mapper.map(resource_root)
         target.mkdir(parents=True, exist_ok=True)
 
-        cleanup_sources = multi_glob(resource_root, *self._cleanup_glob_pattern)
-        files_deleted: List[Path] = []
-        for source_file in cleanup_sources:
-            target_file = target / source_file.relative_to(resource_root)
-            if target_file.exists():
-                target_file.unlink()
-                self._logger.debug(f"deleted {target_file}")
-                files_deleted.append(target_file)
+        manifest = FileManifest(resource_root / self._manifest_name)
+        provisioned = manifest.relative_paths()
+        if provisioned:
+            candidates = [target / p for p in provisioned]
+        else:
+            cleanup_sources = multi_glob(resource_root, *self._cleanup_glob_pattern)
+            candidates = [target / s.relative_to(resource_root) for s in cleanup_sources]
+        candidates += [s for c in candidates if c.suffix in self._text_suffixes for s in compressed_siblings(c)]
+
+        files_deleted = delete_files(candidates, self._options.io_workers)
+        for file in files_deleted:
+            self._logger.debug(f"deleted {file}")
+
+        for name in [self._manifest_name, self._references_name, self._compressed_name]:
+            (resource_root / name).unlink(missing_ok=True)
+            # (bookkeeping files of former versions)
+            (target / name).unlink(missing_ok=True)
+
+        if self._options.shared_resources_dir:
+            store = self._get_shared_store()
+            store.unreference(Path(os.path.abspath(str(target))).as_posix())
+            files_deleted += store.prune(lambda owner: Path(owner).is_dir())
 
         return files_deleted
 
 
+def _match_glob(relative_path: str, pattern: str) -> bool:
+    # like Path.glob: each part of the pattern matches exactly one part of the path
+    path = PurePosixPath(relative_path)
+    return len(path.parts) == len(PurePosixPath(pattern).parts) and path.match(pattern)
+
+
 class CssScoper:
     """Scopes css-stylesheets to a special selector.
 
-    This is done with the help of libsass (as the sass-syntax extends css with nesting).
+    This is done with the help of libsass (as the sass-syntax extends css with nesting) - or with the "native"
+    engine (see :func:`~doxysphinx.utils.css.scope_css`) that prefixes the selectors in a single pass over the
+    stylesheet without libsass (it is faster and keeps rules for the document root like ``html.dark-mode .x``
+    working, however the additional css rules have to be plain css then).
 
     Our original problem was that the doxygen stylesheet and the sphinx theme stylesheets collide in some
     ways (e.g. global styles like heading-styles etc...). We therefore needed to have a mechanism to apply
@@ -186,13 +579,20 @@ class CssScoper:
 
     _logger = logging.getLogger(__name__)
 
-    def __init__(self, css_selector: str):
+    # version of the scoping (has to be increased when it changes to invalidate cached stylesheets)
+    _cache_version = 1
+
+    def __init__(self, css_selector: str, engine: str = "sass"):
         """
         Create a new CssScoper.
 
         :param css_selector: The selector where the stylesheets should be scoped under.
+        :param engine: The engine to use for scoping (see :data:`CSS_ENGINES`).
         """
+        if engine not in CSS_ENGINES:
+            raise ApplicationError(f"unknown css engine {engine}, use one of {CSS_ENGINES}.")
         self._selector = css_selector
+        self._engine = engine
 
     def scope(
         self,
@@ -230,37 +630,70 @@ class CssScoper:
         if additional_css_rules:
             content += additional_css_rules
 
-        new_hash_digest = hashlib.blake2b(content.encode("utf-8")).hexdigest()
+        # (the engine is only part of the hash for the native engine to keep existing sass stylesheets valid)
+        hash_input = content if self._engine == "sass" else f"{self._engine}\n{content}"
+        new_hash_digest = hashlib.blake2b(hash_input.encode("utf-8")).hexdigest()
 
         old_hash_digest = self._read_hash_digest(target)
         if new_hash_digest == old_hash_digest:
             return None
 
         # add hash digest to content
-        content = (
+        digest_comment = (
             f"/* {new_hash_digest} <- doxysphinx hash digest for the original input css that leads"
-            f"to the css below */\n{content}"
+            f"to the css below */\n"
+        )
+
+        if self._engine == "native":
+            compiled_css = self._scope_natively(css_content, digest_comment, additional_css_rules)
+        else:
+            compiled_css = self._compile(digest_comment + content, new_hash_digest, stylesheet.parent)
+
+        # write stylesheet
+        target.write_text(compiled_css, encoding="UTF-8")
+
+        self._logger.debug(
+            f"scoped original stylesheet '{stylesheet}' to selector '{self._selector}' in target '{target}'."
         )
+        return target
+
+    def _scope_natively(self, css_content: str, digest_comment: str, additional_css_rules: Optional[str]) -> str:
+        # a @charset rule has to stay the first statement of a stylesheet (see _read_hash_digest)
+        charset = ""
+        if css_content.startswith("@charset"):
+            charset, _, css_content = css_content.partition(";")
+            charset += ";\n"
+
+        scoped_css = "".join(scope_css(css_content, self._selector))
+        return f"{charset}{digest_comment}{scoped_css}\n{additional_css_rules or ''}"
+
+    def _compile(self, content: str, hash_digest: str, include_path: Path) -> str:
+        """Compile the scss content to css - or take it from the user cache if it was compiled before.
+
+        The same stylesheets (e.g. doxygen.css) are typically scoped for each project and in each fresh
+        workspace, so the compiled css is cached per machine. The cache key contains the hash of the scss
+        content (including the selector and additional rules) and the libsass version.
+        """
+        cache = UserCache("css")
+        key = f"scoped-v{self._cache_version}-{sass.libsass_version}-{hash_digest}.css"
+        if cached := cache.get(key):
+            self._logger.debug(f"took compiled stylesheet for hash digest {hash_digest} from the user cache.")
+            return cached
 
         # compile the scss to a css
         compiled_css: Any = sass.compile(
             string=content,
             output_style="expanded",
             indented=False,
-            include_paths=[str(stylesheet.parent)],
+            include_paths=[str(include_path)],
         )
 
         # the sass compiler does also scope the html element (where typically css variables are
         # stored). We need to remove that scoping again because it will only work if it's in global scope.
         compiled_css = compiled_css.replace(f"{self._selector} html {{", "html {")
 
-        # write stylesheet
-        target.write_text(compiled_css, encoding="UTF-8")
-
-        self._logger.debug(
-            f"scoped original stylesheet '{stylesheet}' to selector '{self._selector}' in target '{target}'."
-        )
-        return target
+        cache.put(key, compiled_css)
+        return compiled_css
 
     @staticmethod
     def _read_hash_digest(file: Path) -> str:
@@ -0,0 +1,228 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+"""
+The sphinx_extension module contains a sphinx extension that renders doxygen html pages during the sphinx build.
+
+Instead of running ``doxysphinx build`` as a separate step (which writes a rst file for every doxygen html file
+that sphinx has to read afterwards) the doxygen html files are registered as sphinx source documents and
+their rst content is produced on demand in the ``source-read`` event. Sphinx' own change detection (and its
+parallel read) therefore applies to the doxygen pages directly.
+
+Usage (in ``conf.py``):
+
+.. code-block:: python
+
+   extensions = ["doxysphinx.sphinx_extension"]
+
+   # doxygen html output directories (relative to the sphinx source directory)
+   doxysphinx_html_dirs = ["docs/doxygen/demo/html"]
+
+Html files outside of these directories are added to the ``exclude_patterns`` so that they don't become sphinx
+documents.
+
+.. note::
+
+   Don't mix this mode with ``doxysphinx build`` for the same doxygen output. Sphinx would find an rst and a html
+   file for the same document. Use ``doxysphinx clean`` to remove the rst files of a previous build.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from sphinx.application import Sphinx
+from sphinx.environment import BuildEnvironment
+from sphinx.parsers import RSTParser
+from sphinx.util import logging
+from sphinx.util.matching import Matcher
+
+from doxysphinx.html_parser import DoxygenHtmlParser
+from doxysphinx.process import prune_shared_fragments, write_additional_documents
+from doxysphinx.resources import DoxygenResourceProvider, ProvisioningOptions
+from doxysphinx.sphinx import SphinxHtmlBuilderDirectoryMapper
+from doxysphinx.toc import TOC_GENERATORS
+from doxysphinx.utils.files import DEFAULT_IO_WORKERS, hash_blake2b
+from doxysphinx.writer import RstWriter, WriterOptions
+
+_logger = logging.getLogger(__name__)
+
+_filetype = "doxysphinx"
+
+# the doxygen projects (docname prefix -> (parser, writer)). These are created once in the main process when
+# the builder is initialized and are inherited by the worker processes of a parallel read.
+_projects: Dict[str, Tuple[DoxygenHtmlParser, RstWriter]] = {}
+
+
+class DoxygenHtmlRstParser(RSTParser):
+    """A rst parser for doxygen html documents (their content is replaced with rst in ``source-read``)."""
+
+    supported = (_filetype,)
+
+
+def setup(app: Sphinx):
+    """Set up the doxysphinx extension."""
+    app.add_config_value("doxysphinx_html_dirs", [], "env", [list])
+    app.add_config_value("doxysphinx_shared_chrome", False, "env", [bool])
+    app.add_config_value("doxysphinx_minify", False, "env", [bool])
+    app.add_config_value("doxysphinx_toc", "menu", "env", [str])
+    app.add_config_value("doxysphinx_provisioning", "copy", "", [str])
+    app.add_config_value("doxysphinx_io_workers", DEFAULT_IO_WORKERS, "", [int])
+    app.add_config_value("doxysphinx_css_engine", "sass", "", [str])
+    app.add_config_value("doxysphinx_referenced_resources", False, "", [bool])
+    app.add_config_value("doxysphinx_precompress", False, "", [bool])
+
+    app.add_source_suffix(".html", _filetype)
+    app.add_source_parser(DoxygenHtmlRstParser)
+
+    app.connect("config-inited", _config_inited)
+    app.connect("builder-inited", _builder_inited)
+    app.connect("env-get-outdated", _env_get_outdated)
+    app.connect("source-read", _source_read)
+    app.connect("env-updated", _env_updated)
+
+    return {"parallel_read_safe": True, "parallel_write_safe": True, "version": "0.1.0"}
+
+
+def _html_dirs(app: Sphinx) -> List[Path]:
+    return [Path(app.srcdir) / d for d in app.config.doxysphinx_html_dirs]
+
+
+def _docname_prefix(app: Sphinx, html_dir: Path) -> str:
+    return f"{html_dir.relative_to(app.srcdir).as_posix()}/"
+
+
+def _config_inited(app: Sphinx, config: Any):
+    # html files in doxygen's output that are no pages. The list is replaced (and not extended) as it may be
+    # sphinx' default value - changing that would change the config of the next build in the same process.
+    excluded = [p for d in config.doxysphinx_html_dirs for p in [f"{d}/doxygen_crawl.html", f"{d}/search"]]
+    # the html source suffix applies to the whole source directory - other html files mustn't become documents
+    excluded.extend(_foreign_html_files(app, config))
+    config.exclude_patterns = [*config.exclude_patterns, *(p for p in excluded if p not in config.exclude_patterns)]
+
+
+def _foreign_html_files(app: Sphinx, config: Any) -> Iterator[str]:
+    """Get the html files in the source directory that don't belong to the configured doxygen projects.
+
+    The files are yielded in a stable order (relative to the source directory), so that the resulting exclude
+    patterns only change (and invalidate the environment) if the files change.
+    """
+    srcdir = Path(app.srcdir)
+    skipped = {srcdir / d for d in config.doxysphinx_html_dirs} | {Path(app.outdir), Path(app.doctreedir)}
+    is_excluded = Matcher(config.exclude_patterns)
+
+    for root, dirs, files in os.walk(srcdir):
+        root_path = Path(root)
+        dirs[:] = sorted(
+            d
+            for d in dirs
+            if root_path / d not in skipped and not is_excluded((root_path / d).relative_to(srcdir).as_posix())
+        )
+        yield from ((root_path / f).relative_to(srcdir).as_posix() for f in sorted(files) if f.endswith(".html"))
+
+
+def _builder_inited(app: Sphinx):
+    options = WriterOptions(shared_chrome=app.config.doxysphinx_shared_chrome, minify=app.config.doxysphinx_minify)
+    dir_mapper = SphinxHtmlBuilderDirectoryMapper(Path(app.srcdir), Path(app.outdir))
+    provisioning_options = ProvisioningOptions(
+        strategy=app.config.doxysphinx_provisioning,
+        io_workers=app.config.doxysphinx_io_workers,
+        css_engine=app.config.doxysphinx_css_engine,
+        referenced_only=app.config.doxysphinx_referenced_resources,
+        precompress=app.config.doxysphinx_precompress,
+    )
+    resource_provider = DoxygenResourceProvider(dir_mapper, provisioning_options)
+
+    for html_dir in _html_dirs(app):
+        writer = RstWriter(html_dir, TOC_GENERATORS[app.config.doxysphinx_toc], options=options)
+        _projects[_docname_prefix(app, html_dir)] = (DoxygenHtmlParser(html_dir), writer)
+
+        # toc structure documents have no html counterpart - so they still need to be written
+        write_additional_documents(html_dir, writer.additional_documents())
+
+        if app.builder.format == "html":
+            copied_resources = resource_provider.provide_resources(html_dir)
+            _logger.info(f"doxysphinx: copied {len(copied_resources)} resource-files for {html_dir}")
+
+
+def _env_get_outdated(
+    app: Sphinx, env: BuildEnvironment, added: Set[str], changed: Set[str], removed: Set[str]
+) -> List[str]:
+    """Mark all doxygen documents of a project as outdated if the toc relevant files changed.
+
+    Sphinx detects changed html files on its own. However, the toctrees are generated from doxygen's menu (or
+    navigation tree) data, so if that changes, the documents carrying toctrees have to be re-read as well.
+    """
+    stored_hashes: Dict[str, str] = getattr(env, "doxysphinx_toc_hashes", {})
+    current_hashes: Dict[str, str] = {}
+    outdated: List[str] = []
+
+    for html_dir in _html_dirs(app):
+        prefix = _docname_prefix(app, html_dir)
+        toc_files = [html_dir / f for f in ["menudata.js", "index.html", "navtreedata.js"]]
+        toc_files.extend(sorted(html_dir.glob("navtreeindex*.js")))
+        toc_hash = "".join(hash_blake2b(f) for f in toc_files if f.exists())
+        current_hashes[prefix] = toc_hash
+        if prefix in stored_hashes and stored_hashes[prefix] != toc_hash:
+            outdated.extend(d for d in env.found_docs if d.startswith(prefix))
+
+    env.doxysphinx_toc_hashes = current_hashes  # type: ignore[attr-defined]
+    return outdated
+
+
+def _find_project(docname: str) -> Optional[Tuple[DoxygenHtmlParser, RstWriter]]:
+    for prefix, project in _projects.items():
+        if docname.startswith(prefix):
+            return project
+    return None
+
+
+def _source_read(app: Sphinx, docname: str, source: List[str]):
+    """Sphinx event handler for the "source-read" event.
+
+    Replaces the content of doxygen html documents with the rendered rst.
+
+    :param app: sphinx application
+    :param docname: the name of the document
+    :param source: the content of the document
+    """
+    html_file = Path(app.env.doc2path(docname))
+    if html_file.suffix != ".html":
+        return
+
+    project = _find_project(docname)
+    if project is None:
+        _logger.warning(
+            f"doxysphinx: {html_file} is no doxygen html file of the configured doxysphinx_html_dirs. "
+            "Please add it to the exclude_patterns."
+        )
+        source[0] = ":orphan:\n"
+        return
+
+    parser, writer = project
+    parse_result = parser.parse(html_file)
+    lines = writer.render(parse_result, html_file.with_suffix(".rst"), hash_blake2b(html_file))
+    source[0] = "".join(f"{line}\n" for line in lines)
+
+
+def _env_updated(app: Sphinx, env: BuildEnvironment) -> List[str]:
+    """Sphinx event handler for the "env-updated" event.
+
+    Removes the shared fragment files that no document depends on anymore (e.g. because doxygen's page chrome
+    changed). The raw directives including a fragment make it a dependency of their document.
+
+    :param app: sphinx application
+    :param env: the build environment
+    :return: no further documents to write
+    """
+    referenced = {Path(dependency).name for dependencies in env.dependencies.values() for dependency in dependencies}
+    for html_dir in _html_dirs(app):
+        pruned = prune_shared_fragments(html_dir, referenced)
+        if pruned:
+            _logger.info(f"doxysphinx: deleted {len(pruned)} unreferenced shared fragment-files from {html_dir}")
+    return []
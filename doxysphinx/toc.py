@@ -8,15 +8,26 @@
 # =====================================================================================
 """The toc module contains classes related to the toctree generation for doxygen htmls/rsts."""
 
+import html
 import re
 import unicodedata
-from dataclasses import dataclass, field, replace
+from bisect import bisect_right
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List, Protocol, Tuple
-
-from doxysphinx.doxygen import read_js_data_file
-from doxysphinx.utils.files import write_file
-from doxysphinx.utils.iterators import apply
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Tuple,
+    Type,
+)
+
+from doxysphinx.doxygen import read_js_data_file, read_js_data_vars
 
 
 class TocGenerator(Protocol):
@@ -44,46 +55,81 @@ class TocGenerator(Protocol):
         """
         return []
 
+    def structural_documents(self) -> Iterable[Tuple[Path, List[str]]]:
+        """
+        Get additional documents that are necessary to represent the toc structure.
+
+        These are documents that have no html counterpart (e.g. menu entries that only group other entries).
+
+        :return: an iterable of tuples with the target file and the lines forming its content.
+        """
+        return []
+
 
-@dataclass
 class _MenuEntry:
-    title: str
-    docname: str
-    url: str
-    children: List["_MenuEntry"]
-    is_structural_dummy: bool = (
-        False  # indicated whether a menu entry references a children's file as a structural dummy
-    )
-    is_leaf: bool = field(init=False)
-
-    def __post_init__(self):
-        if not self.children:
-            self.is_leaf = True
-        else:
-            self.is_leaf = False
+    """A (compact) menu entry node of doxygen's menudata.js."""
+
+    __slots__ = ("title", "docname", "url", "children", "is_structural_dummy", "is_leaf")
+
+    def __init__(
+        self, title: str, docname: str, url: str, children: List["_MenuEntry"], is_structural_dummy: bool = False
+    ):
+        self.title = title
+        self.docname = docname
+        self.url = url
+        self.children = children
+        # indicated whether a menu entry references a children's file as a structural dummy
+        self.is_structural_dummy = is_structural_dummy
+        self.is_leaf = not children
 
     @staticmethod
     def from_json_node(json_node: Dict[str, Any]) -> "_MenuEntry":
         """Create a _MenuEntry from a json node (in doxygen's menudata.js).
 
-        Note that this method will build up a _MenuEntry-tree automatically/recursively
+        Note that this method will build up a _MenuEntry-tree automatically. The json tree is traversed
+        iteratively (post-order, so that the children are complete when their parent is created) which
+        means that there's no recursion limit for deeply nested menus.
 
         :param json_node: The json node to generate a _MenuEntry from
         :return: A _MenuEntry representation of the json_node and its' children
         """
-        title = json_node["text"]
+        result: List[_MenuEntry] = []
+        # stack of (json node, iterator over its json children, the already created children)
+        stack: List[Tuple[Dict[str, Any], Iterator[Dict[str, Any]], List[_MenuEntry]]] = [
+            (json_node, iter(json_node.get("children", ())), [])
+        ]
+        while stack:
+            node, pending_children, children = stack[-1]
+            for child in pending_children:
+                if child.get("children"):
+                    # descend - the remaining children of the current node are continued afterwards
+                    stack.append((child, iter(child["children"]), []))
+                    break
+                # fast path for leaves (the vast majority of entries)
+                url = child["url"]
+                children.append(_MenuEntry(child["text"], _MenuEntry._docname_from_url(url), url, []))
+            else:
+                stack.pop()
+                entry = _MenuEntry._create(node, children)
+                (stack[-1][2] if stack else result).append(entry)
+
+        return result[0]
+
+    @staticmethod
+    def _create(json_node: Dict[str, Any], children: List["_MenuEntry"]) -> "_MenuEntry":
         url = json_node["url"]
-        file = _MenuEntry._docname_from_url(url)
-        children = _MenuEntry._get_sphinx_toc_compatible_children(json_node)
-        is_structural_dummy = "is_structural_dummy" in json_node and json_node["is_structural_dummy"]
-        return _MenuEntry(title, file, url, children, is_structural_dummy)
+        docname = _MenuEntry._docname_from_url(url)
+        unique_children, is_structural_dummy = _MenuEntry._get_sphinx_toc_compatible_children(docname, children)
+        return _MenuEntry(json_node["text"], docname, url, unique_children, is_structural_dummy)
 
     @staticmethod
     def _docname_from_url(url: str) -> str:
-        return url.split("#")[0].replace(".html", "")
+        return url.partition("#")[0].replace(".html", "")
 
     @staticmethod
-    def _get_sphinx_toc_compatible_children(json_node: Dict[str, Any]) -> List["_MenuEntry"]:
+    def _get_sphinx_toc_compatible_children(
+        current_docname: str, children: List["_MenuEntry"]
+    ) -> Tuple[List["_MenuEntry"], bool]:
         """Get a "sphinx compatible" view of the children.
 
         We therefore need a special handling for index anchors
@@ -98,34 +144,33 @@ class _MenuEntry:
         links for entries in the parent's toctree. We therefore need to
         - eliminate all childrens with the same name/file down to one last child
         - then check if the parent has the same name/file and in that case get rid of the child completely
+
+        :return: A tuple of the children and whether the current entry is a structural dummy (references a
+            children's file).
         """
-        # get all children
-        children = [_MenuEntry.from_json_node(c) for c in json_node["children"]] if "children" in json_node else []
         if not children:
-            return []
+            return [], False
 
         # get unique (considering .file value) children
         unique_children = []
-        current_docname = _MenuEntry._docname_from_url(json_node["url"])
         unique_files = set()
+        is_structural_dummy = False
 
         for child in children:
             if child.docname in unique_files and child.is_leaf:
                 continue
 
             if child.docname == current_docname:
-                json_node["is_structural_dummy"] = True
+                is_structural_dummy = True
 
             unique_children.append(child)
             unique_files.add(child.docname)
 
         # if there is only one child item left and if that's the same as the current item - get rid of it
-        current_docname = _MenuEntry._docname_from_url(json_node["url"])
         if len(unique_children) == 1 and unique_children[0].docname == current_docname and unique_children[0].is_leaf:
-            json_node["is_structural_dummy"] = False
-            return []
+            return [], False
 
-        return unique_children
+        return unique_children, is_structural_dummy
 
 
 class DoxygenTocGenerator:
@@ -144,19 +189,30 @@ class DoxygenTocGenerator:
         """
         self._source_dir = source_dir
 
-        self._menu: _MenuEntry = self._load_menu_tree(source_dir / "menudata.js")
+        menu = self._load_menu_tree(source_dir / "menudata.js")
+
+        # prepare rst documents for those structural dummies doxygen is using...
+        structural_dummies, toc_index = self._index_menu_tree(menu)
+        # the html template is only needed for the structural dummies
+        self._doxy_html_template: Tuple[str, str] = self._parse_template() if structural_dummies else ("", "")
+        self._structural_documents: List[Tuple[Path, List[str]]] = [
+            (source_dir / f"{d.docname}.rst", self._create_toc_content_for_structural_dummy(d))
+            for d in structural_dummies
+        ]
 
-        # self._project_name, self._project_number = self._parse_project_infos()
-        self._doxy_html_template: Tuple[str, str] = self._parse_template()
+        # the toctrees are computed once here. Afterwards only this (immutable) index is needed - the menu tree
+        # isn't kept, so that the generator stays small when it's shared with (or pickled to) worker processes.
+        self._toc_index: Mapping[str, Tuple[str, ...]] = MappingProxyType(toc_index)
 
-        # create rst files for those structural dummies doxygen is using...
-        structural_dummies = [e for e in self._flatten_tree(self._menu) if e.is_structural_dummy]
-        apply(structural_dummies, self._prepare_structural_dummy)
-        apply(structural_dummies, self._create_toc_file_for_structural_dummy)
+    def __getstate__(self) -> Dict[str, Any]:
+        """Get the state for pickling (workers only need the toc index)."""
+        return {"_source_dir": self._source_dir, "_toc_index": dict(self._toc_index)}
 
-        self._menu_lookup: Dict[str, _MenuEntry] = {
-            e.docname: e for e in self._flatten_tree(self._menu) if not e.is_leaf
-        }
+    def __setstate__(self, state: Dict[str, Any]):
+        """Restore the state after unpickling."""
+        self._source_dir = state["_source_dir"]
+        self._toc_index = MappingProxyType(state["_toc_index"])
+        self._structural_documents = []  # these are written by the main process only
 
     def _parse_template(self) -> Tuple[str, str]:
         """Parse a "doxygen html template shell" out of the index.html file.
@@ -208,10 +264,18 @@ class DoxygenTocGenerator:
         toc_docname = f"{structural_dummy.docname}_{clean_title}"
         structural_dummy.docname = toc_docname
 
-    def _create_toc_file_for_structural_dummy(self, structural_dummy: _MenuEntry):
+    def structural_documents(self) -> Iterator[Tuple[Path, List[str]]]:
+        """
+        Get the rst documents for the structural dummies doxygen is using in its menu.
+
+        :return: an iterator of tuples with the target rst file and the lines forming its content.
+        """
+        yield from self._structural_documents
+
+    def _create_toc_content_for_structural_dummy(self, structural_dummy: _MenuEntry) -> List[str]:
         prefix, suffix = self._doxy_html_template
 
-        content = [
+        return [
             f".. title:: {structural_dummy.title}",
             "",
             f"{structural_dummy.title}",
@@ -234,47 +298,200 @@ class DoxygenTocGenerator:
             "",
         ]
 
-        file = self._source_dir / f"{structural_dummy.docname}.rst"
-
-        write_file(file, content)
-
     def _load_menu_tree(self, menu_data_js_path: Path) -> _MenuEntry:
         menu = read_js_data_file(menu_data_js_path)
         items = menu["children"]
 
         children = [_MenuEntry.from_json_node(c) for c in items]
-        root, *_ = children
-        _, *children_without_root = children
-        root_copy = replace(root, children=children_without_root)
-        return root_copy
-
-    def _flatten_tree(self, *entries: _MenuEntry) -> Iterator[_MenuEntry]:
-        for entry in entries:
-            yield entry
-            if not entry.is_leaf:
-                yield from self._flatten_tree(*entry.children)
-
-    def generate_toc_for(self, file: Path) -> Iterator[str]:
+        root, *children_without_root = children
+        return _MenuEntry(root.title, root.docname, root.url, children_without_root, root.is_structural_dummy)
+
+    def _index_menu_tree(self, menu: _MenuEntry) -> Tuple[List[_MenuEntry], Dict[str, Tuple[str, ...]]]:
+        """Collect the structural dummies and the toctrees of all menu entries in one (pre-order) traversal.
+
+        Structural dummies get their final docname before their parent's toctree is created.
+
+        :return: A tuple of the structural dummies and the toc index (docname -> toctree lines).
+        """
+        structural_dummies: List[_MenuEntry] = []
+        toc_index: Dict[str, Tuple[str, ...]] = {}
+
+        if menu.is_structural_dummy:
+            self._prepare_structural_dummy(menu)
+
+        stack = [menu]
+        while stack:
+            entry = stack.pop()
+            if entry.is_structural_dummy:
+                structural_dummies.append(entry)
+            if entry.is_leaf:
+                continue
+
+            for child in entry.children:
+                if child.is_structural_dummy:
+                    self._prepare_structural_dummy(child)
+            toc_index[entry.docname] = self._create_toctree(entry)
+            stack.extend(reversed(entry.children))
+
+        return structural_dummies, toc_index
+
+    def _create_toctree(self, menu_entry: _MenuEntry) -> Tuple[str, ...]:
+        if not menu_entry.children:  # when the children list is empty no tocs need to be generated.
+            return ()
+
+        return (
+            ".. toctree::",
+            f"   :caption: {menu_entry.title}",
+            "   :maxdepth: 2",
+            "   :hidden:",
+            "",
+            *[f"   {item.title} <{item.docname}>" for item in menu_entry.children],
+            "",
+        )
+
+    def generate_toc_for(self, file: Path) -> Iterable[str]:
         """
         Generate a toctree directive for a given file.
 
         Note that the toctree will only be generated when the file is part of a menu
         structure.
         :param file: the file to generate the toctree directive for
-        :return: a string iterator representing the lines forming the toctree directive
+        :return: a string iterable representing the lines forming the toctree directive
         """
-        name = file.stem
-        if name in self._menu_lookup:
-            matching_menu_entry = self._menu_lookup[name]
-
-            children = matching_menu_entry.children
-            if not children:  # when the children list is empty no tocs need to be generated.
-                return
-
-            yield ".. toctree::"
-            yield f"   :caption: {matching_menu_entry.title}"
-            yield "   :maxdepth: 2"
-            yield "   :hidden:"
-            yield ""
-            yield from [f"   {item.title} <{item.docname}>" for item in matching_menu_entry.children]
-            yield ""
+        return self._toc_index.get(file.stem, ())
+
+
+_NavtreeNode = List[Any]
+"""A node in doxygen's navigation tree: [title, url or None, children (list, name of a js file or None)]."""
+
+
+class DoxygenNavtreeTocGenerator:
+    """
+    A TocGenerator for doxygen's navigation tree.
+
+    Will read the navtreedata.js (doxygen writes it when ``GENERATE_TREEVIEW = YES``) to generate hierarchical
+    toctrees (e.g. namespaces/classes/nested classes). The navigation tree is split by doxygen into multiple
+    files. These are loaded lazily - only the navtreeindex shards and tree files needed for the files toctrees
+    are generated for are read.
+    """
+
+    def __init__(self, source_dir: Path):
+        """
+        Initialize an instance of a TocGenerator.
+
+        :param source_dir: The source directory where the doxygen html files reside.
+        """
+        self._source_dir = source_dir
+
+        navtree_data = read_js_data_vars(source_dir / "navtreedata.js")
+        self._navtree: List[_NavtreeNode] = navtree_data["NAVTREE"]
+        # the first url of every navtreeindex shard (sorted)
+        self._index_shard_starts: List[str] = navtree_data["NAVTREEINDEX"]
+
+        # lazily loaded parts
+        self._index_shards: Dict[int, Dict[str, List[int]]] = {}
+        self._tree_files: Dict[str, List[_NavtreeNode]] = {}
+
+    def structural_documents(self) -> Iterable[Tuple[Path, List[str]]]:
+        """
+        Get additional documents that are necessary to represent the toc structure.
+
+        Every entry in doxygen's navigation tree is a html page so there are none.
+        """
+        return []
+
+    def generate_toc_for(self, file: Path) -> Iterable[str]:
+        """
+        Generate a toctree directive for a given file.
+
+        Note that the toctree will only be generated when the file is part of the navigation tree and has
+        children there.
+        :param file: the file to generate the toctree directive for
+        :return: a string iterable representing the lines forming the toctree directive
+        """
+        page = file.name
+        path = self._find_path(page)
+        if path is None:
+            return ()
+
+        # doxygen often repeats a page for its first child (e.g. "Classes" -> "Class List" both link to
+        # annotated.html). The topmost node is used - the children of the repeated ones are merged into it.
+        # (a stale or inconsistent index may point to a path that doesn't lead to the page - there is no toc then)
+        node = next((n for n in self._resolve(path) if self._page(n[1]) == page), None)
+        if node is None:
+            return ()
+
+        entries = self._toc_entries(node, page)
+        if not entries:
+            return ()
+
+        return (
+            ".. toctree::",
+            f"   :caption: {html.unescape(node[0])}",
+            "   :maxdepth: 2",
+            "   :hidden:",
+            "",
+            *entries,
+            "",
+        )
+
+    def _find_path(self, page: str) -> Optional[List[int]]:
+        """Find the path (child indices from the root) of a page via the navtreeindex shards."""
+        shard = bisect_right(self._index_shard_starts, page) - 1
+        if shard < 0:
+            return None
+
+        if shard not in self._index_shards:
+            shard_file = self._source_dir / f"navtreeindex{shard}.js"
+            self._index_shards[shard] = read_js_data_vars(shard_file)[f"NAVTREEINDEX{shard}"]
+
+        return self._index_shards[shard].get(page)
+
+    def _resolve(self, path: List[int]) -> List[_NavtreeNode]:
+        """Get the nodes from the root down to the node at the given path."""
+        node = self._navtree[0]
+        nodes = [node]
+        for index in path:
+            node = self._children(node)[index]
+            nodes.append(node)
+        return nodes
+
+    def _children(self, node: _NavtreeNode) -> List[_NavtreeNode]:
+        children = node[2] if len(node) > 2 else None
+        if not isinstance(children, str):
+            return children or []
+
+        if children not in self._tree_files:
+            self._tree_files[children] = read_js_data_vars(self._source_dir / f"{children}.js")[children]
+        return self._tree_files[children]
+
+    @staticmethod
+    def _page(url: Optional[str]) -> Optional[str]:
+        return url.partition("#")[0] if url else None
+
+    def _toc_entries(self, node: _NavtreeNode, page: str) -> List[str]:
+        entries: List[str] = []
+        seen_pages = {page}
+        pending = list(reversed(self._children(node)))
+        while pending:
+            child = pending.pop()
+            title, url = child[0], child[1]
+            child_page = self._page(url)
+            if child_page == page:
+                # anchors into the page itself (e.g. members) can't be in a toctree - but merge their children
+                pending.extend(reversed(self._children(child)))
+                continue
+            if child_page is None or child_page in seen_pages:
+                continue
+
+            seen_pages.add(child_page)
+            entries.append(f"   {html.unescape(title)} <{_MenuEntry._docname_from_url(child_page)}>")
+
+        return entries
+
+
+TOC_GENERATORS: Dict[str, Type[TocGenerator]] = {
+    "menu": DoxygenTocGenerator,
+    "navtree": DoxygenNavtreeTocGenerator,
+}
+"""The available toc generators by name (e.g. for command line options)."""
@@ -0,0 +1,98 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+"""The cache module contains a simple persistent (user level) cache for derived data."""
+
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+_logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV_VAR = "DOXYSPHINX_CACHE_DIR"
+"""The environment variable to override the cache directory with."""
+
+
+def user_cache_dir() -> Path:
+    """
+    Get the user level cache directory of doxysphinx.
+
+    The directory is taken from (in that order):
+
+    * the ``DOXYSPHINX_CACHE_DIR`` environment variable
+    * ``$XDG_CACHE_HOME/doxysphinx``
+    * ``%LOCALAPPDATA%/doxysphinx/cache`` (on windows)
+    * ``~/.cache/doxysphinx``
+
+    :return: The cache directory (it may not exist yet).
+    """
+    if cache_dir := os.environ.get(CACHE_DIR_ENV_VAR):
+        return Path(cache_dir)
+    if xdg_cache_home := os.environ.get("XDG_CACHE_HOME"):
+        return Path(xdg_cache_home) / "doxysphinx"
+    if sys.platform == "win32" and (local_app_data := os.environ.get("LOCALAPPDATA")):
+        return Path(local_app_data) / "doxysphinx" / "cache"
+    return Path.home() / ".cache" / "doxysphinx"
+
+
+class UserCache:
+    """
+    A persistent key-value cache for text data in the user cache directory (see :func:`user_cache_dir`).
+
+    The cache is meant for data that is expensive to derive but can always be derived again. So all errors
+    (e.g. a read-only home directory) are logged and otherwise ignored - the cache then behaves as if it was empty.
+    Keys should therefore contain a hash of all inputs the data is derived from.
+    """
+
+    def __init__(self, namespace: str):
+        """
+        Create an instance of the UserCache.
+
+        :param namespace: The namespace (a sub directory of the cache directory) to separate different kinds of data.
+        """
+        self._directory = user_cache_dir() / namespace
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached value.
+
+        :param key: The key of the value (has to be usable as filename).
+        :return: The value or None if there is no value for the key.
+        """
+        try:
+            return (self._directory / key).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            _logger.debug(f"couldn't read {key} from cache {self._directory}: {error}")
+            return None
+
+    def put(self, key: str, value: str):
+        """
+        Store a value in the cache.
+
+        The value is written atomically so that concurrent processes never read partially written values.
+
+        :param key: The key of the value (has to be usable as filename).
+        :param value: The value to store.
+        """
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_file = tempfile.mkstemp(dir=self._directory, prefix=f".{key}.")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as file:
+                    file.write(value)
+                os.replace(tmp_file, self._directory / key)
+            except BaseException:
+                os.unlink(tmp_file)
+                raise
+        except OSError as error:
+            _logger.debug(f"couldn't write {key} to cache {self._directory}: {error}")
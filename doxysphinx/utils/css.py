@@ -0,0 +1,152 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+"""The css module contains a simple (pure python) css tokenizer and selector scoping."""
+
+import re
+from typing import Iterator, List
+
+# a css token is either a comment, a string, a block/statement delimiter or any other text
+_token_regex = re.compile(
+    r"""/\*.*?(?:\*/|$)|"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[{};]|[^{};/"']+|[/"']""",
+    re.DOTALL,
+)
+
+# at-rules that contain style rules (which have to be scoped)
+_conditional_at_rules = {"@media", "@supports", "@container", "@layer", "@document", "@-moz-document"}
+
+# selectors that address the document root (they can't be scoped below an element)
+_global_selector_regex = re.compile(r"(?:html|:root)(?![\w-])[^\s>+~,]*", re.IGNORECASE)
+# the body (optionally as child or descendant of the document root) is the last element above the scope
+_body_selector_regex = re.compile(r"(?:\s*>\s*|\s+)?body(?![\w-])[^\s>+~,]*", re.IGNORECASE)
+
+
+def tokenize_css(css: str) -> Iterator[str]:
+    """
+    Split css into tokens.
+
+    A token is a comment, a string, one of the delimiters ``{``, ``}`` and ``;`` or the text in between. Joining
+    all tokens results in the original css again.
+
+    :param css: The css content.
+    :return: An iterator of tokens.
+    """
+    return (m.group(0) for m in _token_regex.finditer(css))
+
+
+def scope_css(css: str, selector: str) -> Iterator[str]:
+    """
+    Scope all style rules of a stylesheet below a selector (e.g. ``h1 {...}`` -> ``.scope h1 {...}``).
+
+    This is done in one streaming pass over the tokens of the stylesheet. Style rules inside conditional at-rules
+    (``@media``, ``@supports`` etc.) are scoped as well. Other at-rules (like ``@keyframes``, ``@font-face`` or
+    ``@import``) stay global, and so do rules for the document root (``html`` and ``:root``) - for rules addressing
+    descendants of the root or the body the scope is inserted after them (``html.dark .x`` -> ``html.dark .scope .x``,
+    ``body > div`` -> ``body .scope > div``).
+    Everything else (declarations, comments, formatting) is kept as it is.
+
+    :param css: The css content.
+    :param selector: The selector to scope the style rules below.
+    :return: An iterator of css chunks forming the scoped stylesheet.
+    """
+    prelude: List[str] = []  # the tokens since the last delimiter
+    verbatim_depth = 0  # the nesting level inside a style rule or a global at-rule (which are written verbatim)
+
+    for token in tokenize_css(css):
+        if verbatim_depth:
+            if token == "{":
+                verbatim_depth += 1
+            elif token == "}":
+                verbatim_depth -= 1
+            yield token
+        elif token == "{":
+            at_rule = _at_rule_name(prelude)
+            if at_rule in _conditional_at_rules:
+                yield from prelude
+            elif at_rule:
+                yield from prelude
+                verbatim_depth = 1
+            else:
+                yield _scope_prelude(prelude, selector)
+                verbatim_depth = 1
+            yield token
+            prelude = []
+        elif token in (";", "}"):
+            yield from prelude
+            yield token
+            prelude = []
+        else:
+            prelude.append(token)
+
+    yield from prelude
+
+
+def _at_rule_name(prelude: List[str]) -> str:
+    for token in prelude:
+        if token.startswith("/*") or token.isspace():
+            continue
+        if not token.lstrip().startswith("@"):
+            return ""
+        return token.split(maxsplit=1)[0].split("(", 1)[0].lower()
+    return ""
+
+
+def _scope_prelude(prelude: List[str], selector: str) -> str:
+    # leading comments and whitespace stay where they are
+    start = 0
+    while start < len(prelude) and (prelude[start].startswith("/*") or prelude[start].isspace()):
+        start += 1
+    selectors = "".join(prelude[start:])
+    leading = "".join(prelude[:start])
+    return leading + ",".join(_scope_selector(s, selector) for s in _split_selector_list(selectors))
+
+
+def _split_selector_list(selectors: str) -> List[str]:
+    # split at commas that aren't inside parentheses, brackets or strings (e.g. ":is(a, b)" or "[title='a,b']")
+    parts: List[str] = []
+    depth = 0
+    quote = ""
+    start = 0
+    for index, char in enumerate(selectors):
+        if quote:
+            if char == quote and selectors[index - 1] != "\\":
+                quote = ""
+        elif char in "\"'":
+            quote = char
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(selectors[start:index])
+            start = index + 1
+    parts.append(selectors[start:])
+    return parts
+
+
+def _scope_selector(part: str, selector: str) -> str:
+    stripped = part.strip()
+    if not stripped:
+        return part
+
+    leading = part[: len(part) - len(part.lstrip())]
+    trailing = part[len(part.rstrip()) :]
+
+    # the prefix addressing the root and/or the body ("html.dark > body" in "html.dark > body > div")
+    root = _global_selector_regex.match(stripped)
+    prefix_end = root.end() if root else 0
+    body = _body_selector_regex.match(stripped, prefix_end) if root or stripped[0] not in ">+~" else None
+    prefix_end = body.end() if body else prefix_end
+    rest = stripped[prefix_end:].lstrip()
+
+    if not prefix_end or (body and not rest):
+        stripped = f"{selector} {stripped}"
+    elif rest:
+        stripped = f"{stripped[:prefix_end]} {selector} {rest}"
+
+    return f"{leading}{stripped}{trailing}"
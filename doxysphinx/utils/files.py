@@ -8,14 +8,51 @@
 # =====================================================================================
 """The files module contains several file related helper functions."""
 
+import errno
+import gzip
 import hashlib
+import json
+import logging
 import os
 import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from .exceptions import ValidationError
 
+try:
+    import brotli  # type: ignore
+except ImportError:
+    # brotli is optional - without it only gzip compressed files are written (see compress_files)
+    brotli = None
+
+_logger = logging.getLogger(__name__)
+
+PROVISIONING_STRATEGIES = ("copy", "hardlink", "reflink", "copy_file_range", "symlink")
+"""
+The strategies to provide a file at another location (see :func:`provide_file`):
+
+* ``copy``: a plain copy (the default).
+* ``hardlink``: a hard link to the source file (source and target have to be on the same file system).
+* ``reflink``: a copy-on-write clone (needs a file system with reflink support like btrfs or xfs on linux).
+* ``copy_file_range``: a kernel side copy (linux only - some file systems do a server side copy or reflink).
+* ``symlink``: a symbolic link to the (absolute) source file.
+
+Note that with ``hardlink`` (and ``symlink``) the targets aren't independent of their source anymore.
+"""
+
+DEFAULT_IO_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+"""The default number of threads for file operations (the same as python's ThreadPoolExecutor default)."""
+
+COMPRESSED_SUFFIXES = (".gz", ".br")
+"""The suffixes of the compressed siblings :func:`compress_files` writes (``.br`` only if brotli is installed)."""
+
+_FICLONE = 0x40049409  # linux ioctl request code for reflinks (_IOW(0x94, 9, int))
+
 
 def write_file(file: Path, data: Iterable[str], separator: Optional[str] = None):
     r"""
@@ -35,6 +72,30 @@ def write_file(file: Path, data: Iterable[str], separator: Optional[str] = None)
             file_handler.write(f"{item}{separator}".encode("utf-8"))
 
 
+def write_file_if_changed(file: Path, data: Iterable[str], separator: Optional[str] = None) -> bool:
+    r"""
+    Write an array of lines to a file but only if the resulting content differs from the existing file.
+
+    Unchanged files aren't touched at all (so their modification time is kept).
+
+    :param file: The path to the file.
+    :param data: An array of lines to write to the file.
+    :param separator: The line separator. Defaults to os.linesep = autodetect for current os.
+        If you want to force a unix "lf" file use '\n',
+        if you want to force a windows "crlf" file use '\r\n'., defaults to None
+    :return: True if the file was written, False if it was unchanged.
+    """
+    if not separator:
+        separator = os.linesep
+
+    content = "".join(f"{item}{separator}" for item in data).encode("utf-8")
+    if file.exists() and file.stat().st_size == len(content) and file.read_bytes() == content:
+        return False
+
+    file.write_bytes(content)
+    return True
+
+
 def replace_in_file(file: Path, search: str, replacement: str):
     """
     Replace a text in a file.
@@ -93,8 +154,143 @@ class _FileByNameAndSize:
         return f"{self.path.__repr__()} [{self.size}]"
 
 
+@dataclass(frozen=True)
+class FileManifestEntry:
+    """The state of a (source) file at the time it was processed (e.g. copied)."""
+
+    size: int
+    """The size of the file in bytes."""
+    mtime_ns: int
+    """The modification time of the file in nanoseconds."""
+    hash: str
+    """The hash of the file content (see :func:`hash_blake2b`)."""
+
+
+class FileManifest:
+    """
+    A persistent manifest of processed files (relative path -> :class:`FileManifestEntry`).
+
+    The manifest is used to detect changed files without comparing them to their targets. A file with the same
+    size and modification time as in the manifest is considered unchanged. Otherwise its hash is compared, so that
+    changes which keep the size are detected as well (and touched but unchanged files aren't processed again).
+    """
+
+    _version = 1
+
+    def __init__(self, file: Path):
+        """
+        Create a FileManifest (and load it if the file already exists).
+
+        :param file: The path to the manifest file.
+        """
+        self.file = file
+        self._entries: Dict[str, FileManifestEntry] = {}
+        self._changed = False
+
+        if file.exists():
+            try:
+                data = json.loads(file.read_text(encoding="utf-8"))
+                if data.get("version") == self._version:
+                    self._entries = {k: FileManifestEntry(*v) for k, v in data["files"].items()}
+            except (ValueError, TypeError, KeyError):
+                # a broken manifest is just like a missing one - everything gets processed again.
+                self._entries = {}
+
+    def get(self, relative_path: str) -> Optional[FileManifestEntry]:
+        """
+        Get the entry for a relative path.
+
+        :param relative_path: The path (relative to the manifest's base directory, with forward slashes).
+        :return: The entry or None if there is none.
+        """
+        return self._entries.get(relative_path)
+
+    def set(self, relative_path: str, entry: FileManifestEntry):
+        """
+        Set the entry for a relative path.
+
+        :param relative_path: The path (relative to the manifest's base directory, with forward slashes).
+        :param entry: The entry.
+        """
+        if self._entries.get(relative_path) != entry:
+            self._entries[relative_path] = entry
+            self._changed = True
+
+    def remove(self, relative_path: str):
+        """
+        Remove the entry for a relative path (if there is one).
+
+        :param relative_path: The path (relative to the manifest's base directory, with forward slashes).
+        """
+        if self._entries.pop(relative_path, None) is not None:
+            self._changed = True
+
+    def relative_paths(self) -> List[str]:
+        """
+        Get the relative paths of all entries.
+
+        :return: The paths (relative to the manifest's base directory, with forward slashes).
+        """
+        return list(self._entries)
+
+    def is_unchanged(self, relative_path: str, file: Path) -> bool:
+        """
+        Check whether a file is unchanged compared to its entry.
+
+        Touched files with unchanged content are considered unchanged (their entry is updated).
+
+        :param relative_path: The path (relative to the manifest's base directory, with forward slashes).
+        :param file: The file to check.
+        :return: True if the file is unchanged.
+        """
+        entry = self._entries.get(relative_path)
+        if entry is None:
+            return False
+
+        stat = file.stat()
+        if entry.size != stat.st_size:
+            return False
+        if entry.mtime_ns == stat.st_mtime_ns:
+            return True
+        if entry.hash != hash_blake2b(file):
+            return False
+
+        self.set(relative_path, FileManifestEntry(stat.st_size, stat.st_mtime_ns, entry.hash))
+        return True
+
+    def update(self, relative_path: str, file: Path):
+        """
+        Set the entry for a relative path to the current state of the file.
+
+        :param relative_path: The path (relative to the manifest's base directory, with forward slashes).
+        :param file: The file to create the entry for.
+        """
+        self.set(relative_path, _create_manifest_entry(file))
+
+    def save(self):
+        """Save the manifest (if it was changed)."""
+        if not self._changed:
+            return
+
+        data = {"version": self._version, "files": {k: astuple(v) for k, v in sorted(self._entries.items())}}
+        self.file.write_text(json.dumps(data, indent=0), encoding="utf-8")
+        self._changed = False
+
+
+def _create_manifest_entry(file: Path) -> FileManifestEntry:
+    stat = file.stat()
+    return FileManifestEntry(stat.st_size, stat.st_mtime_ns, hash_blake2b(file))
+
+
 def copy_if_different(
-    source_dir: Path, target_dir: Path, *patterns: str, ignore_files: Optional[List[Path]] = None
+    source_dir: Path,
+    target_dir: Path,
+    *patterns: str,
+    ignore_files: Optional[List[Path]] = None,
+    manifest: Optional[FileManifest] = None,
+    strategy: str = "copy",
+    io_workers: int = 1,
+    source_filter: Optional[Callable[[Path], bool]] = None,
 ) -> List[Path]:
     """
      Copy files with given glob patterns from source_dir to target_dir but only if the files are different.
@@ -102,6 +298,14 @@ def copy_if_different(
     :param source_dir: The source directory of the files to copy
     :param target_dir: The target directory where the files are copied to
     :param patterns: glob patterns for the source files
+    :param ignore_files: source files that shouldn't be copied
+    :param manifest: a manifest of the source files (with paths relative to source_dir) from the last copy. If
+        given, the files are compared with the manifest instead of their targets (which detects same size changes
+        and doesn't need to stat the target files). The manifest is updated but not saved.
+    :param strategy: the provisioning strategy to use for "copying" (see :func:`provide_file`).
+    :param io_workers: the number of threads that copy the files. Copying is mostly waiting for the file system
+        (especially on network file systems) so more threads than cores make sense here. 1 copies sequentially.
+    :param source_filter: a predicate for the source files - only files it returns True for are copied.
     :return: a list of all files that were copied (target files)
     """
     if not source_dir.is_dir():
@@ -112,14 +316,69 @@ def copy_if_different(
     target_dir.mkdir(parents=True, exist_ok=True)
 
     # for each source file try to find a target (an existing file)
+    source_files = _get_source_files(source_dir, patterns, ignore_files, source_filter)
+    files_to_copy = _get_files_to_copy(source_dir, target_dir, source_files, manifest)
+    copied = _copy_files(source_dir, target_dir, files_to_copy, strategy, manifest is not None, io_workers)
+
+    result: List[Path] = []
+    fallbacks = 0
+    for source_file, (target_file, used_strategy, entry) in zip(files_to_copy, copied):
+        if used_strategy != strategy:
+            fallbacks += 1
+        if manifest is not None and entry is not None:
+            manifest.set(source_file.relative_to(source_dir).as_posix(), entry)
+        result.append(target_file)
+
+    if fallbacks:
+        _logger.info(f"{strategy} isn't supported for {fallbacks} files in {target_dir} - copied them instead.")
+
+    return result
+
+
+def _get_source_files(
+    source_dir: Path,
+    patterns: Tuple[str, ...],
+    ignore_files: Optional[List[Path]],
+    source_filter: Optional[Callable[[Path], bool]],
+) -> List[Path]:
     source_files = multi_glob(source_dir, *patterns)
     if ignore_files:
         for ignored in ignore_files:
             if ignored in source_files:
                 source_files.remove(ignored)
+    if source_filter:
+        source_files = [f for f in source_files if source_filter(f)]
+    return source_files
+
 
+def _copy_files(
+    source_dir: Path, target_dir: Path, files: List[Path], strategy: str, with_entries: bool, io_workers: int
+) -> List[Tuple[Path, str, Optional[FileManifestEntry]]]:
+    # create each target directory once (instead of once per file in the copy threads)
+    for directory in sorted({(target_dir / f.relative_to(source_dir)).parent for f in files}):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def _copy(source_file: Path) -> Tuple[Path, str, Optional[FileManifestEntry]]:
+        target_file = target_dir / source_file.relative_to(source_dir)
+        used_strategy = provide_file(source_file, target_file, strategy)
+        # the hash for the manifest is calculated in the thread too - the manifest itself is updated afterwards
+        entry = _create_manifest_entry(source_file) if with_entries else None
+        return target_file, used_strategy, entry
+
+    if io_workers > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=io_workers) as executor:
+            return list(executor.map(_copy, files))
+    return [_copy(f) for f in files]
+
+
+def _get_files_to_copy(
+    source_dir: Path, target_dir: Path, source_files: List[Path], manifest: Optional[FileManifest]
+) -> List[Path]:
+    # if there's a manifest then get the files to copy based on it...
+    if manifest is not None:
+        files_to_copy = [f for f in source_files if not manifest.is_unchanged(f.relative_to(source_dir).as_posix(), f)]
     # if the target directory is not empty then get the files to copy based on size...
-    if any(Path(target_dir).iterdir()):
+    elif any(Path(target_dir).iterdir()):
         target_files: List[Path] = [
             t for t in [target_dir / f.relative_to(source_dir) for f in source_files] if t.exists()
         ]
@@ -132,15 +391,279 @@ def copy_if_different(
     else:
         files_to_copy = source_files
 
-    result: List[Path] = []
-    for file in files_to_copy:
-        source_file = file
-        target_file = target_dir / source_file.relative_to(source_dir)
-        target_file.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy(source_file, target_file)
-        result.append(target_file)
+    return files_to_copy
 
-    return result
+
+def delete_files(files: List[Path], io_workers: int = 1, batch_size: int = 256) -> List[Path]:
+    """
+    Delete files (in parallel batches).
+
+    :param files: The files to delete. Files that don't exist are skipped.
+    :param io_workers: The number of threads that delete the files (1 deletes them sequentially).
+    :param batch_size: The number of files each thread deletes in one go (to keep the scheduling overhead low).
+    :return: The files that were deleted.
+    """
+
+    def _delete(batch: List[Path]) -> List[Path]:
+        deleted: List[Path] = []
+        for file in batch:
+            try:
+                file.unlink()
+                deleted.append(file)
+            except FileNotFoundError:
+                pass
+        return deleted
+
+    batches = [files[i : i + batch_size] for i in range(0, len(files), batch_size)]
+    if io_workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=io_workers) as executor:
+            return [file for deleted in executor.map(_delete, batches) for file in deleted]
+    return [file for batch in batches for file in _delete(batch)]
+
+
+def compressed_siblings(file: Path) -> List[Path]:
+    """
+    Get the (possible) compressed siblings of a file (e.g. ``doxygen.css.gz`` for ``doxygen.css``).
+
+    :param file: The file.
+    :return: The paths of the compressed siblings for all :data:`COMPRESSED_SUFFIXES` (they don't have to exist).
+    """
+    return [file.with_name(file.name + suffix) for suffix in COMPRESSED_SUFFIXES]
+
+
+def compress_files(files: List[Path], io_workers: int = 1) -> List[Path]:
+    """
+    Write precompressed siblings of files (gzip and - if the brotli package is installed - brotli).
+
+    Static web servers can deliver these directly instead of compressing the files on each request (e.g. nginx's
+    ``gzip_static``). The gzip files are reproducible (they contain no timestamp). Files that don't get smaller by
+    compressing get no (and lose their outdated) compressed siblings.
+
+    :param files: The files to compress.
+    :param io_workers: The number of threads that compress the files (compressing releases the GIL, so this scales
+        with the cores). 1 compresses sequentially.
+    :return: The compressed files that were written.
+    """
+    compressors: List[Tuple[str, Callable[[bytes], bytes]]] = [(".gz", lambda d: gzip.compress(d, 9, mtime=0))]
+    if brotli is not None:
+        compressors.append((".br", brotli.compress))
+
+    def _compress(file: Path) -> List[Path]:
+        data = file.read_bytes()
+        written: List[Path] = []
+        for suffix, compress in compressors:
+            compressed = compress(data)
+            sibling = file.with_name(file.name + suffix)
+            if len(compressed) < len(data):
+                sibling.write_bytes(compressed)
+                written.append(sibling)
+            else:
+                sibling.unlink(missing_ok=True)
+        return written
+
+    if io_workers > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=io_workers) as executor:
+            return [c for compressed in executor.map(_compress, files) for c in compressed]
+    return [c for f in files for c in _compress(f)]
+
+
+def provide_file(source: Path, target: Path, strategy: str = "copy") -> str:
+    """
+    Provide a file at a target location with the given strategy (see :data:`PROVISIONING_STRATEGIES`).
+
+    If the strategy isn't supported (by the platform or the file system) the file is copied instead. An existing
+    target is always replaced (and never written through - as it might be a link to the source).
+
+    :param source: The source file.
+    :param target: The target file (its parent directory has to exist).
+    :param strategy: The provisioning strategy.
+    :return: The strategy that was actually used ("copy" in case of a fallback).
+    """
+    if strategy not in PROVISIONING_STRATEGIES:
+        raise ValidationError(f"unknown provisioning strategy {strategy}, use one of {PROVISIONING_STRATEGIES}.")
+
+    if target.is_symlink() or target.exists():
+        target.unlink()
+
+    if strategy != "copy":
+        try:
+            _provide_functions[strategy](source, target)
+            return strategy
+        except (OSError, NotImplementedError) as error:
+            _logger.debug(f"couldn't {strategy} {source} to {target} ({error}) - copying it instead.")
+            if target.is_symlink() or target.exists():
+                target.unlink()
+
+    shutil.copy(source, target)
+    return "copy"
+
+
+def _hardlink(source: Path, target: Path):
+    os.link(source, target)
+
+
+def _symlink(source: Path, target: Path):
+    os.symlink(source.resolve(), target)
+
+
+def _reflink(source: Path, target: Path):
+    if not sys.platform.startswith("linux"):
+        raise NotImplementedError("reflinks are only supported on linux.")
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copymode(source, target)
+
+
+def _copy_file_range(source: Path, target: Path):
+    if not hasattr(os, "copy_file_range"):
+        raise NotImplementedError("copy_file_range is only supported on linux.")
+
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+            if copied == 0:
+                raise OSError(errno.EIO, "copy_file_range stopped before the end of the file")
+            remaining -= copied
+    shutil.copymode(source, target)
+
+
+_provide_functions = {
+    "hardlink": _hardlink,
+    "symlink": _symlink,
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+}
+
+
+class ContentAddressedStore:
+    """
+    A directory of files that are named by their content (the name contains a hash of the content).
+
+    Files with the same content are stored only once - so the store can be shared e.g. by several doxygen projects
+    with identical resources. Stored files are never changed afterwards, so they may be hardlinked safely.
+
+    The users of the store (e.g. the projects) record the files they use (see :meth:`reference`), so that files
+    nobody uses anymore can be removed (see :meth:`prune`).
+    """
+
+    _records_dir_name = ".references"
+
+    def __init__(self, directory: Path):
+        """
+        Create a ContentAddressedStore.
+
+        :param directory: The directory of the store (it is created when the first file is added).
+        """
+        self.directory = directory
+
+    @staticmethod
+    def name_for(name: str, digest: str) -> str:
+        """
+        Get the name of a stored file.
+
+        :param name: The original filename.
+        :param digest: The (hex) hash of the file content.
+        :return: The filename in the store (the original name with a part of the hash before the suffix).
+        """
+        path = Path(name)
+        return f"{path.stem}.{digest[:16]}{path.suffix}"
+
+    def add(self, file: Path, digest: Optional[str] = None) -> Path:
+        """
+        Add a file to the store (the file is copied only if there's no file with the same content yet).
+
+        :param file: The file to add.
+        :param digest: The blake2b hash of the file (see :func:`hash_blake2b`) if it is already known.
+        :return: The path of the stored file.
+        """
+        stored = self.directory / self.name_for(file.name, digest or hash_blake2b(file))
+        if not stored.exists():
+            self._write_atomically(stored, lambda temp: shutil.copyfile(file, temp))
+        return stored
+
+    def add_content(self, name: str, data: bytes) -> Path:
+        """
+        Add content to the store (the content is written only if there's no file with the same content yet).
+
+        :param name: The original filename of the content.
+        :param data: The content.
+        :return: The path of the stored file.
+        """
+        stored = self.directory / self.name_for(name, hashlib.blake2b(data).hexdigest())
+        if not stored.exists():
+            self._write_atomically(stored, lambda temp: temp.write_bytes(data))
+        return stored
+
+    def reference(self, owner: str, files: Iterable[Path]):
+        """
+        Record the stored files an owner uses (this replaces the former record of the owner).
+
+        :param owner: The identifier of the owner (e.g. the path of a project's output directory).
+        :param files: The stored files (as returned by :meth:`add` and :meth:`add_content`).
+        """
+        content = json.dumps({"owner": owner, "files": sorted(f.name for f in files)}, indent=0)
+        record = self._record_file(owner)
+        if not record.exists() or record.read_text(encoding="utf-8") != content:
+            self._write_atomically(record, lambda temp: temp.write_text(content, encoding="utf-8"))
+
+    def unreference(self, owner: str):
+        """
+        Remove the record of an owner (its files are removed by the next :meth:`prune`).
+
+        :param owner: The identifier of the owner.
+        """
+        self._record_file(owner).unlink(missing_ok=True)
+
+    def prune(self, is_owner_alive: Callable[[str], bool] = lambda owner: True) -> List[Path]:
+        """
+        Delete the stored files that aren't recorded for any owner.
+
+        :param is_owner_alive: Decides whether an owner still exists - the records of owners that are gone are
+            removed.
+        :return: The deleted files.
+        """
+        if not self.directory.is_dir():
+            return []
+
+        referenced: Set[str] = set()
+        for record in self.directory.joinpath(self._records_dir_name).glob("*.json"):
+            try:
+                data = json.loads(record.read_text(encoding="utf-8"))
+                owner, files = data["owner"], data["files"]
+            except (ValueError, TypeError, KeyError):
+                # the files of a broken record are unknown - so nothing can be removed safely
+                return []
+            if is_owner_alive(owner):
+                referenced.update(files)
+            else:
+                record.unlink(missing_ok=True)
+
+        # hidden files are the ones that are just written (see _write_atomically)
+        unreferenced = [
+            f
+            for f in self.directory.iterdir()
+            if f.is_file() and not f.name.startswith(".") and f.name not in referenced
+        ]
+        return delete_files(unreferenced)
+
+    def _record_file(self, owner: str) -> Path:
+        digest = hashlib.blake2b(owner.encode("utf-8"), digest_size=8).hexdigest()
+        return self.directory / self._records_dir_name / f"{digest}.json"
+
+    @staticmethod
+    def _write_atomically(file: Path, write: Callable[[Path], Any]):
+        # the store may be filled concurrently (e.g. by parallel builds) - so never expose partially written files
+        file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = file.with_name(f".{file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            write(temp_file)
+            os.replace(temp_file, file)
+        except BaseException:
+            temp_file.unlink(missing_ok=True)
+            raise
 
 
 def stringify_paths(paths: Iterable[Path]) -> str:
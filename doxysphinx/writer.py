@@ -8,28 +8,80 @@
 #  - Aniket Salve, Robert Bosch GmbH
 # =====================================================================================
 """The writer module contains classes that write the docs-as-code output files."""
+import hashlib
 import html
 import logging
+import os
 import re
+from dataclasses import dataclass, fields
 from itertools import chain
 from pathlib import Path
 from textwrap import dedent
-from typing import Iterator, List, Protocol, Type, Union
+from typing import (
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 from lxml import etree  # nosec: B410, pylint: disable=import-error
 from lxml.etree import _ElementTree  # nosec: B410, pylint: disable=import-error
 
-from doxysphinx.html_parser import HtmlParseResult
+from doxysphinx.html_parser import HtmlParseResult, parse_for_inline_writing
 from doxysphinx.toc import DoxygenTocGenerator, TocGenerator
 from doxysphinx.utils.files import write_file
 
 # pylint: disable=logging-fstring-interpolation
 
+SHARED_FRAGMENT_GLOB = "doxysphinx_chrome_*.inc"
+"""Glob pattern matching the shared html fragments a writer creates next to the rst files."""
+
+
+@dataclass(frozen=True)
+class WriterOptions:
+    """Options that control how a :class:`Writer` renders its output."""
+
+    shared_chrome: bool = False
+    """Whether the doxygen page chrome (header with navigation and footer) should be written to shared
+       fragment files that are referenced by each mixed rst instead of being repeated in every rst.
+    """
+    minify: bool = False
+    """Whether the raw html in mixed rst files should be minified (comments removed and whitespace collapsed).
+    """
+    shared_resources: Tuple[Tuple[str, str], ...] = ()
+    """Resources (filename, url) whose references (stylesheets, scripts and images) should point to shared copies
+       instead (see :meth:`~doxysphinx.resources.ResourceProvider.shared_resources`). Html files without rst are
+       then written inline (like mixed rst files) instead of being included raw, so that they reference them too.
+    """
+
+    def fingerprint(self) -> str:
+        """Get a short, stable fingerprint of all options that differ from the defaults.
+
+        The fingerprint is stored along with the html hash in the generated files, so that changing
+        an option will lead to a re-creation of those files. For default options it is empty.
+
+        :return: a short hex digest or an empty string if all options have their default values.
+        """
+        changed = [f"{f.name}={getattr(self, f.name)}" for f in fields(self) if getattr(self, f.name) != f.default]
+        if not changed:
+            return ""
+        return hashlib.blake2b(";".join(changed).encode("utf-8"), digest_size=4).hexdigest()
+
 
 class Writer(Protocol):
     """Protocol representing a Writer that write docs-as-code files."""
 
-    def __init__(self, source_directory: Path, toc_generator_type: Type[TocGenerator] = DoxygenTocGenerator):
+    def __init__(
+        self,
+        source_directory: Path,
+        toc_generator_type: Type[TocGenerator] = DoxygenTocGenerator,
+        options: Optional[WriterOptions] = None,
+    ):
         """
         Writer constructor protocol.
 
@@ -39,6 +91,7 @@ class Writer(Protocol):
             For this reason the source directory is an input here
         :param toc_generator_type: the type to use for generating the toc (has to adhere
             the :class:`TocGenerator` protocol.
+        :param options: the options that control the rendering (defaults to the default writer options).
         """
 
     def write(self, parse_result: HtmlParseResult, target_file: Path, html_hash: str) -> Path:
@@ -54,6 +107,25 @@ class Writer(Protocol):
         """
         return Path()
 
+    def render(self, parse_result: HtmlParseResult, target_file: Path, html_hash: str) -> Iterable[str]:
+        """
+        Render a parsed html result to lines without writing it.
+
+        :param parse_result: The result of a previous html parser run
+        :param target_file: The target file the content belongs to (it is not written)
+        :param html_hash: The hash of the html file
+        :return: The lines forming the content of the target file
+        """
+        return []
+
+    def additional_documents(self) -> Iterable[Tuple[Path, Iterable[str]]]:
+        """
+        Get the documents that have no html counterpart but are needed additionally (e.g. for the toc structure).
+
+        :return: An iterable of tuples with the target file and the lines forming its content.
+        """
+        return []
+
 
 class RstWriter:
     """Writes sphinx-rst files to disk."""
@@ -66,14 +138,26 @@ class RstWriter:
     # regex for searching inline elements
     _rst_element_regex = re.compile(r"<snippet type=\"(?P<type>.*?)\">((?P<inline_content>.*?)</snippet>)?$")
 
-    def __init__(self, source_directory: Path, toc_generator_type: Type[TocGenerator] = DoxygenTocGenerator):
+    # markers for splitting the doxygen page chrome from the page content
+    _chrome_end_marker = "doxysphinx:chrome-end"
+    _chrome_start_marker = "doxysphinx:chrome-start"
+
+    def __init__(
+        self,
+        source_directory: Path,
+        toc_generator_type: Type[TocGenerator] = DoxygenTocGenerator,
+        options: Optional[WriterOptions] = None,
+    ):
         """
         Create a new rst writer.
 
         :param source_directory: Source directory of html files.
         :param toc_generator_type: The toc generator to use.
+        :param options: The options that control the rendering (defaults to the default writer options).
         """
         self._toc_gen = toc_generator_type(source_directory)
+        self._options = options or WriterOptions()
+        self._shared_resources = dict(self._options.shared_resources)
 
         # cached translation map for safe encoding rst text
         self._rst_safe_encode_map = str.maketrans(
@@ -94,11 +178,40 @@ class RstWriter:
         """
         Write html content to the target_file.
 
+        Note that the html tree of the parse result is released (set to None) as soon as it is serialized,
+        and the content is streamed to a temporary file afterwards. This keeps the peak memory per file low.
+        The temporary file only replaces the target file when rendering succeeded - so a failure never leaves a
+        truncated rst (with a valid html hash) behind that incremental builds would skip.
+
         :param parse_result: The result of the html parsing (=content + metadata)
         :param target_file:  The target docs-as-code (e.g. rst) file
         :return: The path the file was written to.
         """
-        tree = parse_result.tree
+        file_content = self.render(parse_result, target_file, html_hash)
+
+        temp_file = target_file.with_name(f"{target_file.name}.tmp")
+        try:
+            write_file(temp_file, file_content)
+            os.replace(temp_file, target_file)
+        except BaseException:
+            temp_file.unlink(missing_ok=True)
+            raise
+
+        return target_file
+
+    def render(self, parse_result: HtmlParseResult, target_file: Path, html_hash: str) -> Iterator[str]:
+        """
+        Render html content to rst lines without writing them.
+
+        Note that the html tree of the parse result is released (set to None) once the returned iterator has
+        serialized it - the parse result can't be rendered a second time.
+
+        :param parse_result: The result of the html parsing (=content + metadata)
+        :param target_file: The target docs-as-code (e.g. rst) file. It is not written but needed for naming
+            decisions and for the location of shared fragments.
+        :param html_hash: The hash of the html file
+        :return: An iterator of the rst lines.
+        """
         meta_title = parse_result.meta_title
         title = parse_result.project if target_file.stem.lower() == "index" else parse_result.document_title
         html_file = parse_result.html_input_file
@@ -106,25 +219,36 @@ class RstWriter:
         preamble = self._preamble(title, meta_title)
 
         toc = self._toc_gen.generate_toc_for(html_file)
-        content = []
+        content: Iterable[str]
 
-        if tree:
+        if parse_result.tree is None and self._shared_resources:
+            # a raw included html file would still reference the project's own copies of the shared resources - so
+            # it is written inline as well (as mixed rst without any rst blocks)
+            parse_result.tree = parse_for_inline_writing(html_file.read_text(encoding="utf-8"))
+
+        if parse_result.tree is not None:
             # for rst containing htmls we create a mixed (raw html + rst block) rst
             self._logger.debug(f"writing mixed rst for {parse_result.html_input_file}")
-            content.extend(self._mixed_rst(tree))
+            content = self._mixed_rst(*self._serialize(parse_result, target_file.parent))
         else:
             # for normal (non-rst-containing) htmls we create a raw html import rst
             self._logger.debug(f"writing raw placeholder rst for {parse_result.html_input_file}")
-            content.extend(self._raw_placeholder_rst(html_file))
+            content = self._raw_placeholder_rst(html_file)
 
         # get meta directive with hash of HTML file
         meta_directive_for_htm_hash = self._create_meta_directive_for_html_hash(html_hash)
 
-        file_content = chain(meta_directive_for_htm_hash, preamble, toc, self._containerd(content))
+        return chain(meta_directive_for_htm_hash, preamble, toc, self._containerd(content))
+
+    def additional_documents(self) -> Iterable[Tuple[Path, Iterable[str]]]:
+        """
+        Get the documents that are needed in addition to the ones written for the html files.
 
-        write_file(target_file, file_content)
+        These are the documents for the toc structure (see :meth:`TocGenerator.structural_documents`).
 
-        return target_file
+        :return: An iterable of tuples with the target file and the lines forming its content.
+        """
+        return self._toc_gen.structural_documents()
 
     def _preamble(self, title: str, meta_title: str) -> Iterator[str]:
         _safe_title = self._rst_safe_encode(title)
@@ -150,7 +274,7 @@ class RstWriter:
         yield ""
 
     @staticmethod
-    def _containerd(content: List[str]) -> Iterator[str]:
+    def _containerd(content: Iterable[str]) -> Iterator[str]:
         """
         Will create a div around all the content in the final sphinx html output.
 
@@ -158,7 +282,7 @@ class RstWriter:
         """
         yield ".. container:: doxygen-content"
         yield ""
-        yield from ["   " + line for line in content]
+        yield from ("   " + line for line in content)
 
     def _raw_placeholder_rst(self, html_file: Path) -> List[str]:
         """
@@ -170,7 +294,45 @@ class RstWriter:
 
         return content
 
-    def _mixed_rst(self, tree: _ElementTree) -> List[str]:
+    def _serialize(
+        self, parse_result: HtmlParseResult, target_directory: Path
+    ) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Serialize the html tree of a parse result and release the tree afterwards.
+
+        :return: A tuple with the serialized html and the filenames of the shared chrome prefix and suffix
+            fragments (if the chrome is shared - else None).
+        """
+        tree = cast(_ElementTree, parse_result.tree)
+
+        if self._shared_resources:
+            self._reference_shared_resources(tree)
+
+        if self._options.minify:
+            minify_tree(tree)
+
+        chrome_marked = self._options.shared_chrome and self._mark_chrome(tree)
+
+        # get html as string
+        html_string = etree.tostring(tree, encoding="unicode", method="html")
+
+        # the tree isn't needed anymore - release it before the (much smaller) rst content is created
+        parse_result.tree = None
+        del tree
+
+        prefix_file: Optional[str] = None
+        suffix_file: Optional[str] = None
+        if chrome_marked:
+            prefix, html_string, suffix = self._split_chrome(html_string)
+            prefix_file = self._write_shared_fragment(prefix, target_directory)
+            suffix_file = self._write_shared_fragment(suffix, target_directory)
+
+        # join adjacent rst blocks
+        return self._rst_join_regex.sub("", html_string), prefix_file, suffix_file
+
+    def _mixed_rst(
+        self, html_string: str, prefix_file: Optional[str] = None, suffix_file: Optional[str] = None
+    ) -> Iterator[str]:
         """
         Write a "mixed content" rst file.
 
@@ -180,23 +342,74 @@ class RstWriter:
         So the final file will have the original html file content represented as "raw"
         directives but any containing @rst comment will end up rendered "natively".
         """
-        # get html as string
-        html_string = etree.tostring(tree, encoding="unicode", method="html")
+        # iterate over all lines converting html to raw_html directives and
+        # rst blocks to rst (our algorithm is line oriented...)
+        line_iter: Iterator[str] = _iterate_lines(html_string)
+
+        if prefix_file:
+            yield from self._raw_directive(prefix_file)
+            yield ""
+        yield from self._raw_directive()
+        yield from self._iterate_html(line_iter)
+        if suffix_file:
+            yield from self._raw_directive(suffix_file)
+
+    def _reference_shared_resources(self, tree: _ElementTree):
+        """Let the stylesheet, script and image references in the tree point to the shared resources."""
+        for element in tree.iter("link", "script", "img"):
+            attribute = "href" if element.tag == "link" else "src"
+            shared_url = self._shared_resources.get(element.get(attribute, ""))
+            if shared_url:
+                element.set(attribute, shared_url)
+
+    def _mark_chrome(self, tree: _ElementTree) -> bool:
+        """
+        Mark the boundaries of the doxygen page chrome in the tree with comments.
 
-        # join adjacent rst blocks
-        normalized_html_string = self._rst_join_regex.sub("", html_string)
+        The chrome consists of everything up to the end of doxygen's top area (project title, menu, search
+        box, scripts) and everything from the footer onwards. As the page title is the only page specific
+        part in there it is removed (it's meaningless in the sphinx output anyway - sphinx generates its own
+        title). Pages with a custom layout where these elements cannot be found are left untouched.
 
-        # split html one line each (our following algorithm is line oriented...)
-        lines = normalized_html_string.split("\n")
+        :return: True if both boundaries were found and marked, else False.
+        """
+        top = tree.find(".//div[@id='top']")
+        footer = tree.find(".//hr[@class='footer']")
+        if top is None or footer is None:
+            return False
 
-        # iterate over all lines converting html to raw_html directives and
-        # rst blocks to rst
-        line_iter: Iterator[str] = iter(lines)
+        title = tree.find("./head/title")
+        if title is not None:
+            _remove_element_keep_tail(title)
 
-        content: List[str] = self._raw_directive()
-        self._iterate_html(line_iter, content)
+        top.addnext(etree.Comment(self._chrome_end_marker))
+        footer.addprevious(etree.Comment(self._chrome_start_marker))
+        return True
 
-        return content
+    def _split_chrome(self, html_string: str) -> Tuple[str, str, str]:
+        prefix, _, rest = html_string.partition(f"<!--{self._chrome_end_marker}-->")
+        content, _, suffix = rest.partition(f"<!--{self._chrome_start_marker}-->")
+        return prefix, content, suffix
+
+    @staticmethod
+    def _write_shared_fragment(fragment: str, target_directory: Path) -> str:
+        """
+        Write a html fragment to a content addressed file that can be shared between several rst files.
+
+        :param fragment: The html fragment.
+        :param target_directory: The directory where the fragment file should be written to.
+        :return: The filename of the fragment file.
+        """
+        data = fragment.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+        filename = SHARED_FRAGMENT_GLOB.replace("*", digest)
+        file = target_directory / filename
+        if not file.exists():
+            # the fragment may be written concurrently by several workers - so write it atomically
+            temp_file = file.with_name(f"{filename}.{os.getpid()}.tmp")
+            temp_file.write_bytes(data)
+            os.replace(temp_file, file)
+        return filename
 
     @staticmethod
     def _raw_directive(filename: Union[str, None] = None) -> List[str]:
@@ -212,7 +425,7 @@ class RstWriter:
         content.extend([".. raw:: html", f"  :file: {filename}" if filename else ""])
         return content
 
-    def _iterate_html(self, line_iter: Iterator[str], content: List[str]):
+    def _iterate_html(self, line_iter: Iterator[str]) -> Iterator[str]:
         """
         Iterate over html lines.
 
@@ -224,39 +437,33 @@ class RstWriter:
         (because newlines would start a new block and end the raw block) we need to
         buffer the output to be able to write it as one line in one go.
         """
-        buffer = ""  # a buffer for collecting html content
-        while True:
-            try:
-                current = next(line_iter)
-
-                if match := self._rst_element_regex.match(current):
-                    content.append(f"  {buffer}")
-                    buffer = ""
-                    snippet_type = match.group("type")
-                    if snippet_type == "rst:inline":
-                        inline_rst = match.group("inline_content")
-                        self._append_inline_rst_and_prefix(inline_rst, content)
-                        content.extend(self._raw_directive())
-                        # self._iterate_rst(line_iter, content)
-                        # this is done by _iterate_rst isn't it? -> content.extend(self._raw_directive())
-                    else:
-                        self._iterate_rst(line_iter, content)
+        buffer: List[str] = []  # a buffer for collecting html content
+        for current in line_iter:
+            if match := self._rst_element_regex.match(current):
+                last_content_line = f"  {''.join(buffer)}"
+                buffer = []
+                snippet_type = match.group("type")
+                if snippet_type == "rst:inline":
+                    inline_rst = match.group("inline_content")
+                    yield from self._inline_rst_and_prefix(inline_rst, last_content_line)
+                    yield from self._raw_directive()
                 else:
-                    buffer += current
-            except StopIteration:
-                break
-        content.append(f"  {buffer}")
+                    yield last_content_line
+                    yield from self._iterate_rst(line_iter)
+            else:
+                buffer.append(current)
+        yield f"  {''.join(buffer)}"
 
-    def _append_inline_rst_and_prefix(self, inline_content: str, content: List[str]):
+    @staticmethod
+    def _inline_rst_and_prefix(inline_content: str, last_content_line: str) -> Iterator[str]:
         decoded_line = html.unescape(inline_content.strip())
-        last_content_line = content.pop()
         if last_content_line.endswith(" "):
             last_content_line = f"{last_content_line[:-1]}&nbsp;"
         # last_content_line += '<em class="doxysphinx-inline-rst-content-before-marker"> </em>'
-        content.append(last_content_line)
-        content.append("")
-        content.append(f"{decoded_line}")
-        content.append("")
+        yield last_content_line
+        yield ""
+        yield f"{decoded_line}"
+        yield ""
 
     # def _append_inline_rst_and_prefix(self, inline_content: str, content: List[str]):
     #     decoded_line = html.unescape(inline_content.strip())
@@ -270,29 +477,102 @@ class RstWriter:
     #     content.append(f"   {decoded_line}")
     #     content.append("")
 
-    def _iterate_rst(self, line_iter: Iterator[str], content: List[str]):
+    def _iterate_rst(self, line_iter: Iterator[str]) -> Iterator[str]:
         """Iterate over rst lines."""
-        content.append("")
-        buffer = ""  # a buffer for collecting rst content...
+        yield ""
+        buffer: List[str] = []  # a buffer for collecting rst content...
         # note that we need to collect the whole rst snippet as single string with
         # newline characters to apply the dedent function.
-        while True:
-            try:
-                current = next(line_iter)
-                if current.strip().startswith("</snippet>"):
-                    # dedent buffer and convert it to lines
-                    dedented_buffer = dedent(buffer)
-                    buffer_lines = dedented_buffer.split("\n")
-                    decoded_buffer_lines = [html.unescape(line) for line in buffer_lines]
-                    # we need to decode the html or else we cannot use chars like
-                    # "<",">" etc. (e.g. when creating external links in rst)
-                    content.extend(decoded_buffer_lines)
-                    content.extend(self._raw_directive())
-                    break
-                buffer += current + "\n"
-            except StopIteration as exc:
-                raise RuntimeError(
-                    "End of input-file reached during rst processing. This should never "
-                    "happen. Either this tool has a bug or the doxygen input file has a "
-                    "severe problem."
-                ) from exc
+        for current in line_iter:
+            if current.strip().startswith("</snippet>"):
+                # dedent buffer and convert it to lines
+                dedented_buffer = dedent("".join(buffer))
+                buffer_lines = dedented_buffer.split("\n")
+                # we need to decode the html or else we cannot use chars like
+                # "<",">" etc. (e.g. when creating external links in rst)
+                yield from (html.unescape(line) for line in buffer_lines)
+                yield from self._raw_directive()
+                return
+            buffer.append(current + "\n")
+
+        raise RuntimeError(
+            "End of input-file reached during rst processing. This should never "
+            "happen. Either this tool has a bug or the doxygen input file has a "
+            "severe problem."
+        )
+
+
+def _iterate_lines(text: str) -> Iterator[str]:
+    """Iterate over the lines of a text without creating a list of all lines upfront."""
+    start = 0
+    while (end := text.find("\n", start)) != -1:
+        yield text[start:end]
+        start = end + 1
+    yield text[start:]
+
+
+_minify_preserved_tags = {"pre", "script", "style", "textarea", "snippet"}
+_minify_whitespace_regex = re.compile(r"\s+")
+
+
+def _collapse_whitespace(text: Optional[str]) -> Optional[str]:
+    # whitespace runs containing a newline are collapsed to a space and a newline as the writer is line oriented
+    # (snippets have to start on a new line). It joins the html lines without any separator - so the space is
+    # needed to keep words (and inline elements) separated.
+    if not text:
+        return text
+    if text.isspace():  # fast path for the most common case (whitespace between tags)
+        return " \n" if "\n" in text else " "
+    return _minify_whitespace_regex.sub(lambda m: " \n" if "\n" in m.group(0) else " ", text)
+
+
+def _is_minify_preserved(element) -> bool:
+    if element.tag in _minify_preserved_tags:
+        return True
+    # code fragments (also the ones created by the PreToDivProcessor) rely on their whitespace
+    return element.tag == "div" and element.get("class") == "fragment"
+
+
+def minify_tree(tree: _ElementTree) -> None:
+    """
+    Minify a html tree in place.
+
+    Comments (except conditional comments) are removed and whitespace runs in text and tails are collapsed.
+    The content of ``pre``, ``script``, ``style``, ``textarea`` and ``snippet`` elements as well as of doxygen
+    code fragments (``div.fragment``) is left untouched because whitespace is significant there (and so are the
+    tails of snippets).
+
+    :param tree: The html tree to minify.
+    """
+    root = tree.getroot()
+    if root is None:
+        return
+
+    for comment in list(root.iter(etree.Comment)):
+        if not comment.text or not comment.text.startswith("[if"):
+            _remove_element_keep_tail(comment)
+
+    stack = [root]
+    while stack:
+        element = stack.pop()
+        element.text = _collapse_whitespace(element.text)
+        for child in element:
+            # snippets have to end their line (see RstWriter._rst_element_regex) - so their tails are kept as well
+            if child.tag != "snippet":
+                child.tail = _collapse_whitespace(child.tail)
+            if not _is_minify_preserved(child):
+                stack.append(child)
+
+
+def _remove_element_keep_tail(element) -> None:
+    """Remove an element from its parent while keeping its tail text in the tree."""
+    parent = element.getparent()
+    if parent is None:
+        return
+    if element.tail:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + element.tail
+        else:
+            parent.text = (parent.text or "") + element.tail
+    parent.remove(element)
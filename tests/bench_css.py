@@ -0,0 +1,61 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+# Note:
+# =====
+# Compares the css scoping engines (libsass and the native python implementation) on doxygen stylesheets.
+# Usage: python tests/bench_css.py [STYLESHEET...] (defaults to the doxygen.css of the demo documentation - which has
+# to be generated first - and the doxygen-awesome.css of the submodule).
+#
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from doxysphinx.resources import CSS_ENGINES, CssScoper
+from doxysphinx.utils.cache import CACHE_DIR_ENV_VAR
+from doxysphinx.utils.contexts import TimedContext
+
+root = Path(__file__).parent / ".."
+
+RUNS = 10
+
+
+def _measure(stylesheet: Path, engine: str, target_dir: Path):
+    scoper = CssScoper(".doxygen-content", engine)
+    content = stylesheet.read_text(encoding="utf-8")
+    if engine == "sass":
+        content = content.replace("invert()", '#{"invert()"}')
+    source = target_dir / stylesheet.name
+    source.write_text(content, encoding="utf-8")
+
+    target = target_dir / f"{engine}.css"
+    with TimedContext() as tc:
+        for run in range(RUNS):
+            # a fresh user cache for each run - otherwise sass would compile only once
+            os.environ[CACHE_DIR_ENV_VAR] = str(target_dir / "cache" / f"{engine}-{run}")
+            target.unlink(missing_ok=True)
+            scoper.scope(source, target)
+    print(f"{stylesheet.name} ({len(content)} chars) {engine}: {tc.elapsed() / RUNS} per stylesheet")
+
+
+if __name__ == "__main__":
+    stylesheets = [Path(a) for a in sys.argv[1:]] or [
+        root / "docs" / "doxygen" / "demo" / "html" / "doxygen.css",
+        root / "external" / "doxygen-awesome-css" / "doxygen-awesome.css",
+    ]
+
+    print("\n===========")
+    print("CSS REPORT:")
+    print("===========\n")
+    for stylesheet in (s for s in stylesheets if s.exists()):
+        for engine in CSS_ENGINES:
+            with tempfile.TemporaryDirectory() as tmp:
+                _measure(stylesheet, engine, Path(tmp))
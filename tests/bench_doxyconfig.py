@@ -0,0 +1,96 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+# Note:
+# =====
+# Compares the doxyfile parser with the former pyparsing based implementation (included below as reference) on the
+# default and a custom config (like read_doxyconfig parses them) and checks that both yield the same configuration.
+# Usage: python tests/bench_doxyconfig.py [DOXYFILE] (defaults to the doxyfile of the doxygen test files).
+#
+
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+from doxysphinx.doxygen import ConfigDict, _parse_stdout
+from doxysphinx.utils.contexts import TimedContext
+
+root = Path(__file__).parent
+
+RUNS = 20
+
+
+def _parse_stdout_with_pyparsing(text: str) -> ConfigDict:
+    from pyparsing import (
+        FollowedBy,
+        Group,
+        LineEnd,
+        Literal,
+        ParserElement,
+        QuotedString,
+        Suppress,
+        White,
+        Word,
+        delimited_list,
+        printables,
+        srange,
+    )
+
+    lines: List[str] = text.split(os.linesep)
+    pure_text = os.linesep.join([line for line in lines if not line.strip().startswith("#")])
+
+    ParserElement.set_default_whitespace_chars(" \t")
+    line_end = White("\r\n") | LineEnd()
+
+    doxy_flag = Word(srange("[A-Z_]")) + FollowedBy("=")
+    list_items = delimited_list(
+        QuotedString('"') | QuotedString("'") | Word(printables), Group(Literal("\\") + line_end)
+    )
+    config_pair = doxy_flag + Suppress("=") + list_items
+    config = config_pair.search_string(pure_text).asList()
+
+    for i in range(len(config)):
+        if len(config[i]) > 2:
+            config[i] = [config[i][0], config[i][1:]]
+
+    return {item[0]: item[1] for item in config}
+
+
+def _measure(name: str, parse, text: str) -> ConfigDict:
+    with TimedContext() as tc:
+        for _ in range(RUNS):
+            config = parse(text)
+    print(f"{name}: {tc.elapsed() / RUNS} per config ({len(config)} tags)")
+    return config
+
+
+if __name__ == "__main__":
+    doxyfile = (
+        Path(sys.argv[1])
+        if len(sys.argv) > 1
+        else root / "doxygen" / "doxygen_testfiles" / "unix_line_endings.doxyfile"
+    )
+    content = doxyfile.read_text(encoding="utf-8")
+    # read_doxyconfig parses the default config followed by the custom config
+    text = content + content
+
+    print("\n==================")
+    print("DOXYCONFIG REPORT:")
+    print("==================\n")
+    with TimedContext() as tc:
+        import pyparsing  # noqa: F401
+    print(f"pyparsing import: {tc.elapsed()}")
+    reference = _measure("pyparsing", _parse_stdout_with_pyparsing, text)
+    config = _measure("tokenizer", _parse_stdout, text)
+
+    # the former implementation didn't support digits in tags (e.g. SORT_MEMBERS_CTORS_1ST was parsed as ST)
+    differences = {k for k in set(reference) ^ set(config) if not any(c.isdigit() for c in k) and k != "ST"}
+    differences.update(k for k in set(reference) & set(config) if reference[k] != config[k])
+    print(f"differences: {sorted(differences) or 'none'}")
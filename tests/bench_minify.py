@@ -0,0 +1,63 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+# Note:
+# =====
+# Measures the raw html size reduction of the writer's minification stage and its cost relative to parsing.
+# Usage: python tests/bench_minify.py [DOXYGEN_HTML_DIR] (defaults to the demo documentation which has to be
+# generated first).
+#
+
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+from lxml import etree
+
+from doxysphinx.html_parser import DoxygenHtmlParser
+from doxysphinx.utils.contexts import TimedContext
+from doxysphinx.writer import minify_tree
+
+root = Path(__file__).parent / ".."
+
+
+def _serialized_size(tree) -> int:
+    return len(etree.tostring(tree, encoding="unicode", method="html").encode("utf-8"))
+
+
+if __name__ == "__main__":
+    html_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else root / "docs" / "doxygen" / "demo" / "html"
+    parser = DoxygenHtmlParser(html_dir)
+
+    parse_time = timedelta()
+    minify_time = timedelta()
+    size_before = 0
+    size_after = 0
+    files = [f for f in html_dir.glob("*.html") if f.name != "doxygen_crawl.html"]
+
+    for html_file in files:
+        with TimedContext() as tc:
+            result = parser.parse(html_file)
+        parse_time += tc.elapsed()
+
+        # the parser only keeps trees with rst content - measure all pages to get a meaningful sample
+        tree = result.tree or etree.parse(str(html_file), etree.HTMLParser())
+        size_before += _serialized_size(tree)
+        with TimedContext() as tc:
+            minify_tree(tree)
+        minify_time += tc.elapsed()
+        size_after += _serialized_size(tree)
+
+    print("\n==============")
+    print("MINIFY REPORT:")
+    print("==============\n")
+
+    print(f"files: {len(files)}")
+    print(f"size: {size_before} -> {size_after} bytes ({100 - size_after * 100 / max(size_before, 1):.1f}% smaller)")
+    print(f"parse: {parse_time} - minify: {minify_time} ({minify_time / max(parse_time, timedelta.resolution):.1%})")
@@ -0,0 +1,87 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+# Note:
+# =====
+# Measures the toc precomputation (menu tree building and indexing) and what a worker process has to receive for
+# the toc generation: the precomputed toc index compared to the menu tree (which was shared with the workers before).
+# Usage: python tests/bench_toc.py [ENTRIES] (creates a synthetic menudata.js with the given number of entries).
+#
+
+import json
+import pickle  # nosec: B403
+import shutil
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from doxysphinx.doxygen import read_js_data_file
+from doxysphinx.toc import DoxygenTocGenerator, _MenuEntry
+from doxysphinx.utils.contexts import TimedContext
+
+root = Path(__file__).parent
+
+
+def _write_menudata(target_dir: Path, entries: int):
+    groups = max(entries // 100, 1)
+    children = [
+        {
+            "text": f"Group {g}",
+            "url": f"group_{g}.html",
+            "children": [{"text": f"Entry {g}.{i}", "url": f"entry_{g}_{i}.html"} for i in range(entries // groups)],
+        }
+        for g in range(groups)
+    ]
+    menu = {"children": [{"text": "Main Page", "url": "index.html"}, *children]}
+    (target_dir / "menudata.js").write_text(f"var menudata={json.dumps(menu)}", encoding="utf-8")
+
+
+def _measure_menu_tree(menudata_js: Path):
+    json_nodes = read_js_data_file(menudata_js)["children"]
+    with TimedContext() as tc:
+        [_MenuEntry.from_json_node(n) for n in json_nodes]
+    build_time = tc.elapsed()
+
+    tracemalloc.start()
+    menu = [_MenuEntry.from_json_node(n) for n in json_nodes]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"menu tree: {len(menu)} top level entries, build: {build_time}, memory: {size / 1024 / 1024:.1f} MB")
+
+
+def _measure_pickle(name: str, obj: object):
+    with TimedContext() as tc:
+        data = pickle.dumps(obj)
+    dump_time = tc.elapsed()
+    with TimedContext() as tc:
+        pickle.loads(data)  # nosec: B301
+    load_time = tc.elapsed()
+    print(f"{name}: {len(data)} bytes, pickle: {dump_time}, unpickle: {load_time}")
+
+
+if __name__ == "__main__":
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    with tempfile.TemporaryDirectory() as tmp:
+        html_dir = Path(tmp)
+        _write_menudata(html_dir, entries)
+        shutil.copy(root / "toc" / "index.html", html_dir)
+
+        with TimedContext() as tc:
+            generator = DoxygenTocGenerator(html_dir)
+        precompute_time = tc.elapsed()
+        menu = generator._load_menu_tree(html_dir / "menudata.js")
+
+        print("\n===========")
+        print("TOC REPORT:")
+        print("===========\n")
+        print(f"entries: {entries}, precompute: {precompute_time}")
+        _measure_menu_tree(html_dir / "menudata.js")
+        _measure_pickle("menu tree (before)", menu)
+        _measure_pickle("toc index (after)", generator)
@@ -12,12 +12,20 @@ from subprocess import run
 
 import pytest
 
+from doxysphinx.utils.cache import CACHE_DIR_ENV_VAR
+
 
 @pytest.fixture(scope="session", autouse=True)
 def run_doxygen_fixture():
     run_doxygen()
 
 
+@pytest.fixture(autouse=True)
+def user_cache_dir_fixture(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch):
+    """Use an empty user cache directory for each test (instead of the real one of the user)."""
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path_factory.mktemp("user_cache")))
+
+
 def run_doxygen():
     """Run doxygen before executing any test.
 
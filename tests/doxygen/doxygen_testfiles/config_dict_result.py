@@ -74,7 +74,7 @@ config_dict = {
     "INLINE_INFO": "YES",
     "SORT_MEMBER_DOCS": "YES",
     "SORT_BRIEF_DOCS": "NO",
-    "ST": "NO",
+    "SORT_MEMBERS_CTORS_1ST": "NO",
     "SORT_GROUP_NAMES": "NO",
     "SORT_BY_SCOPE_NAME": "NO",
     "STRICT_PROTO_MATCHING": "NO",
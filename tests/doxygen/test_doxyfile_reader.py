@@ -7,12 +7,20 @@
 #  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
 # =====================================================================================
 
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import doxygen_testfiles.config_dict_result
 import pytest
 
-from doxysphinx.doxygen import ConfigDict, _parse_stdout
+from doxysphinx.doxygen import (
+    ConfigDict,
+    _parse_stdout,
+    read_doxyconfig,
+    read_doxyconfigs,
+)
+from doxysphinx.utils.cache import CACHE_DIR_ENV_VAR
 
 
 @pytest.mark.parametrize(
@@ -40,6 +48,26 @@ def test_doxyfile_reader_parsing_paths(input_line: str, expected: ConfigDict):
     assert _parse_stdout(input_line) == expected
 
 
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("FILE_PATTERNS = *.c *.h\n", {"FILE_PATTERNS": ["*.c", "*.h"]}),
+        (
+            'ALIASES = "rst=\\verbatim x" \\\n  endrst=\\endverbatim\n',
+            {"ALIASES": ["rst=\\verbatim x", "endrst=\\endverbatim"]},
+        ),
+        ("INPUT = a \\\n\nRECURSIVE = YES\n", {"INPUT": "a", "RECURSIVE": "YES"}),
+        ("INPUT = a\nINPUT += b c\nEXCLUDE += d\n", {"INPUT": ["a", "b", "c"], "EXCLUDE": "d"}),
+        ("INPUT = a\nINPUT = b\n", {"INPUT": "b"}),
+        ('PROJECT_NAME = "say \\"hi\\"" # comment\n', {"PROJECT_NAME": 'say "hi"'}),
+        ('# INPUT = a\nPREDEFINED =\nPROJECT_BRIEF = ""\n', {"PROJECT_BRIEF": ""}),
+        ("SORT_MEMBERS_CTORS_1ST = NO\r\n", {"SORT_MEMBERS_CTORS_1ST": "NO"}),
+    ],
+)
+def test_doxyfile_reader_parses_the_doxyfile_format(text: str, expected: ConfigDict):
+    assert _parse_stdout(text) == expected
+
+
 @pytest.mark.parametrize(
     "load_input",
     [
@@ -61,3 +89,79 @@ def load_input(request):
 @pytest.fixture
 def expected_config():
     return doxygen_testfiles.config_dict_result.config_dict
+
+
+FAKE_DOXYGEN = """#!/bin/sh
+echo "$@" >> "{calls}"
+case "$1" in
+  --version) echo "1.9.8" ;;
+  -s) echo "GENERATE_HTML = YES" ;;
+  -x) echo "PROJECT_NAME = $(grep -h PROJECT_NAME "$2" {include} | tail -n1 | cut -d= -f2)" ;;
+esac
+"""
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the fake doxygen is a shell script")
+def test_read_doxyconfig_caches_the_configuration(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path / "cache"))
+    calls, include = tmp_path / "calls.txt", tmp_path / "common.doxyfile"
+    doxygen = tmp_path / "doxygen"
+    doxygen.write_text(FAKE_DOXYGEN.format(calls=calls, include=include))
+    doxygen.chmod(0o755)
+    doxyfile = tmp_path / "doxyfile"
+    doxyfile.write_text("@INCLUDE = common.doxyfile\n")
+    include.write_text("PROJECT_NAME = first\n")
+
+    def doxygen_runs() -> int:
+        return len([c for c in calls.read_text().splitlines() if c != "--version"])
+
+    config = read_doxyconfig(doxyfile, str(doxygen), tmp_path)
+    assert config["PROJECT_NAME"] == "first" and config["GENERATE_HTML"] == "YES"
+    assert read_doxyconfig(doxyfile, str(doxygen), tmp_path) == config
+    assert doxygen_runs() == 2
+    assert calls.read_text().splitlines().count("--version") == 1
+
+    # a changed include leads to a new doxygen run (the default config is only fetched once per executable)
+    include.write_text("PROJECT_NAME = second\n")
+    assert read_doxyconfig(doxyfile, str(doxygen), tmp_path)["PROJECT_NAME"] == "second"
+    assert doxygen_runs() == 3
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the fake doxygen is a shell script")
+def test_read_doxyconfigs_fetches_the_default_config_once(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path / "cache"))
+    calls, include = tmp_path / "calls.txt", tmp_path / "none.doxyfile"
+    doxygen = tmp_path / "doxygen"
+    doxygen.write_text(FAKE_DOXYGEN.format(calls=calls, include=include))
+    doxygen.chmod(0o755)
+    doxyfiles = [tmp_path / f"doxyfile_{i}" for i in range(4)]
+    for i, doxyfile in enumerate(doxyfiles):
+        doxyfile.write_text(f"PROJECT_NAME = project_{i}\n")
+
+    configs = read_doxyconfigs(doxyfiles, str(doxygen), tmp_path)
+
+    assert [c["PROJECT_NAME"] for c in configs] == [f"project_{i}" for i in range(4)]
+    assert all(c["GENERATE_HTML"] == "YES" for c in configs)
+    runs = calls.read_text().splitlines()
+    assert len([r for r in runs if r.startswith("-s")]) == 1
+    assert len([r for r in runs if r.startswith("-x")]) == 4
+
+
+@pytest.mark.parametrize("workers, expected", [(2, [2]), (None, [3]), (1, [])])
+def test_read_doxyconfigs_limits_the_workers(workers, expected, monkeypatch):
+    pool_sizes = []
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def __init__(self, max_workers):
+            pool_sizes.append(max_workers)
+            super().__init__(max_workers)
+
+    monkeypatch.setattr("doxysphinx.doxygen.ThreadPoolExecutor", RecordingExecutor)
+    monkeypatch.setattr("doxysphinx.doxygen.read_doxyconfig", lambda doxyfile, *_: {"PROJECT_NAME": doxyfile.name})
+    monkeypatch.setattr("os.cpu_count", lambda: 3)
+    doxyfiles = [Path(f"doxyfile_{i}") for i in range(5)]
+
+    configs = read_doxyconfigs(doxyfiles, "doxygen", Path.cwd(), workers)
+
+    assert [c["PROJECT_NAME"] for c in configs] == [d.name for d in doxyfiles]
+    assert pool_sizes == expected
@@ -0,0 +1,90 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from doxysphinx.doxygen import ConfigDict, DoxygenRunner
+from doxysphinx.utils.cache import CACHE_DIR_ENV_VAR
+from doxysphinx.utils.exceptions import ApplicationError
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="the fake doxygen is a shell script")
+
+FAKE_DOXYGEN = """#!/bin/sh
+if [ "$1" = "--version" ]; then echo "1.9.8"; exit 0; fi
+echo "$1" >> "{calls}"
+grep -q FAIL "$1" && exit 3
+exit 0
+"""
+
+
+@pytest.fixture
+def doxygen(tmp_path: Path, monkeypatch) -> Path:
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path / "cache"))
+    doxygen = tmp_path / "doxygen"
+    doxygen.write_text(FAKE_DOXYGEN.format(calls=tmp_path / "calls.txt"))
+    doxygen.chmod(0o755)
+    return doxygen
+
+
+def _project(tmp_path: Path, name: str, config: ConfigDict):
+    doxyfile = tmp_path / f"{name}.doxyfile"
+    doxyfile.write_text(name)
+    return doxyfile, config, tmp_path / name / "html"
+
+
+def _calls(tmp_path: Path) -> List[str]:
+    calls = tmp_path / "calls.txt"
+    return [Path(c).name for c in calls.read_text().splitlines()] if calls.exists() else []
+
+
+def test_doxygen_runs_only_if_the_inputs_of_a_project_changed(tmp_path: Path, doxygen: Path):
+    for file in ["src/car.h", "src/car.cpp", "src/engine/engine.h", "src/ignored/ignored.h", "README.txt"]:
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text(file)
+    config: ConfigDict = {"INPUT": "src", "FILE_PATTERNS": "*.h", "RECURSIVE": "YES", "EXCLUDE": "src/ignored"}
+    project = _project(tmp_path, "demo", config)
+    runner = DoxygenRunner(str(doxygen), tmp_path)
+
+    assert runner.run([project]) == [project[0]]
+    assert runner.run([project]) == []
+
+    # files that aren't inputs or whose content didn't change don't matter
+    for file in ["src/car.cpp", "src/ignored/ignored.h", "README.txt"]:
+        (tmp_path / file).write_text("changed")
+    os.utime(tmp_path / "src/car.h", ns=(0, 0))
+    assert runner.run([project]) == []
+
+    (tmp_path / "src/engine/engine.h").write_text("changed")
+    assert runner.run([project]) == [project[0]]
+    (tmp_path / "src/engine/turbo.h").write_text("new")
+    assert runner.run([project]) == [project[0]]
+    assert runner.run([(project[0], {**config, "RECURSIVE": "NO"}, project[2])]) == [project[0]]
+    assert _calls(tmp_path) == ["demo.doxyfile"] * 4
+
+
+def test_doxygen_runs_the_projects_in_parallel(tmp_path: Path, doxygen: Path):
+    projects = [_project(tmp_path, f"project_{i}", {"INPUT": f"project_{i}.doxyfile"}) for i in range(3)]
+
+    assert DoxygenRunner(str(doxygen), tmp_path, workers=3).run(projects) == [p[0] for p in projects]
+    assert sorted(_calls(tmp_path)) == [p[0].name for p in projects]
+
+
+def test_doxygen_failures_are_reported_and_rerun(tmp_path: Path, doxygen: Path):
+    project = _project(tmp_path, "FAIL", {"INPUT": "FAIL.doxyfile"})
+    runner = DoxygenRunner(str(doxygen), tmp_path)
+
+    for _ in range(2):
+        with pytest.raises(ApplicationError, match="exit code 3"):
+            runner.run([project])
+    assert _calls(tmp_path) == ["FAIL.doxyfile"] * 2
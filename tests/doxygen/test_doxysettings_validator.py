@@ -120,3 +120,19 @@ def test_doxyoutput_path_validation(path_validator, doxygen_html_output: Path, v
 def path_validator():
     path_validator = Path_Validator()
     return path_validator
+
+
+@pytest.mark.parametrize(
+    "generate_treeview, expected_validation_errors",
+    [
+        (False, ["Error: Wrong value YES for GENERATE_TREEVIEW, NO is required."]),
+        (True, []),
+    ],
+)
+def test_doxysettings_validation_with_treeview(
+    working_directory, generate_treeview: bool, expected_validation_errors: List[str]
+):
+    validator = Validator(generate_treeview)
+    validator.validation_errors.clear()
+    validator.validate(update_dict({"GENERATE_TREEVIEW": "YES"}), working_directory, working_directory)
+    assert validator.validation_errors == expected_validation_errors
@@ -7,11 +7,12 @@
 #  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
 # =====================================================================================
 
+import os
 from pathlib import Path
 
 import pytest
 
-from doxysphinx.doxygen import read_js_data_file
+from doxysphinx.doxygen import read_js_data_file, read_js_data_vars
 
 
 @pytest.fixture()
@@ -22,3 +23,31 @@ def doc_root() -> Path:
 def test_read_js_data_file(doc_root):
     file = doc_root / "menudata.js"
     read_js_data_file(file)
+
+
+def test_read_js_data_file_strips_the_prologue_by_position(tmp_path: Path):
+    file = tmp_path / "menudata.js"
+    file.write_text('/*\n @licstart var x = "license"\n*/\nvar menudata={children:[\n{text:"a=b",url:"a.html"}]}\n')
+
+    assert read_js_data_file(file) == {"children": [{"text": "a=b", "url": "a.html"}]}
+
+
+def test_read_js_data_vars_parses_json_and_json5_values(tmp_path: Path):
+    file = tmp_path / "navtreedata.js"
+    file.write_text(
+        'var NAVTREE =\n[\n  [ "Demo", "index.html", null ],\n];\n\nvar SYNCONMSG = \'click to disable\';\n'
+    )
+
+    assert read_js_data_vars(file) == {"NAVTREE": [["Demo", "index.html", None]], "SYNCONMSG": "click to disable"}
+
+
+def test_read_js_data_vars_caches_the_data_until_the_file_changes(tmp_path: Path):
+    file = tmp_path / "navtreeindex0.js"
+    file.write_text('var NAVTREEINDEX0 =\n{\n"index.html":[0]\n};\n')
+
+    first = read_js_data_vars(file)
+    assert read_js_data_vars(file) is first
+
+    file.write_text('var NAVTREEINDEX0 =\n{\n"index.html":[0],\n"classes.html":[1]\n};\n')
+    os.utime(file, ns=(file.stat().st_atime_ns, file.stat().st_mtime_ns + 1))
+    assert read_js_data_vars(file) == {"NAVTREEINDEX0": {"index.html": [0], "classes.html": [1]}}
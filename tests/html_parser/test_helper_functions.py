@@ -9,6 +9,8 @@ from doxysphinx.html_parser import (
     _ensure_newline_before_element,
     _remove_doxygen_comment_prefixes,
     _try_parse_rst_block_content,
+    collect_references,
+    resolve_reference,
 )
 
 single_element_in_parent = """
@@ -250,3 +252,35 @@ def test_ensure_newline_after_element(html_string: str):
 )
 def test_try_parse_rst_block_content(input, expected):
     assert _try_parse_rst_block_content(input) == expected
+
+
+def test_collect_references_finds_local_resources():
+    html = """<link href="tabs.css" rel="stylesheet" type="text/css"/>
+<script type="text/javascript" src="search/search.js?v=1"></script>
+<img src="classcar__coll__graph.png" border="0" usemap="#a" alt=""/>
+<object data='dir_a.svg' type="image/svg+xml"></object>
+<a href="https://www.doxygen.org/index.html"><img class="footer" src="doxygen.svg" alt="doxygen"/></a>
+<a href="#details">More...</a><a href="../outside.png">outside</a><img alt="no source"/>"""
+
+    assert collect_references(html) == {
+        "tabs.css",
+        "search/search.js",
+        "classcar__coll__graph.png",
+        "dir_a.svg",
+        "doxygen.svg",
+    }
+
+
+@pytest.mark.parametrize(
+    "url, base, expected",
+    [
+        ("open.png", "", "open.png"),
+        ("../mag.svg#icon", "search", "mag.svg"),
+        ("./img/a.png?x", "", "img/a.png"),
+        ("../a.png", "", None),
+        ("data:image/png;base64,AAA", "", None),
+        ("/abs.png", "", None),
+    ],
+)
+def test_resolve_reference(url: str, base: str, expected):
+    assert resolve_reference(url, base) == expected
@@ -0,0 +1,297 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+import gzip
+import shutil
+from pathlib import Path
+
+import pytest
+
+from doxysphinx import resources
+from doxysphinx.process import (
+    Builder,
+    Cleaner,
+    cleanup_additional_documents,
+    write_additional_documents,
+)
+from doxysphinx.resources import SHARED_RESOURCES_DIR, ProvisioningOptions
+from doxysphinx.utils import files
+from doxysphinx.writer import SHARED_FRAGMENT_GLOB, WriterOptions
+
+PAGE = """<html>
+<head><title>Graphviz: {title}</title><script type="text/javascript" src="jquery.js"></script></head>
+<body>
+<div class="contents">
+<div class="fragment"><div class="line">{{rst}}</div><div class="line">{title} *rst* content</div></div>
+<p>{title} html content</p>
+</div>
+</body>
+</html>
+"""
+
+
+@pytest.fixture
+def sphinx_source(tmp_path: Path) -> Path:
+    html_dir = tmp_path / "doxygen" / "html"
+    html_dir.mkdir(parents=True)
+    toc_test_dir = Path(__file__).parent / ".." / "toc"
+    shutil.copy(toc_test_dir / "menudata.js", html_dir)
+    shutil.copy(toc_test_dir / "index.html", html_dir)
+    (html_dir / "classcar.html").write_text(PAGE.format(title="Car"), encoding="utf-8")
+    (html_dir / "doxygen_crawl.html").write_text(PAGE.format(title="Crawl"), encoding="utf-8")
+    return tmp_path
+
+
+def test_render_returns_documents_without_writing_rsts(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+    builder = Builder(sphinx_source, sphinx_source / ".build" / "html", parallel=False)
+
+    documents = {d.docname: d for d in builder.render(html_dir)}
+
+    assert not list(html_dir.glob("*.rst"))
+    assert "doxygen/html/doxygen_crawl" not in documents
+
+    car = documents["doxygen/html/classcar"]
+    assert car.html_file == html_dir / "classcar.html"
+    assert car.content.startswith(f".. meta::{car.html_hash}\n")
+    assert "Car *rst* content" in car.content
+
+    index = documents["doxygen/html/index"]
+    assert ":file: index.html" in index.content
+    assert ".. toctree::" in index.content
+
+    structural_documents = [d for d in documents.values() if d.html_file is None]
+    assert structural_documents
+    assert all(".. toctree::" in d.content for d in structural_documents)
+
+
+def test_additional_documents_are_only_written_when_changed(tmp_path: Path):
+    first, second = tmp_path / "first.rst", tmp_path / "second.rst"
+
+    written, removed = write_additional_documents(tmp_path, [(first, ["first"]), (second, ["second"])])
+    assert written == [first, second]
+    assert not removed
+    first_mtime = first.stat().st_mtime_ns
+
+    written, removed = write_additional_documents(tmp_path, [(first, ["first"])])
+    assert not written
+    assert removed == [second]
+    assert not second.exists()
+    assert first.stat().st_mtime_ns == first_mtime
+
+    assert cleanup_additional_documents(tmp_path) == [first]
+    assert not list(tmp_path.iterdir())
+
+
+def test_build_prunes_shared_fragments_that_are_no_longer_referenced(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+    car = html_dir / "classcar.html"
+    page = (
+        PAGE.format(title="Car")
+        .replace("<body>", '<body><div id="top">Demo</div>')
+        .replace("</body>", '<hr class="footer"/><address>Generated on {date}</address></body>')
+    )
+    car.write_text(page.replace("{date}", "Mon"), encoding="utf-8")
+    options = WriterOptions(shared_chrome=True)
+    builder = Builder(sphinx_source, sphinx_source / ".build" / "html", parallel=False, writer_options=options)
+
+    builder.build(html_dir)
+    fragments = sorted(html_dir.glob(SHARED_FRAGMENT_GLOB))
+    assert fragments
+
+    car.write_text(page.replace("{date}", "Tue"), encoding="utf-8")
+    builder.build(html_dir)
+
+    current_fragments = sorted(html_dir.glob(SHARED_FRAGMENT_GLOB))
+    assert len(current_fragments) == len(fragments)
+    assert current_fragments != fragments
+    rst = (html_dir / "classcar.rst").read_text(encoding="utf-8")
+    assert all(f":file: {f.name}" in rst for f in current_fragments)
+
+
+def test_shared_resources_are_stored_once_for_all_projects(sphinx_source: Path):
+    html_dirs = [sphinx_source / "doxygen" / "html", sphinx_source / "doxygen2" / "html"]
+    shutil.copytree(html_dirs[0], html_dirs[1])
+    for html_dir in html_dirs:
+        (html_dir / "jquery.js").write_text("var jquery", encoding="utf-8")
+        (html_dir / "tab_a.png").write_bytes(b"png")
+        (html_dir / "tabs.css").write_text(".tabs { background-image: url('tab_a.png'); }", encoding="utf-8")
+    sphinx_output = sphinx_source / ".build" / "html"
+    options = ProvisioningOptions(shared_resources_dir=sphinx_output / SHARED_RESOURCES_DIR)
+    builder = Builder(sphinx_source, sphinx_output, parallel=False, provisioning_options=options)
+
+    for html_dir in html_dirs:
+        builder.build(html_dir)
+
+    stored = {f.name.split(".")[0]: f for f in (sphinx_output / SHARED_RESOURCES_DIR).glob("[!.]*")}
+    assert sorted(stored) == ["jquery", "tab_a", "tabs"]
+    assert stored["tab_a"].name in stored["tabs"].read_text(encoding="utf-8")
+    for html_dir in html_dirs:
+        assert (sphinx_output / html_dir.relative_to(sphinx_source) / "jquery.js").samefile(stored["jquery"])
+        rst = (html_dir / "classcar.rst").read_text(encoding="utf-8")
+        assert f'src="../../{SHARED_RESOURCES_DIR}/{stored["jquery"].name}"' in rst
+
+
+def _unsupported_hardlink(source: Path, target: Path):
+    raise OSError("hardlinks aren't supported")
+
+
+def test_shared_resources_are_referenced_by_raw_pages_and_pruned(sphinx_source: Path, monkeypatch: pytest.MonkeyPatch):
+    html_dir = sphinx_source / "doxygen" / "html"
+    (html_dir / "plain.html").write_text(PAGE.format(title="Plain").replace("{rst}", ""), encoding="utf-8")
+    jquery = html_dir / "jquery.js"
+    jquery.write_text("var jquery", encoding="utf-8")
+    sphinx_output = sphinx_source / ".build" / "html"
+    store_dir = sphinx_output / SHARED_RESOURCES_DIR
+    options = ProvisioningOptions(shared_resources_dir=store_dir)
+    builder = Builder(sphinx_source, sphinx_output, parallel=False, provisioning_options=options)
+
+    # the fallback copies (if hardlinks aren't supported) are only provided again if their content changes
+    monkeypatch.setitem(files._provide_functions, "hardlink", _unsupported_hardlink)
+    builder.build(html_dir)
+    stored_jquery = next(store_dir.glob("jquery.*.js"))
+    rst = (html_dir / "plain.rst").read_text(encoding="utf-8")
+    assert ":file:" not in rst
+    assert f'src="../../{SHARED_RESOURCES_DIR}/{stored_jquery.name}"' in rst
+
+    provided = []
+    monkeypatch.setattr(resources, "provide_file", lambda source, target, *_: provided.append(target))
+    builder.build(html_dir)
+    assert provided == []
+
+    # resources no project uses anymore are removed from the store
+    jquery.write_text("var new_jquery", encoding="utf-8")
+    builder.build(html_dir)
+    assert [f.name for f in store_dir.glob("jquery.*.js")] != [stored_jquery.name]
+    assert not stored_jquery.exists()
+
+    Cleaner(sphinx_source, sphinx_output, parallel=False).cleanup(html_dir)
+    assert not list(store_dir.glob("[!.]*"))
+
+
+def test_cleaner_deletes_the_provisioned_resources_even_if_their_source_vanished(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+    (html_dir / "search").mkdir()
+    for name in ["jquery.js", "vanished.png", "search/search.js"]:
+        (html_dir / name).write_text(name, encoding="utf-8")
+    sphinx_output = sphinx_source / ".build" / "html"
+    Builder(sphinx_source, sphinx_output, parallel=False).build(html_dir)
+    target = sphinx_output / "doxygen" / "html"
+    assert (target / "vanished.png").exists()
+
+    (html_dir / "vanished.png").unlink()
+    Cleaner(sphinx_source, sphinx_output, parallel=False).cleanup(html_dir)
+
+    assert not [f for f in target.rglob("*") if f.is_file()]
+    assert not list(html_dir.glob("*.rst"))
+
+
+def test_build_keeps_its_bookkeeping_out_of_the_sphinx_output(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+    (html_dir / "jquery.js").write_text("var jquery;\n" * 100, encoding="utf-8")
+    sphinx_output = sphinx_source / ".build" / "html"
+    options = ProvisioningOptions(referenced_only=True, precompress=True)
+    builder = Builder(sphinx_source, sphinx_output, parallel=False, provisioning_options=options)
+
+    builder.build(html_dir)
+    target = sphinx_output / "doxygen" / "html"
+    assert (target / "jquery.js").exists()
+    assert not list(sphinx_output.rglob(".doxysphinx_*"))
+    assert list(html_dir.glob(".doxysphinx_*"))
+
+    # the resources are provided again when the sphinx output was cleaned
+    shutil.rmtree(sphinx_output)
+    builder.build(html_dir)
+    assert (target / "jquery.js").exists()
+    assert (target / "jquery.js.gz").exists()
+
+
+def test_build_provides_search_resources_only_if_the_search_engine_is_enabled(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+    (html_dir / "search").mkdir()
+    for name in ["search/search.js", "classcar__coll__graph.svg", "classcar__coll__graph.md5"]:
+        (html_dir / name).write_text(name, encoding="utf-8")
+    sphinx_output = sphinx_source / ".build" / "html"
+    target = sphinx_output / "doxygen" / "html"
+    builder = Builder(sphinx_source, sphinx_output, parallel=False)
+
+    builder.build(html_dir, {"SEARCHENGINE": "YES"})
+    assert (target / "search" / "search.js").exists()
+    assert (target / "classcar__coll__graph.svg").exists()
+    assert not (target / "classcar__coll__graph.md5").exists()
+
+    # resources that aren't needed anymore are removed
+    builder.build(html_dir, {"SEARCHENGINE": "NO"})
+    assert not (target / "search" / "search.js").exists()
+    assert (target / "classcar__coll__graph.svg").exists()
+
+
+def test_build_provides_only_referenced_images_if_requested(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+    page = PAGE.format(title="Car").replace("<p>", '<p><img src="classcar__coll__graph.svg" alt=""/>')
+    (html_dir / "classcar.html").write_text(page, encoding="utf-8")
+    (html_dir / "dynsections.js").write_text("$(this).attr('src','open.png');", encoding="utf-8")
+    for name in ["classcar__coll__graph.svg", "orphan__graph.svg", "open.png", "closed.png"]:
+        (html_dir / name).write_text(name, encoding="utf-8")
+    sphinx_output = sphinx_source / ".build" / "html"
+    target = sphinx_output / "doxygen" / "html"
+    options = ProvisioningOptions(referenced_only=True)
+    builder = Builder(sphinx_source, sphinx_output, parallel=False, provisioning_options=options)
+
+    builder.build(html_dir)
+    assert (target / "classcar__coll__graph.svg").exists()
+    assert (target / "open.png").exists()
+    assert (target / "dynsections.js").exists()
+    assert not (target / "orphan__graph.svg").exists()
+    assert not (target / "closed.png").exists()
+
+    # images that aren't referenced anymore are removed
+    (html_dir / "classcar.html").write_text(PAGE.format(title="Car"), encoding="utf-8")
+    builder.build(html_dir)
+    assert not (target / "classcar__coll__graph.svg").exists()
+
+
+def test_build_precompresses_changed_text_resources(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+    graph = html_dir / "classcar__coll__graph.svg"
+    graph.write_text("<svg>" + "<g></g>" * 1000 + "</svg>", encoding="utf-8")
+    (html_dir / "open.png").write_text("png", encoding="utf-8")
+    sphinx_output = sphinx_source / ".build" / "html"
+    target = sphinx_output / "doxygen" / "html"
+    options = ProvisioningOptions(precompress=True)
+    builder = Builder(sphinx_source, sphinx_output, parallel=False, provisioning_options=options)
+
+    builder.build(html_dir)
+    assert (target / "classcar__coll__graph.svg.gz").exists()
+    assert not (target / "open.png.gz").exists()
+
+    graph.write_text("<svg>" + "<g/>" * 1000 + "</svg>", encoding="utf-8")
+    builder.build(html_dir)
+    assert gzip.decompress((target / "classcar__coll__graph.svg.gz").read_bytes()) == graph.read_bytes()
+
+    Cleaner(sphinx_source, sphinx_output, parallel=False).cleanup(html_dir)
+    assert not [f for f in target.rglob("*") if f.is_file()]
+
+
+def test_build_doesnt_recompress_incompressible_resources(sphinx_source: Path, monkeypatch: pytest.MonkeyPatch):
+    html_dir = sphinx_source / "doxygen" / "html"
+    (html_dir / "tiny.js").write_text("x", encoding="utf-8")
+    sphinx_output = sphinx_source / ".build" / "html"
+    target = sphinx_output / "doxygen" / "html"
+    options = ProvisioningOptions(precompress=True)
+    builder = Builder(sphinx_source, sphinx_output, parallel=False, provisioning_options=options)
+
+    builder.build(html_dir)
+    assert (target / "tiny.js").exists()
+    assert not (target / "tiny.js.gz").exists()
+
+    compressed = []
+    monkeypatch.setattr(resources, "compress_files", lambda files, *_: compressed.extend(files) or [])
+    builder.build(html_dir)
+    assert compressed == []
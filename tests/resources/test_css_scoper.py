@@ -0,0 +1,67 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+from pathlib import Path
+
+import pytest
+import sass
+
+from doxysphinx.resources import CssScoper
+from doxysphinx.utils.cache import CACHE_DIR_ENV_VAR
+
+
+def test_css_scoper_compiles_identical_stylesheets_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path / "cache"))
+    stylesheet = tmp_path / "doxygen.css"
+    stylesheet.write_text("h1 { color: red; }", encoding="utf-8")
+    first, second = tmp_path / "first.css", tmp_path / "second.css"
+
+    assert CssScoper(".doxygen-content").scope(stylesheet, first) == first
+
+    # a new project (or a fresh workspace) has to take the compiled stylesheet from the cache
+    def _fail(**kwargs):
+        raise AssertionError("stylesheet was compiled again")
+
+    monkeypatch.setattr(sass, "compile", _fail)
+    assert CssScoper(".doxygen-content").scope(stylesheet, second) == second
+    assert second.read_text(encoding="utf-8") == first.read_text(encoding="utf-8")
+    assert ".doxygen-content h1" in second.read_text(encoding="utf-8")
+
+
+def test_css_scoper_native_engine_scopes_without_sass(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    stylesheet = tmp_path / "doxygen-awesome.css"
+    stylesheet.write_text(
+        "@charset 'utf-8';\nhtml { --a: 1; }\nhtml.dark-mode img { filter: invert(); }\nh1 { color: red; }",
+        encoding="utf-8",
+    )
+    target = tmp_path / "target.css"
+
+    def _fail(**kwargs):
+        raise AssertionError("sass was used")
+
+    monkeypatch.setattr(sass, "compile", _fail)
+    assert CssScoper(".doxygen-content", "native").scope(stylesheet, target, "div { x: y; }") == target
+
+    css = target.read_text(encoding="utf-8")
+    assert css.startswith("@charset 'utf-8';\n/* ")
+    assert "\nhtml { --a: 1; }" in css
+    assert "html.dark-mode .doxygen-content img { filter: invert(); }" in css
+    assert ".doxygen-content h1 { color: red; }" in css
+    assert css.endswith("div { x: y; }")
+
+    # unchanged stylesheets aren't scoped again
+    assert CssScoper(".doxygen-content", "native").scope(stylesheet, target, "div { x: y; }") is None
+
+
+def test_precompiled_custom_styles_are_up_to_date():
+    resources = Path(__file__).parent / ".." / ".." / "doxysphinx" / "resources"
+    compiled = sass.compile(string=(resources / "custom.scss").read_text(encoding="utf-8"), output_style="expanded")
+
+    _, _, precompiled = (resources / "custom.css").read_text(encoding="utf-8").partition("\n")
+    assert precompiled == compiled, "custom.css has to be regenerated from custom.scss"
@@ -0,0 +1,126 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+import io
+import os
+import shutil
+from pathlib import Path
+from typing import List
+
+import pytest
+
+pytest.importorskip("sphinx")
+
+from sphinx.application import Sphinx  # noqa: E402
+
+from doxysphinx.writer import SHARED_FRAGMENT_GLOB  # noqa: E402
+
+PAGE = """<html>
+<head><title>Graphviz: {title}</title></head>
+<body>
+<div class="contents">
+<div class="fragment"><div class="line">{{rst}}</div><div class="line">{title} *rst* content</div></div>
+<p>{title} html content</p>
+</div>
+</body>
+</html>
+"""
+
+MENUDATA = """var menudata={children:[
+{text:"Main Page",url:"index.html"},
+{text:"Classes",url:"classcar.html",children:[
+{text:"Car",url:"classcar.html"},
+{text:"Engine",url:"classengine.html"}]}]}
+"""
+
+CONF = """
+extensions = ["doxysphinx.sphinx_extension"]
+doxysphinx_html_dirs = ["doxygen/html"]
+doxysphinx_css_engine = "native"
+"""
+
+
+@pytest.fixture
+def sphinx_source(tmp_path: Path) -> Path:
+    source = tmp_path / "source"
+    html_dir = source / "doxygen" / "html"
+    html_dir.mkdir(parents=True)
+    toc_test_dir = Path(__file__).parent / ".." / "toc"
+    (html_dir / "menudata.js").write_text(MENUDATA, encoding="utf-8")
+    shutil.copy(toc_test_dir / "index.html", html_dir)
+    (html_dir / "classcar.html").write_text(PAGE.format(title="Car"), encoding="utf-8")
+    (html_dir / "classengine.html").write_text(PAGE.format(title="Engine"), encoding="utf-8")
+    (source / "conf.py").write_text(CONF, encoding="utf-8")
+    (source / "index.rst").write_text("Demo\n====\n", encoding="utf-8")
+    return source
+
+
+def _build(source: Path) -> List[str]:
+    """Build the sphinx project (like a new sphinx-build run) and get the doxygen documents that were read."""
+    read: List[str] = []
+    output = source.parent / "build"
+    app = Sphinx(str(source), str(source), str(output), str(output / ".doctrees"), "html", status=None)
+    app.connect("source-read", lambda _, docname, __: read.append(docname) if docname.startswith("doxygen/") else None)
+    app.build()
+    return sorted(d for d in read if (source / f"{d}.html").exists())
+
+
+def test_sphinx_extension_reads_only_changed_doxygen_pages(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+
+    assert _build(sphinx_source) == ["doxygen/html/classcar", "doxygen/html/classengine", "doxygen/html/index"]
+    output = sphinx_source.parent / "build" / "doxygen" / "html" / "classcar.html"
+    assert "Car <em>rst</em> content" in output.read_text(encoding="utf-8")
+
+    assert _build(sphinx_source) == []
+
+    car = html_dir / "classcar.html"
+    os.utime(car, ns=(car.stat().st_atime_ns, car.stat().st_mtime_ns + 10**9))
+    assert _build(sphinx_source) == ["doxygen/html/classcar"]
+
+
+def test_sphinx_extension_ignores_html_files_outside_the_doxygen_dirs(sphinx_source: Path):
+    (sphinx_source / "_static").mkdir()
+    (sphinx_source / "_static" / "embedded.html").write_text("<html></html>", encoding="utf-8")
+    (sphinx_source / "page.html").write_text("<html></html>", encoding="utf-8")
+    output = sphinx_source.parent / "build"
+    warnings = io.StringIO()
+
+    app = Sphinx(
+        str(sphinx_source), str(sphinx_source), str(output), str(output / ".doctrees"), "html", None, None, warnings
+    )
+    app.build()
+
+    assert "_static/embedded" not in app.env.found_docs
+    assert "page" not in app.env.found_docs
+    assert "doxygen/html/classcar" in app.env.found_docs
+    assert "doxysphinx" not in warnings.getvalue()
+
+
+def test_sphinx_extension_prunes_shared_fragments_that_are_no_longer_referenced(sphinx_source: Path):
+    html_dir = sphinx_source / "doxygen" / "html"
+    (sphinx_source / "conf.py").write_text(f"{CONF}doxysphinx_shared_chrome = True\n", encoding="utf-8")
+    car = html_dir / "classcar.html"
+    page = (
+        PAGE.format(title="Car")
+        .replace("<body>", '<body><div id="top">Demo</div>')
+        .replace("</body>", '<hr class="footer"/><address>Generated on {date}</address></body>')
+    )
+    car.write_text(page.replace("{date}", "Mon"), encoding="utf-8")
+
+    _build(sphinx_source)
+    fragments = sorted(html_dir.glob(SHARED_FRAGMENT_GLOB))
+    assert fragments
+
+    car.write_text(page.replace("{date}", "Tue"), encoding="utf-8")
+    assert _build(sphinx_source) == ["doxygen/html/classcar"]
+
+    current_fragments = sorted(html_dir.glob(SHARED_FRAGMENT_GLOB))
+    assert len(current_fragments) == len(fragments)
+    assert current_fragments != fragments
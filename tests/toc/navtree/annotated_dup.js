@@ -0,0 +1,4 @@
+var annotated_dup =
+[
+    [ "demo", "namespacedemo.html", "namespacedemo" ]
+];
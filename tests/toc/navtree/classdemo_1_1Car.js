@@ -0,0 +1,6 @@
+var classdemo_1_1Car =
+[
+    [ "Wheel", "classdemo_1_1Car_1_1Wheel.html", null ],
+    [ "Car", "classdemo_1_1Car.html#a2b4ac1b9a1d8e2c6", null ],
+    [ "drive", "classdemo_1_1Car.html#a93b3b0c2e1a0e6d1", null ]
+];
@@ -0,0 +1,5 @@
+var namespacedemo =
+[
+    [ "Car", "classdemo_1_1Car.html", "classdemo_1_1Car" ],
+    [ "Engine&lt; T &gt;", "classdemo_1_1Engine.html", null ]
+];
@@ -0,0 +1,9 @@
+var NAVTREEINDEX0 =
+{
+"annotated.html":[1,0],
+"classdemo_1_1Car.html":[1,0,0,0],
+"classdemo_1_1Car.html#a2b4ac1b9a1d8e2c6":[1,0,0,0,1],
+"classdemo_1_1Car.html#a93b3b0c2e1a0e6d1":[1,0,0,0,2],
+"classdemo_1_1Car_1_1Wheel.html":[1,0,0,0,0],
+"classes.html":[1,1]
+};
@@ -0,0 +1,10 @@
+var NAVTREEINDEX1 =
+{
+"classdemo_1_1Engine.html":[1,0,0,1],
+"files.html":[2,0],
+"functions.html":[1,2,0],
+"functions_func.html":[1,2,1],
+"index.html":[],
+"modules.html":[0],
+"namespacedemo.html":[1,0,0]
+};
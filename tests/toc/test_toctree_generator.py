@@ -7,11 +7,13 @@
 #  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
 # =====================================================================================
 
+import pickle  # nosec: B403
+import shutil
 from pathlib import Path
 
 import pytest
 
-from doxysphinx.toc import DoxygenTocGenerator
+from doxysphinx.toc import DoxygenNavtreeTocGenerator, DoxygenTocGenerator
 
 
 def test_tocgenerator_works_as_expected():
@@ -22,3 +24,62 @@ def test_tocgenerator_works_as_expected():
     assert result[5] == "   Modules <modules>"
     assert result[7] == "   Files <files_files>"
     assert result[8] == "   Illegal/#^ chárs <a_illegal__chars>"
+
+
+def test_tocgenerator_pickles_only_the_toc_index():
+    tocgen = DoxygenTocGenerator(Path(__file__).parent)
+    path = Path("index.html")
+
+    unpickled = pickle.loads(pickle.dumps(tocgen))  # nosec: B301
+
+    assert list(unpickled.generate_toc_for(path)) == list(tocgen.generate_toc_for(path))
+    assert list(unpickled.generate_toc_for(Path("not_in_menu.html"))) == []
+    assert set(vars(unpickled)) == {"_source_dir", "_toc_index", "_structural_documents"}
+
+
+@pytest.fixture
+def navtree_tocgen() -> DoxygenNavtreeTocGenerator:
+    return DoxygenNavtreeTocGenerator(Path(__file__).parent / "navtree")
+
+
+def test_navtree_tocgenerator_merges_repeated_pages(navtree_tocgen: DoxygenNavtreeTocGenerator):
+    result = list(navtree_tocgen.generate_toc_for(Path("annotated.html")))
+    assert result[:2] == [".. toctree::", "   :caption: Classes"]
+    assert result[5:] == ["   demo <namespacedemo>", "   Class Index <classes>", "   Class Members <functions>", ""]
+
+
+def test_navtree_tocgenerator_skips_anchors(navtree_tocgen: DoxygenNavtreeTocGenerator):
+    result = list(navtree_tocgen.generate_toc_for(Path("classdemo_1_1Car.html")))
+    assert result[1] == "   :caption: Car"
+    assert result[5:] == ["   Wheel <classdemo_1_1Car_1_1Wheel>", ""]
+
+    result = list(navtree_tocgen.generate_toc_for(Path("namespacedemo.html")))
+    assert result[5:] == ["   Car <classdemo_1_1Car>", "   Engine< T > <classdemo_1_1Engine>", ""]
+
+
+def test_navtree_tocgenerator_loads_only_needed_files(navtree_tocgen: DoxygenNavtreeTocGenerator):
+    result = list(navtree_tocgen.generate_toc_for(Path("index.html")))
+    assert result[5:] == ["   Modules <modules>", "   Classes <annotated>", "   Files <files>", ""]
+    assert list(navtree_tocgen.generate_toc_for(Path("classdemo_1_1Engine.html"))) == []
+    assert list(navtree_tocgen.generate_toc_for(Path("not_in_navtree.html"))) == []
+
+    assert set(navtree_tocgen._index_shards) == {1}
+    assert set(navtree_tocgen._tree_files) == {"annotated_dup", "namespacedemo"}
+
+
+def test_navtree_tocgenerator_ignores_stale_index_entries(tmp_path: Path):
+    shutil.copytree(Path(__file__).parent / "navtree", tmp_path, dirs_exist_ok=True)
+    index = tmp_path / "navtreeindex0.js"
+    index.write_text(index.read_text().replace("[1,0,0,0,0]", "[1,0,0,1]"))
+
+    assert list(DoxygenNavtreeTocGenerator(tmp_path).generate_toc_for(Path("classdemo_1_1Car_1_1Wheel.html"))) == []
+
+
+def test_tocgenerator_parses_the_html_template_only_for_structural_documents(tmp_path: Path):
+    # there's no index.html to parse the template from - and it isn't needed as all menu entries are pages
+    (tmp_path / "menudata.js").write_text(
+        'var menudata={children:[{text:"Main Page",url:"index.html"},{text:"Classes",url:"annotated.html"}]}\n',
+        encoding="utf-8",
+    )
+
+    assert list(DoxygenTocGenerator(tmp_path).structural_documents()) == []
@@ -0,0 +1,43 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+from pathlib import Path
+
+import pytest
+
+from doxysphinx.utils.cache import CACHE_DIR_ENV_VAR, UserCache, user_cache_dir
+
+
+def test_user_cache_dir_prefers_environment_variable(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path / "env"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    assert user_cache_dir() == tmp_path / "env"
+
+    monkeypatch.delenv(CACHE_DIR_ENV_VAR)
+    assert user_cache_dir() == tmp_path / "xdg" / "doxysphinx"
+
+
+def test_user_cache_stores_values(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(tmp_path))
+    cache = UserCache("test")
+
+    assert cache.get("key") is None
+    cache.put("key", "välue")
+    assert cache.get("key") == "välue"
+    assert [f.name for f in (tmp_path / "test").iterdir()] == ["key"]
+
+
+def test_user_cache_ignores_errors(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(not_a_directory))
+    cache = UserCache("test")
+
+    cache.put("key", "value")
+    assert cache.get("key") is None
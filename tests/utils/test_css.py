@@ -0,0 +1,44 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+import pytest
+
+from doxysphinx.utils.css import scope_css, tokenize_css
+
+
+@pytest.mark.parametrize(
+    "css, expected",
+    [
+        ("h1 { color: red; }", ".s h1 { color: red; }"),
+        ("h1,\nh2 > p:is(.a, .b) { x: y }", ".s h1,\n.s h2 > p:is(.a, .b) { x: y }"),
+        ('a[title="a,b{"] { x: y }', '.s a[title="a,b{"] { x: y }'),
+        ("/* c, d { */\nh1 { x: y }", "/* c, d { */\n.s h1 { x: y }"),
+        ("html { --a: 1; } :root { --b: 2; }", "html { --a: 1; } :root { --b: 2; }"),
+        ("html.dark-mode .x, html > body { x: y }", "html.dark-mode .s .x, .s html > body { x: y }"),
+        ("html > body .x, html > div { x: y }", "html > body .s .x, html .s > div { x: y }"),
+        ("body > div, body.x p, body { x: y }", "body .s > div, body.x .s p, .s body { x: y }"),
+        ("bodyx > a, > body a { x: y }", ".s bodyx > a, .s > body a { x: y }"),
+        (
+            "@media (max-width: 1px) { a { x: y } html { x: y } }",
+            "@media (max-width: 1px) { .s a { x: y } html { x: y } }",
+        ),
+        ("@keyframes spin { from { x: y } to { x: z } }", "@keyframes spin { from { x: y } to { x: z } }"),
+        (
+            "@font-face { font-family: f; } @import url('x.css'); a { x: y }",
+            "@font-face { font-family: f; } @import url('x.css'); .s a { x: y }",
+        ),
+    ],
+)
+def test_scope_css(css: str, expected: str):
+    assert "".join(scope_css(css, ".s")) == expected
+
+
+def test_tokenize_css_keeps_the_content():
+    css = "a { content: '}'; } /* unterminated"
+    assert list(tokenize_css(css)) == ["a ", "{", " content: ", "'}'", ";", " ", "}", " ", "/* unterminated"]
@@ -7,9 +7,22 @@
 #  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
 # =====================================================================================
 
+import gzip
+import os
 from pathlib import Path
 
-from doxysphinx.utils.files import write_file
+import pytest
+
+from doxysphinx.utils.files import (
+    PROVISIONING_STRATEGIES,
+    ContentAddressedStore,
+    FileManifest,
+    compress_files,
+    copy_if_different,
+    delete_files,
+    provide_file,
+    write_file,
+)
 
 
 def test_writefile(tmp_path):
@@ -21,3 +34,130 @@ def test_writefile(tmp_path):
     result = file.read_text()
     content.append("")  # because we write a trailing newline in every case but join won't add it.
     assert "\n".join(content) == result
+
+
+def test_copy_if_different_with_manifest_detects_same_size_changes(tmp_path: Path):
+    source, target = tmp_path / "source", tmp_path / "target"
+    (source / "search").mkdir(parents=True)
+    target.mkdir()
+    (source / "a.css").write_text("aaa")
+    (source / "search" / "b.js").write_text("bbb")
+
+    manifest = FileManifest(tmp_path / "manifest.json")
+    assert len(copy_if_different(source, target, "*.css", "search/*.*", manifest=manifest)) == 2
+    manifest.save()
+
+    # unchanged
+    manifest = FileManifest(tmp_path / "manifest.json")
+    assert copy_if_different(source, target, "*.css", "search/*.*", manifest=manifest) == []
+
+    # touched but the same content
+    os.utime(source / "a.css", ns=(0, 0))
+    assert copy_if_different(source, target, "*.css", "search/*.*", manifest=manifest) == []
+
+    # changed with the same size
+    (source / "search" / "b.js").write_text("ccc")
+    assert copy_if_different(source, target, "*.css", "search/*.*", manifest=manifest) == [target / "search" / "b.js"]
+    assert (target / "search" / "b.js").read_text() == "ccc"
+
+
+@pytest.mark.parametrize("strategy", PROVISIONING_STRATEGIES)
+def test_provide_file_provides_content_or_falls_back_to_copy(tmp_path: Path, strategy: str):
+    source, target = tmp_path / "source.svg", tmp_path / "target.svg"
+    source.write_text("<svg/>")
+    target.write_text("old content")
+
+    used_strategy = provide_file(source, target, strategy)
+
+    assert used_strategy in (strategy, "copy")
+    assert target.read_text() == "<svg/>"
+
+
+def test_provide_file_never_writes_through_links(tmp_path: Path):
+    source, target = tmp_path / "source.svg", tmp_path / "target.svg"
+    source.write_text("<svg/>")
+    if provide_file(source, target, "hardlink") != "hardlink":
+        pytest.skip("hardlinks aren't supported here")
+
+    provide_file(source, target, "copy")
+    target.write_text("changed")
+
+    assert source.read_text() == "<svg/>"
+
+
+def test_copy_if_different_with_io_workers_copies_all_files(tmp_path: Path):
+    source, target = tmp_path / "source", tmp_path / "target"
+    (source / "search").mkdir(parents=True)
+    target.mkdir()
+    for i in range(50):
+        (source / f"graph_{i}.svg").write_text(f"<svg>{i}</svg>")
+        (source / "search" / f"all_{i}.js").write_text(f"var i={i}")
+
+    manifest = FileManifest(tmp_path / "manifest.json")
+    copied = copy_if_different(source, target, "*.svg", "search/*.*", manifest=manifest, io_workers=8)
+
+    assert len(copied) == 100
+    assert all(f.read_text() == (source / f.relative_to(target)).read_text() for f in copied)
+    assert copy_if_different(source, target, "*.svg", "search/*.*", manifest=manifest, io_workers=8) == []
+
+
+def test_content_addressed_store_stores_identical_content_once(tmp_path: Path):
+    first, second = tmp_path / "first" / "jquery.js", tmp_path / "second" / "jquery.js"
+    for file in [first, second]:
+        file.parent.mkdir()
+        file.write_text("var jquery")
+    store = ContentAddressedStore(tmp_path / "store")
+
+    stored = store.add(first)
+
+    assert store.add(second) == stored
+    assert stored.name.startswith("jquery.") and stored.suffix == ".js"
+    assert stored.read_text() == "var jquery"
+    assert store.add_content("jquery.js", b"var jquery") == stored
+    assert store.add_content("jquery.js", b"var other") != stored
+    assert len(list(store.directory.iterdir())) == 2
+
+
+def test_content_addressed_store_prunes_files_without_owner(tmp_path: Path):
+    store = ContentAddressedStore(tmp_path / "store")
+    first, second, shared = (store.add_content(f"{n}.js", n.encode()) for n in ["first", "second", "shared"])
+    store.reference("first", [first, shared])
+    store.reference("second", [second, shared])
+
+    assert store.prune() == []
+
+    store.reference("second", [shared])
+    assert store.prune() == [second]
+
+    # owners that are gone lose their record as well
+    store.unreference("first")
+    assert sorted(store.prune(lambda owner: owner != "second")) == sorted([first, shared])
+    assert not list(store.directory.glob("[!.]*")) and not list(store.directory.rglob("*.json"))
+
+
+def test_delete_files_deletes_existing_files_in_batches(tmp_path: Path):
+    files = [tmp_path / f"file_{i}.png" for i in range(10)]
+    for file in files[:7]:
+        file.write_text("png")
+
+    deleted = delete_files(files, io_workers=4, batch_size=3)
+
+    assert deleted == files[:7]
+    assert not list(tmp_path.iterdir())
+
+
+def test_compress_files_writes_reproducible_gzip_siblings(tmp_path: Path):
+    graph, tiny = tmp_path / "graph.svg", tmp_path / "tiny.js"
+    graph.write_text("<svg>" + "<g></g>" * 1000 + "</svg>")
+    tiny.write_text("x")
+    (tmp_path / "tiny.js.gz").write_bytes(b"outdated")
+
+    compressed = compress_files([graph, tiny], io_workers=2)
+
+    gzipped = tmp_path / "graph.svg.gz"
+    assert gzipped in compressed
+    assert gzip.decompress(gzipped.read_bytes()) == graph.read_bytes()
+    assert not (tmp_path / "tiny.js.gz").exists()  # not smaller than the original
+    first_content = gzipped.read_bytes()
+    compress_files([graph])
+    assert gzipped.read_bytes() == first_content
@@ -0,0 +1,190 @@
+# =====================================================================================
+#  C O P Y R I G H T
+# -------------------------------------------------------------------------------------
+#  Copyright (c) 2023 by Robert Bosch GmbH. All rights reserved.
+#
+#  Author(s):
+#  - Markus Braun, :em engineering methods AG (contracted by Robert Bosch GmbH)
+# =====================================================================================
+
+from pathlib import Path
+from typing import Iterable
+
+import pytest
+from lxml import html as etree
+
+from doxysphinx.html_parser import DoxygenHtmlParser
+from doxysphinx.writer import (
+    SHARED_FRAGMENT_GLOB,
+    RstWriter,
+    WriterOptions,
+    minify_tree,
+)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<title>Demo: {title}</title>
+<link href="doxygen.css" rel="stylesheet" type="text/css" />
+</head>
+<body>
+<div id="top"><!-- do not remove this div, it is closed by doxygen! -->
+<div id="titlearea">Demo</div>
+<div id="main-nav"></div>
+</div><!-- top -->
+<div class="header">
+  <div class="headertitle"><div class="title">{title}</div></div>
+</div><!--header-->
+<div class="contents">
+<div class="fragment"><div class="line">{{rst}}</div><div class="line">{title} *rst* content</div></div>
+</div><!-- contents -->
+<!-- start footer part -->
+<hr class="footer"/><address class="footer"><small>Generated by doxygen</small></address>
+</body>
+</html>
+"""
+
+
+class _NoTocGenerator:
+    def __init__(self, source_dir: Path):
+        pass
+
+    def generate_toc_for(self, file: Path) -> Iterable[str]:
+        return []
+
+
+@pytest.fixture
+def html_dir(tmp_path: Path) -> Path:
+    for title in ["First", "Second"]:
+        (tmp_path / f"{title.lower()}.html").write_text(PAGE_TEMPLATE.format(title=title), encoding="utf-8")
+    return tmp_path
+
+
+def _write(html_dir: Path, options: WriterOptions, name: str) -> str:
+    parser = DoxygenHtmlParser(html_dir)
+    writer = RstWriter(html_dir, _NoTocGenerator, options)
+    html_file = html_dir / f"{name}.html"
+    rst_file = writer.write(parser.parse(html_file), html_file.with_suffix(".rst"), "hash")
+    return rst_file.read_text(encoding="utf-8")
+
+
+def test_mixed_rst_contains_chrome_inline_by_default(html_dir: Path):
+    rst = _write(html_dir, WriterOptions(), "first")
+
+    assert 'id="titlearea"' in rst
+    assert "First *rst* content" in rst
+    assert not list(html_dir.glob(SHARED_FRAGMENT_GLOB))
+
+
+def test_shared_chrome_is_written_once_and_referenced(html_dir: Path):
+    first = _write(html_dir, WriterOptions(shared_chrome=True), "first")
+    second = _write(html_dir, WriterOptions(shared_chrome=True), "second")
+
+    fragments = sorted(html_dir.glob(SHARED_FRAGMENT_GLOB))
+    assert len(fragments) == 2  # one prefix + one suffix shared by both pages
+
+    for rst in [first, second]:
+        assert 'id="titlearea"' not in rst
+        assert 'class="footer"' not in rst
+        for fragment in fragments:
+            assert f":file: {fragment.name}" in rst
+
+    assert "First *rst* content" in first
+    assert 'class="title">Second</div>' in second
+
+    prefix = next(f for f in fragments if 'id="titlearea"' in f.read_text(encoding="utf-8"))
+    assert "<title>" not in prefix.read_text(encoding="utf-8")
+
+
+def test_failed_rendering_keeps_the_previous_rst(html_dir: Path, monkeypatch: pytest.MonkeyPatch):
+    previous = _write(html_dir, WriterOptions(), "first")
+
+    def _broken_rst(self, line_iter):
+        yield "half of the rst"
+        raise RuntimeError("broken input")
+
+    monkeypatch.setattr(RstWriter, "_iterate_rst", _broken_rst)
+    with pytest.raises(RuntimeError):
+        _write(html_dir, WriterOptions(), "first")
+
+    assert (html_dir / "first.rst").read_text(encoding="utf-8") == previous
+    assert not list(html_dir.glob("*.tmp"))
+
+
+def test_options_fingerprint_is_empty_for_defaults():
+    assert WriterOptions().fingerprint() == ""
+    assert WriterOptions(shared_chrome=True).fingerprint() != ""
+
+
+def test_shared_resources_are_referenced_in_mixed_rst(html_dir: Path):
+    options = WriterOptions(shared_resources=(("doxygen.css", "../_doxysphinx_resources/doxygen.1234.css"),))
+
+    rst = _write(html_dir, options, "first")
+
+    assert 'href="../_doxysphinx_resources/doxygen.1234.css"' in rst
+    assert 'href="doxygen.css"' not in rst
+
+
+def test_shared_resources_are_referenced_in_pages_without_rst(html_dir: Path):
+    pre = '<pre class="fragment">line one\nline two\n    indented</pre>'
+    page = PAGE_TEMPLATE.format(title="Plain").replace("{rst}", "").replace('"contents">', f'"contents">{pre}')
+    (html_dir / "plain.html").write_text(page, encoding="utf-8")
+    options = WriterOptions(shared_resources=(("doxygen.css", "../_doxysphinx_resources/doxygen.1234.css"),))
+
+    rst = _write(html_dir, options, "plain")
+
+    assert ":file:" not in rst
+    assert 'href="../_doxysphinx_resources/doxygen.1234.css"' in rst
+    assert '<div class="line">line two</div><div class="line">    indented</div>' in rst
+
+
+def test_minify_strips_comments_and_whitespace_but_keeps_fragments():
+    source = """<html><body>
+    <!-- a comment -->
+    <div   class="contents">
+        <p>Some    text</p>
+        <div class="fragment"><div class="line">    int  x;</div></div>
+        <pre>  keep   this  </pre>
+    </div>
+</body></html>"""
+    tree = etree.document_fromstring(source).getroottree()
+
+    minify_tree(tree)
+    result = etree.tostring(tree, encoding="unicode", method="html")
+
+    assert "a comment" not in result
+    assert "<p>Some text</p>" in result
+    assert '<div class="line">    int  x;</div>' in result
+    assert "<pre>  keep   this  </pre>" in result
+    assert "  " not in result.replace("    int  x;", "").replace("  keep   this  ", "")
+
+
+def test_minified_mixed_rst_keeps_words_separated(html_dir: Path):
+    page = PAGE_TEMPLATE.format(title="Spacing").replace(
+        '<div class="contents">', '<div class="contents">\n<p>Hello\n    world</p>\n<b>a</b>\n  <i>b</i>'
+    )
+    (html_dir / "spacing.html").write_text(page, encoding="utf-8")
+
+    rst = _write(html_dir, WriterOptions(minify=True), "spacing")
+
+    assert "<p>Hello world</p>" in rst
+    assert "<b>a</b> <i>b</i>" in rst
+
+
+def test_minified_mixed_rst_renders_inline_rst(html_dir: Path):
+    page = PAGE_TEMPLATE.format(title="Inline").replace(
+        '<div class="contents">', '<div class="contents">\n<p>See <code>:ref:`target`</code> for details.</p>'
+    )
+    (html_dir / "inline.html").write_text(page, encoding="utf-8")
+
+    rst = _write(html_dir, WriterOptions(minify=True), "inline")
+
+    assert "<snippet" not in rst
+    assert "\n   :ref:`target`\n" in rst
+
+
+def test_minified_mixed_rst_keeps_rst_content(html_dir: Path):
+    rst = _write(html_dir, WriterOptions(minify=True), "first")
+
+    assert "<!--" not in rst
+    assert "First *rst* content" in rst